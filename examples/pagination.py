@@ -28,6 +28,9 @@ xata = XataClient()
 # Please refer to https://xata.io/docs/api-reference/db/db_branch_name/tables/table_name/query#query-table
 # for more options for options on pagination, sorting, filters, or query conditions
 
+# Tip: `xata.data().query_iter("nba_teams", query)` runs the same loop for you and
+# yields the records of all pages, while fetching the next page in the background.
+
 # Initalize controls
 more = True
 cursor = None
@@ -0,0 +1,68 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import random
+
+import pytest
+import utils
+from mock_server import MockXataServer
+
+from xata.helpers import BulkProcessor
+
+# round trip of a bulk insert in the same region
+LATENCY = {"records.bulk_insert": 0.01}
+
+
+def get_records(n: int) -> list[dict]:
+    rnd = random.Random(utils.SEED)
+    return [{k: v for k, v in utils.get_record(rnd, i).items() if k not in ("id", "xata")} for i in range(n)]
+
+
+RECORDS = get_records(5000)
+
+
+def ingest(server: MockXataServer, **kwargs):
+    bp = BulkProcessor(server.client(), **kwargs)
+    bp.put_records("Posts", RECORDS)
+    bp.flush_queue()
+    return bp
+
+
+class TestBulkProcessorThroughput(object):
+    @pytest.mark.benchmark(group="bulk processor: 5000 records, 10ms per batch")
+    @pytest.mark.parametrize("thread_pool_size,batch_size", [(1, 50), (4, 50), (4, 200), (8, 200)])
+    def test_ingest(self, benchmark, thread_pool_size, batch_size):
+        with MockXataServer(latency=LATENCY) as server:
+            bp = benchmark.pedantic(
+                ingest,
+                args=(server,),
+                kwargs={"thread_pool_size": thread_pool_size, "batch_size": batch_size},
+                setup=server.reset,
+                rounds=3,
+            )
+            assert bp.get_stats()["total"] == len(RECORDS)
+            assert len(server.get_records("Posts")) == len(RECORDS)
+
+    @pytest.mark.benchmark(group="bulk processor: 5000 records, 10ms per batch")
+    def test_ingest_adaptive(self, benchmark):
+        with MockXataServer(latency=LATENCY) as server:
+            benchmark.pedantic(
+                ingest, args=(server,), kwargs={"thread_pool_size": 4, "adaptive": True}, setup=server.reset, rounds=3
+            )
+            assert len(server.get_records("Posts")) == len(RECORDS)
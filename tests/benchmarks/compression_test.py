@@ -0,0 +1,55 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import importlib.util
+
+import orjson
+import pytest
+import utils
+
+from xata.compression import Compressor
+
+# bulk insert of 500 records, a typical egress-heavy batch
+BULK_INSERT = orjson.dumps({"records": utils.get_query_page(500)["records"]})
+QUERY_PAGE = orjson.dumps(utils.get_query_page(200))
+
+ENCODINGS = [("gzip", 1), ("gzip", 5), ("gzip", 9)]
+if importlib.util.find_spec("zstandard") is not None:
+    ENCODINGS += [("zstd", 1), ("zstd", 3), ("zstd", 9)]
+
+
+def compress(benchmark, encoding: str, level: int, data: bytes):
+    compressor = Compressor(encoding, threshold=0, level=level)
+    out = benchmark(compressor.compress, data)
+    # bytes saved per CPU time spent, compared in the report
+    benchmark.extra_info["bytes_in"] = len(data)
+    benchmark.extra_info["bytes_out"] = len(out)
+    benchmark.extra_info["ratio"] = round(len(out) / len(data), 3)
+
+
+class TestCompression(object):
+    @pytest.mark.benchmark(group="compress: bulk insert, 500 records")
+    @pytest.mark.parametrize("encoding,level", ENCODINGS)
+    def test_compress_bulk_insert(self, benchmark, encoding, level):
+        compress(benchmark, encoding, level, BULK_INSERT)
+
+    @pytest.mark.benchmark(group="compress: query page, 200 records")
+    @pytest.mark.parametrize("encoding,level", ENCODINGS)
+    def test_compress_query_page(self, benchmark, encoding, level):
+        compress(benchmark, encoding, level, QUERY_PAGE)
@@ -0,0 +1,52 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import json
+
+import orjson
+import pytest
+import utils
+
+from xata.api_response import ApiResponse
+from xata.client import XataClient
+
+QUERY_PAGE = utils.get_query_page(200)
+QUERY_PAGE_BYTES = orjson.dumps(QUERY_PAGE)
+TRANSACTION = utils.get_transaction(1000)
+
+
+class TestJsonCodec(object):
+    @pytest.mark.benchmark(group="encode: transaction, 1000 operations")
+    def test_encode_transaction_stdlib(self, benchmark):
+        # what requests does for `json=payload`
+        benchmark(lambda: json.dumps(TRANSACTION, allow_nan=False).encode("utf-8"))
+
+    @pytest.mark.benchmark(group="encode: transaction, 1000 operations")
+    def test_encode_transaction_orjson(self, benchmark):
+        client = XataClient(api_key="api_key", workspace_id="ws_id")
+        benchmark(client.records().encode_payload, {}, TRANSACTION)
+
+    @pytest.mark.benchmark(group="decode: query page, 200 records")
+    def test_decode_query_page_stdlib(self, benchmark):
+        benchmark(lambda: utils.make_response(200, QUERY_PAGE_BYTES).json())
+
+    @pytest.mark.benchmark(group="decode: query page, 200 records")
+    def test_decode_query_page_api_response(self, benchmark):
+        r = benchmark(lambda: ApiResponse(utils.make_response(200, QUERY_PAGE_BYTES)))
+        assert len(r["records"]) == 200
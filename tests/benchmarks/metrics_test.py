@@ -0,0 +1,69 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import pytest
+import utils
+from requests.adapters import BaseAdapter
+
+from xata.client import XataClient
+from xata.hooks import RequestEvent
+from xata.metrics import Metrics
+from xata.transport import Transport
+
+QUERY_PAGE = b'{"records": [], "meta": {"page": {"cursor": "c", "more": false}}}'
+
+
+class StaticAdapter(BaseAdapter):
+    """
+    Answers every request with the same response, to measure the client side only
+    """
+
+    def send(self, request, **kwargs):
+        resp = utils.make_response(200, QUERY_PAGE)
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+
+def get_client(**kwargs) -> XataClient:
+    transport = Transport()
+    transport.session.mount("https://", StaticAdapter())
+    return XataClient(api_key="api_key", workspace_id="ws_id", db_name="db", transport=transport, **kwargs)
+
+
+class TestMetricsOverhead(object):
+    @pytest.mark.benchmark(group="request: query, static response")
+    def test_query_without_metrics(self, benchmark):
+        client = get_client()
+        benchmark(client.data().query, "Posts", {})
+
+    @pytest.mark.benchmark(group="request: query, static response")
+    def test_query_with_metrics(self, benchmark):
+        client = get_client(metrics=Metrics())
+        benchmark(client.data().query, "Posts", {})
+        assert client.get_metrics()["data.query"]["calls"] > 0
+
+    @pytest.mark.benchmark(group="metrics: observe one request")
+    def test_observe(self, benchmark):
+        metrics = Metrics()
+        event = RequestEvent("POST", "/db/db:main/tables/Posts/query", "https://ws.xata.sh", {}, b"{}")
+        event.elapsed, event.status_code, event.bytes_in = 0.042, 200, 100
+        benchmark(metrics.after_response, event)
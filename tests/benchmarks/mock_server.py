@@ -0,0 +1,584 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+"""
+Local stand-in for the Xata data plane, to run the SDK against without network access.
+
+Implements the routes the SDK hot paths use: query with cursors, bulk insert, records,
+transactions, SQL, files and ask with server-sent events. Latency, rate limits and
+errors can be injected:
+
+    with MockXataServer(latency=0.005, rate_limit=200) as server:
+        server.add_records("Posts", [{"title": "a"}])
+        client = server.client()
+        client.data().query("Posts")
+"""
+
+import base64
+import random
+import re
+import threading
+import time
+from fnmatch import fnmatchcase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import orjson
+
+from xata.async_client import AsyncXataClient
+from xata.client import XataClient
+from xata.routes import operation_name, route_template
+from xata.transport import AsyncTransport, Transport
+
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 20
+MAX_BULK_SIZE = 1000
+MAX_TRANSACTION_OPERATIONS = 1000
+ASK_ANSWER = "Xata is a serverless database with built-in search and analytics."
+SQL_TABLE = re.compile(r'\bFROM\s+"?(\w+)"?', re.IGNORECASE)
+SQL_LIMIT = re.compile(r"\bLIMIT\s+(\d+)", re.IGNORECASE)
+
+
+class BadRequest(Exception):
+    def __init__(self, message: str, status_code: int = 400, errors: list = None):
+        self.status_code = status_code
+        self.errors = errors
+        super().__init__(message)
+
+
+class MockXataServer(object):
+    """
+    Threaded HTTP server with in-memory tables, one per server, shared by all branches
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        rate_limit: float = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        sse_interval: float = 0.0,
+        seed: int = 42,
+    ):
+        """
+        :param latency: float | dict Seconds to wait before answering, or a dict of operation to seconds,
+            e.g. `{"data.query": 0.02}`, operations without entry answer right away (default: 0)
+        :param rate_limit: float Requests per second, exceeding requests get a 429 (default: None, unlimited)
+        :param error_rate: float Share of requests answered with `error_status` (default: 0)
+        :param error_status: int Status of injected errors (default: 503)
+        :param sse_interval: float Seconds between server-sent events of ask (default: 0)
+        :param seed: int Seed of the random error injection and sampling
+        """
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.sse_interval = sse_interval
+        self.random = random.Random(seed)
+
+        self.tables = {}
+        self.files = {}
+        self.cursors = {}
+        self.failures = []
+        self.requests = {}
+        self.sequence = 0
+        self.lock = threading.Lock()
+        self.tokens = rate_limit
+        self.refilled = time.monotonic()
+        self.httpd = None
+        self.thread = None
+
+    # -- lifecycle
+
+    def start(self) -> "MockXataServer":
+        server = self
+
+        class Handler(MockXataHandler):
+            mock = server
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-xata", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self) -> "MockXataServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:%d" % self.httpd.server_port
+
+    def client(self, **kwargs) -> XataClient:
+        """
+        A client sending every request to this server
+        """
+        kwargs.setdefault("db_name", "db")
+        return XataClient(api_key="api_key", workspace_id="ws", transport=LocalTransport(self.url), **kwargs)
+
+    def async_client(self, **kwargs) -> AsyncXataClient:
+        kwargs.setdefault("db_name", "db")
+        return AsyncXataClient(api_key="api_key", workspace_id="ws", transport=LocalAsyncTransport(self.url), **kwargs)
+
+    # -- data and behavior
+
+    def add_records(self, table_name: str, records: list[dict]) -> list[str]:
+        with self.lock:
+            return [self._insert(table_name, record) for record in records]
+
+    def get_records(self, table_name: str) -> list[dict]:
+        with self.lock:
+            return list(self.tables.get(table_name, {}).values())
+
+    def fail(self, operation: str, status_code: int = 503, times: int = 1):
+        """
+        Answer the next requests of an operation with an error
+
+        :param operation: str Namespace method, e.g. `records.bulk_insert`, wildcards allowed
+        :param status_code: int
+        :param times: int Amount of requests to fail
+        """
+        with self.lock:
+            self.failures.append([operation, status_code, times])
+
+    def reset(self):
+        with self.lock:
+            self.tables, self.files, self.cursors, self.failures, self.requests = {}, {}, {}, [], {}
+
+    def _insert(self, table_name: str, record: dict, record_id: str = None) -> str:
+        self.sequence += 1
+        record_id = record.get("id") or record_id or "rec_%020d" % self.sequence
+        now = "2023-01-01T00:00:00.000Z"
+        self.tables.setdefault(table_name, {})[record_id] = {
+            **record,
+            "id": record_id,
+            "xata": {"version": 0, "createdAt": now, "updatedAt": now},
+        }
+        return record_id
+
+    def _admit(self, operation: str) -> tuple:
+        """
+        Count the request and decide on injected failures
+
+        :returns tuple status code and retry-after, or None to serve the request
+        """
+        with self.lock:
+            self.requests[operation] = self.requests.get(operation, 0) + 1
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                self.tokens = min(self.rate_limit, self.tokens + (now - self.refilled) * self.rate_limit)
+                self.refilled = now
+                if self.tokens < 1:
+                    return 429, (1 - self.tokens) / self.rate_limit
+                self.tokens -= 1
+            for failure in self.failures:
+                if fnmatchcase(operation, failure[0]):
+                    failure[2] -= 1
+                    if failure[2] <= 0:
+                        self.failures.remove(failure)
+                    return failure[1], None
+            if self.error_rate and self.random.random() < self.error_rate:
+                return self.error_status, None
+        return None
+
+    def _delay(self, operation: str) -> float:
+        if isinstance(self.latency, dict):
+            return self.latency.get(operation, 0.0)
+        return self.latency
+
+
+class MockXataHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock: MockXataServer = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_PATCH(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        parts = urlsplit(self.path)
+        route = route_template(parts.path)
+        operation = operation_name(self.command, route)
+        body = self.rfile.read(int(self.headers.get("content-length", 0) or 0))
+        params = dict(zip(re.findall(r"\{(\w+)\}", route), self._values(route, parts.path)))
+
+        delay = self.mock._delay(operation)
+        if delay:
+            time.sleep(delay)
+        failure = self.mock._admit(operation)
+        if failure is not None:
+            status, retry_after = failure
+            headers = {"retry-after": "%.3f" % retry_after} if retry_after is not None else {}
+            return self._json(status, {"message": "injected error %d" % status}, headers)
+
+        handler = getattr(self, "_" + operation.replace(".", "_"), None)
+        if handler is None:
+            return self._json(404, {"message": "%s %s is not implemented by the mock server" % (self.command, route)})
+        try:
+            if self.headers.get("content-type", "").startswith("application/json") and body:
+                body = orjson.loads(body)
+            with self.mock.lock:
+                result = handler(params, body)
+        except BadRequest as exc:
+            payload = {"message": str(exc)}
+            if exc.errors is not None:
+                payload["errors"] = exc.errors
+            return self._json(exc.status_code, payload)
+        if callable(result):
+            # streamed outside of the lock
+            return result()
+        self._json(*result) if isinstance(result, tuple) else self._json(200, result)
+
+    @staticmethod
+    def _values(route: str, path: str) -> list:
+        values = []
+        for template, segment in zip(route.strip("/").split("/"), path.strip("/").split("/")):
+            if template.startswith("{"):
+                values.append(segment)
+        return values
+
+    def _json(self, status: int, payload, headers: dict = {}):
+        self.send_response(status)
+        if status == 204:
+            self.end_headers()
+            return
+        body = orjson.dumps(payload)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _table(self, params: dict, create: bool = False) -> dict:
+        tables = self.mock.tables
+        if params["table"] not in tables:
+            if not create:
+                raise BadRequest("table %s not found" % params["table"], 404)
+            tables[params["table"]] = {}
+        return tables[params["table"]]
+
+    # -- records
+
+    def _records_insert(self, params: dict, body: dict):
+        record_id = self.mock._insert(params["table"], body)
+        return 201, {"id": record_id, "xata": {"version": 0}}
+
+    def _records_get(self, params: dict, body):
+        record = self._table(params).get(params["record_id"])
+        if record is None:
+            return 404, {"message": "record not found"}
+        return record
+
+    def _records_insert_with_id(self, params: dict, body: dict):
+        self.mock._insert(params["table"], body, params["record_id"])
+        return 201, {"id": params["record_id"], "xata": {"version": 0}}
+
+    _records_upsert = _records_insert_with_id
+
+    def _records_update(self, params: dict, body: dict):
+        record = self._table(params).get(params["record_id"])
+        if record is None:
+            return 404, {"message": "record not found"}
+        record.update(body)
+        record["xata"]["version"] += 1
+        return {"id": record["id"], "xata": record["xata"]}
+
+    def _records_delete(self, params: dict, body):
+        if self._table(params).pop(params["record_id"], None) is None:
+            return 404, {"message": "record not found"}
+        return 204, None
+
+    def _records_bulk_insert(self, params: dict, body: dict):
+        records = body.get("records", [])
+        if len(records) > MAX_BULK_SIZE:
+            raise BadRequest("bulk insert is limited to %d records" % MAX_BULK_SIZE)
+        return {"recordIDs": [self.mock._insert(params["table"], r) for r in records]}
+
+    def _records_transaction(self, params: dict, body: dict):
+        operations = body.get("operations", [])
+        if len(operations) > MAX_TRANSACTION_OPERATIONS:
+            raise BadRequest("transactions are limited to %d operations" % MAX_TRANSACTION_OPERATIONS)
+        tables = self.mock.tables
+        # validate first, transactions are all or nothing
+        errors = []
+        for i, op in enumerate(operations):
+            for kind in ("update", "delete", "get"):
+                if kind in op and op[kind]["id"] not in tables.get(op[kind]["table"], {}):
+                    if not op[kind].get("upsert") and (kind != "delete" or op[kind].get("failIfMissing")):
+                        errors.append({"index": i, "message": "record %s not found" % op[kind]["id"]})
+        if errors:
+            raise BadRequest("transaction failed", errors=errors)
+        results = []
+        for op in operations:
+            if "insert" in op:
+                record_id = self.mock._insert(op["insert"]["table"], op["insert"]["record"])
+                results.append({"operation": "insert", "id": record_id, "rows": 1})
+            elif "update" in op:
+                table = tables.setdefault(op["update"]["table"], {})
+                if op["update"]["id"] in table:
+                    table[op["update"]["id"]].update(op["update"]["fields"])
+                else:
+                    self.mock._insert(op["update"]["table"], op["update"]["fields"], op["update"]["id"])
+                results.append({"operation": "update", "id": op["update"]["id"], "rows": 1})
+            elif "delete" in op:
+                rows = 1 if tables.get(op["delete"]["table"], {}).pop(op["delete"]["id"], None) else 0
+                results.append({"operation": "delete", "rows": rows})
+            elif "get" in op:
+                results.append({"operation": "get", "columns": tables[op["get"]["table"]][op["get"]["id"]]})
+        return {"results": results}
+
+    # -- queries
+
+    def _data_query(self, params: dict, body: dict):
+        body = body or {}
+        page = body.get("page", {})
+        size = page.get("size", DEFAULT_PAGE_SIZE)
+        if size > MAX_PAGE_SIZE:
+            raise BadRequest("page size must not exceed %d" % MAX_PAGE_SIZE)
+        if "after" in page:
+            # the result of the first page is kept, to serve every page in constant time
+            state = orjson.loads(base64.urlsafe_b64decode(page["after"]))
+            if state["id"] not in self.mock.cursors:
+                raise BadRequest("invalid cursor")
+            query_id, offset = state["id"], state["offset"]
+        else:
+            query_id, offset = len(self.mock.cursors), 0
+            self.mock.cursors[query_id] = self._select(self._table(params, create=True), body)
+        records = self.mock.cursors[query_id]
+        chunk = records[offset : offset + size]
+        more = offset + size < len(records)
+        if not more:
+            self.mock.cursors[query_id] = []
+        cursor = base64.urlsafe_b64encode(orjson.dumps({"id": query_id, "offset": offset + size})).decode()
+        return {"records": chunk, "meta": {"page": {"cursor": cursor, "more": more, "size": size}}}
+
+    def _select(self, table: dict, query: dict) -> list:
+        records = [r for r in table.values() if matches(r, query.get("filter"))]
+        sort = query.get("sort")
+        for column, direction in reversed(normalize_sort(sort)):
+            if column == "*":
+                self.mock.random.shuffle(records)
+            else:
+                records.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction == "desc")
+        return records
+
+    def _data_summarize(self, params: dict, body: dict):
+        return {"summaries": [{"total": len(self._table(params, create=True))}]}
+
+    def _data_aggregate(self, params: dict, body: dict):
+        return {"aggs": {name: len(self._table(params, create=True)) for name in (body or {}).get("aggs", {})}}
+
+    def _sql_query(self, params: dict, body: dict):
+        statement = body.get("statement", "")
+        table = SQL_TABLE.search(statement)
+        if table is None:
+            return {"records": [], "total": 0}
+        records = list(self.mock.tables.get(table.group(1), {}).values())
+        limit = SQL_LIMIT.search(statement)
+        if limit is not None:
+            records = records[: int(limit.group(1))]
+        return {"records": records, "total": len(records)}
+
+    # -- files
+
+    def _file_key(self, params: dict) -> tuple:
+        return params["table"], params["record_id"], params["column"]
+
+    def _files_put(self, params: dict, body: bytes):
+        content_type = self.headers.get("content-type", "application/octet-stream")
+        self.mock.files[self._file_key(params)] = (content_type, bytes(body))
+        return 201, {"name": "", "mediaType": content_type, "size": len(body)}
+
+    def _files_get(self, params: dict, body):
+        if self._file_key(params) not in self.mock.files:
+            return 404, {"message": "file not found"}
+        content_type, content = self.mock.files[self._file_key(params)]
+
+        def send():
+            self.send_response(200)
+            self.send_header("content-type", content_type)
+            self.send_header("content-length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        return send
+
+    def _files_delete(self, params: dict, body):
+        if self.mock.files.pop(self._file_key(params), None) is None:
+            return 404, {"message": "file not found"}
+        return {}
+
+    # -- ask
+
+    def _data_ask(self, params: dict, body: dict):
+        session_id = "session_%d" % self.mock.random.randint(0, 1 << 30)
+        if "text/event-stream" not in self.headers.get("accept", ""):
+            return {"answer": ASK_ANSWER, "sessionId": session_id, "records": []}
+        events = [{"sessionId": session_id}] + [{"text": w + " "} for w in ASK_ANSWER.split(" ")]
+
+        def send():
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("transfer-encoding", "chunked")
+            self.end_headers()
+            for event in events:
+                chunk = b"data: " + orjson.dumps(event) + b"\n\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+                if self.mock.sse_interval:
+                    time.sleep(self.mock.sse_interval)
+            self.wfile.write(b"0\r\n\r\n")
+
+        return send
+
+    _data_ask_follow_up = _data_ask
+
+
+def normalize_sort(sort) -> list:
+    """
+    Sort of a query as list of (column, direction)
+    """
+    if not sort:
+        return []
+    if isinstance(sort, str):
+        return [(sort, "asc")]
+    if isinstance(sort, dict):
+        sort = [sort]
+    return [item for s in sort for item in (s.items() if isinstance(s, dict) else [(s, "asc")])]
+
+
+def matches(record: dict, condition) -> bool:
+    """
+    Evaluate the subset of the filter syntax used by the SDK: equality,
+    $all, $any, $not, $exists, $notExists and the range operators
+    """
+    if not condition:
+        return True
+    if isinstance(condition, list):
+        return all(matches(record, c) for c in condition)
+    for key, value in condition.items():
+        if key == "$all":
+            if not matches(record, value):
+                return False
+        elif key == "$any":
+            if not any(matches(record, c) for c in (value if isinstance(value, list) else [value])):
+                return False
+        elif key == "$not":
+            if matches(record, value):
+                return False
+        elif key == "$exists":
+            if record.get(value) is None:
+                return False
+        elif key == "$notExists":
+            if record.get(value) is not None:
+                return False
+        elif not compare(record.get(key), value):
+            return False
+    return True
+
+
+def compare(actual, expected) -> bool:
+    if not isinstance(expected, dict):
+        return actual == expected
+    for op, value in expected.items():
+        if op == "$is" and actual != value:
+            return False
+        if op == "$isNot" and actual == value:
+            return False
+        if op in ("$gt", "$ge", "$lt", "$le"):
+            if actual is None:
+                return False
+            if op == "$gt" and not actual > value:
+                return False
+            if op == "$ge" and not actual >= value:
+                return False
+            if op == "$lt" and not actual < value:
+                return False
+            if op == "$le" and not actual <= value:
+                return False
+    return True
+
+
+def local_url(base_url: str, url: str) -> str:
+    """
+    Send a request for any Xata host to the mock server, keeping path and query
+    """
+    parts = urlsplit(url)
+    return base_url + parts.path + ("?" + parts.query if parts.query else "")
+
+
+class LocalTransport(Transport):
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ):
+        return super().request(http_method, local_url(self.base_url, url), headers, data, is_streaming, trace)
+
+
+class LocalAsyncTransport(AsyncTransport):
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    async def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ):
+        return await super().request(http_method, local_url(self.base_url, url), headers, data, is_streaming, trace)
+
+    async def stream(self, http_method: str, url: str, headers: dict = {}, data: bytes = None):
+        return await super().stream(http_method, local_url(self.base_url, url), headers, data)
@@ -0,0 +1,128 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+
+import pytest
+from mock_server import MockXataServer
+
+from xata.errors import RateLimitError, XataServerError
+from xata.helpers import ParallelScan, Transaction
+from xata.retry import RetryPolicy
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockXataServer() as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def clean(server):
+    server.reset()
+
+
+class TestMockServer(object):
+    def test_records(self, server):
+        client = server.client()
+        r = client.records().insert("Posts", {"title": "a"})
+        assert r.status_code == 201
+        record_id = r["id"]
+        assert client.records().get("Posts", record_id)["title"] == "a"
+        assert client.records().update("Posts", record_id, {"title": "b"}).is_success()
+        assert client.records().get("Posts", record_id)["title"] == "b"
+        assert client.records().delete("Posts", record_id).status_code == 204
+        assert client.records().get("Posts", record_id).status_code == 404
+
+    def test_bulk_insert(self, server):
+        client = server.client()
+        r = client.records().bulk_insert("Posts", {"records": [{"n": i} for i in range(10)]})
+        assert len(r["recordIDs"]) == 10
+        assert len(server.get_records("Posts")) == 10
+        r = client.records().bulk_insert("Posts", {"records": [{"n": i} for i in range(1001)]})
+        assert r.status_code == 400
+
+    def test_query_pagination(self, server):
+        server.add_records("Posts", [{"n": i} for i in range(95)])
+        client = server.client()
+        records = list(client.data().query_iter("Posts", {"sort": {"n": "desc"}, "page": {"size": 20}}))
+        assert [r["n"] for r in records] == list(range(94, -1, -1))
+        r = client.data().query("Posts", {"filter": {"n": {"$ge": 10, "$lt": 20}}})
+        assert sorted(r["n"] for r in r["records"]) == list(range(10, 20))
+
+    def test_parallel_scan(self, server):
+        server.add_records("Posts", [{"n": i} for i in range(500)])
+        scan = ParallelScan(server.client(), "Posts", column="n", partitions=4)
+        assert sorted(r["n"] for r in scan.scan()) == list(range(500))
+
+    def test_transaction(self, server):
+        client = server.client()
+        trx = Transaction(client, auto_chunk=True)
+        for i in range(2500):
+            trx.insert("Posts", {"n": i})
+        result = trx.run()
+        assert len(result["results"]) == 2500
+        assert server.requests["records.transaction"] == 3
+        r = client.records().transaction({"operations": [{"update": {"table": "Posts", "id": "x", "fields": {}}}]})
+        assert r.status_code == 400
+        assert r["errors"][0]["index"] == 0
+
+    def test_sql(self, server):
+        server.add_records("Posts", [{"n": i} for i in range(5)])
+        r = server.client().sql().query('SELECT * FROM "Posts" LIMIT 3')
+        assert len(r["records"]) == 3
+
+    def test_files(self, server):
+        client = server.client()
+        record_id = server.add_records("Posts", [{}])[0]
+        assert client.files().put("Posts", record_id, "image", b"\x89PNG", "image/png").status_code == 201
+        r = client.files().get("Posts", record_id, "image")
+        assert r.content == b"\x89PNG"
+        assert r.headers["content-type"] == "image/png"
+        assert client.files().delete("Posts", record_id, "image").is_success()
+
+    def test_ask_stream(self, server):
+        events = list(server.client().data().ask_stream("Posts", "what is xata?"))
+        assert "sessionId" in events[0]
+        assert "".join(e["text"] for e in events[1:]).strip().startswith("Xata is")
+
+    def test_injected_errors(self, server):
+        server.fail("records.get", 503, times=2)
+        with pytest.raises(XataServerError):
+            server.client().records().get("Posts", "missing")
+        client = server.client(retry_policy=RetryPolicy(backoff=0.001))
+        assert client.records().get("Posts", "missing").status_code == 404
+        assert server.requests["records.get"] == 3
+
+    def test_rate_limit(self):
+        with MockXataServer(rate_limit=5) as server:
+            client = server.client()
+            with pytest.raises(RateLimitError) as exc:
+                for _ in range(10):
+                    client.data().query("Posts", {})
+            assert exc.value.retry_after > 0
+
+    def test_async_client(self, server):
+        server.add_records("Posts", [{"n": i} for i in range(30)])
+
+        async def scan():
+            async with server.async_client() as client:
+                return [r async for r in client.data().query_iter("Posts", {"page": {"size": 7}})]
+
+        assert len(asyncio.run(scan())) == 30
@@ -0,0 +1,60 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import random
+
+import pytest
+import utils
+from mock_server import MockXataServer
+
+from xata.helpers import ParallelScan
+
+# round trip of a query in the same region
+LATENCY = {"data.query": 0.005}
+TABLE_SIZE = 10_000
+
+
+@pytest.fixture(scope="module")
+def server():
+    rnd = random.Random(utils.SEED)
+    with MockXataServer(latency=LATENCY) as server:
+        server.add_records("Posts", [utils.get_record(rnd, i) for i in range(TABLE_SIZE)])
+        yield server
+
+
+def scan(client, page_size: int, prefetch: bool) -> int:
+    payload = {"page": {"size": page_size}}
+    return sum(1 for _ in client.data().query_iter("Posts", payload, prefetch=prefetch))
+
+
+class TestPagination(object):
+    @pytest.mark.benchmark(group="scan: 10000 records, 5ms per page")
+    @pytest.mark.parametrize("page_size", [200, 1000])
+    @pytest.mark.parametrize("prefetch", [False, True])
+    def test_query_iter(self, benchmark, server, page_size, prefetch):
+        n = benchmark.pedantic(scan, args=(server.client(), page_size, prefetch), rounds=3)
+        assert n == TABLE_SIZE
+
+    @pytest.mark.benchmark(group="scan: 10000 records, 5ms per page")
+    @pytest.mark.parametrize("partitions", [4, 8])
+    def test_parallel_scan(self, benchmark, server, partitions):
+        def run() -> int:
+            return sum(1 for _ in ParallelScan(server.client(), "Posts", partitions=partitions).scan())
+
+        assert benchmark.pedantic(run, rounds=3) == TABLE_SIZE
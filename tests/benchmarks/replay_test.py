@@ -0,0 +1,82 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import os
+import random
+
+import pytest
+import utils
+from mock_server import MockXataServer, local_url
+
+from xata.client import XataClient
+from xata.recording import RecordingTransport, ReplayTransport
+
+TABLE_SIZE = 5000
+PAGE_SIZE = 200
+
+
+class LocalRecordingTransport(RecordingTransport):
+    def __init__(self, base_url: str, path: str):
+        super().__init__(path)
+        self.base_url = base_url
+
+    def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ):
+        return super().request(http_method, local_url(self.base_url, url), headers, data, is_streaming, trace)
+
+
+def scan(client: XataClient, prefetch: bool = True) -> int:
+    payload = {"page": {"size": PAGE_SIZE}}
+    return sum(1 for _ in client.data().query_iter("Posts", payload, prefetch=prefetch))
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    """
+    Traffic of a full table scan, recorded once against the mock server
+    """
+    path = os.path.join(tmp_path_factory.mktemp("recording"), "scan.jsonl.gz")
+    rnd = random.Random(utils.SEED)
+    with MockXataServer() as server:
+        server.add_records("Posts", [utils.get_record(rnd, i) for i in range(TABLE_SIZE)])
+        client = XataClient(
+            api_key="api_key", workspace_id="ws", db_name="db", transport=LocalRecordingTransport(server.url, path)
+        )
+        assert scan(client) == TABLE_SIZE
+        client.transport.close()
+    return path
+
+
+def replay(path: str, prefetch: bool) -> int:
+    client = XataClient(api_key="api_key", workspace_id="ws", db_name="db", transport=ReplayTransport(path))
+    return scan(client, prefetch)
+
+
+class TestReplay(object):
+    @pytest.mark.benchmark(group="replay: scan of 5000 records, client side only")
+    @pytest.mark.parametrize("prefetch", [False, True])
+    def test_replay_scan(self, benchmark, recording, prefetch):
+        assert benchmark.pedantic(replay, args=(recording, prefetch), rounds=5) == TABLE_SIZE
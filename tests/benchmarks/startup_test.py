@@ -0,0 +1,63 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import subprocess
+import sys
+
+import pytest
+
+from xata.client import XataClient
+
+STARTUP_SCRIPT = (
+    "import xata; "
+    "xata.XataClient(api_key='key', workspace_id='ws_id', region='us-east-1', db_name='db', branch_name='main')"
+)
+
+# generous upper bound for a cold `import xata` and one client, in seconds, to catch
+# regressions like an eager import of every API namespace or httpx
+STARTUP_BUDGET = 1.0
+
+
+class TestStartup(object):
+    @pytest.mark.benchmark(group="startup: import xata and create a client")
+    def test_import_and_init(self, benchmark):
+        benchmark.pedantic(
+            lambda: subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], check=True), rounds=10, iterations=1
+        )
+        if benchmark.stats:
+            assert benchmark.stats["median"] < STARTUP_BUDGET
+
+    @pytest.mark.benchmark(group="startup: import xata and create a client")
+    def test_interpreter_baseline(self, benchmark):
+        benchmark.pedantic(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), rounds=10, iterations=1)
+
+    @pytest.mark.benchmark(group="startup: client")
+    def test_init(self, benchmark):
+        benchmark(
+            lambda: XataClient(
+                api_key="key", workspace_id="ws_id", region="us-east-1", db_name="db", branch_name="main"
+            )
+        )
+
+    @pytest.mark.benchmark(group="startup: client")
+    def test_init_and_first_namespace(self, benchmark):
+        def run():
+            XataClient(api_key="key", workspace_id="ws_id", region="us-east-1", db_name="db").records()
+
+        benchmark(run)
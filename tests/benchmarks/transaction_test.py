@@ -0,0 +1,49 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import pytest
+import utils
+from mock_server import MockXataServer
+
+from xata.helpers import Transaction
+
+# round trip of a transaction in the same region
+LATENCY = {"records.transaction": 0.01}
+OPERATIONS = utils.get_transaction(5000)["operations"]
+
+
+def commit(server: MockXataServer) -> dict:
+    trx = Transaction(server.client(), auto_chunk=True)
+    for op in OPERATIONS:
+        if "insert" in op:
+            trx.insert("Posts", op["insert"]["record"])
+        elif "update" in op:
+            trx.update("Posts", op["update"]["id"], op["update"]["fields"], upsert=True)
+        else:
+            trx.delete("Posts", op["delete"]["id"])
+    return trx.run()
+
+
+class TestTransactionChunking(object):
+    @pytest.mark.benchmark(group="transaction: 5000 operations, 10ms per chunk")
+    def test_auto_chunk(self, benchmark):
+        with MockXataServer(latency=LATENCY) as server:
+            result = benchmark.pedantic(commit, args=(server,), setup=server.reset, rounds=3)
+            assert len(result["results"]) == len(OPERATIONS)
+            assert server.requests["records.transaction"] == 5
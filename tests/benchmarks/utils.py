@@ -0,0 +1,90 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import random
+import string
+
+from requests import Response
+
+SEED = 42
+
+
+def get_random_string(rnd: random.Random, length: int) -> str:
+    return "".join(rnd.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def get_record(rnd: random.Random, i: int) -> dict:
+    """
+    A record with the typical mix of columns: strings, numbers, booleans,
+    datetimes, a link, a multiple and a text column
+    """
+    return {
+        "id": "rec_%020d" % i,
+        "title": get_random_string(rnd, 32),
+        "slug": get_random_string(rnd, 24),
+        "author": {"id": "rec_%020d" % rnd.randint(0, 10_000)},
+        "labels": [get_random_string(rnd, 8) for _ in range(rnd.randint(1, 6))],
+        "views": rnd.randint(0, 1_000_000),
+        "rating": rnd.random() * 5,
+        "published": rnd.random() > 0.5,
+        "createdAt": "2023-%02d-%02dT%02d:%02d:00Z"
+        % (rnd.randint(1, 12), rnd.randint(1, 28), rnd.randint(0, 23), i % 60),
+        "content": " ".join(get_random_string(rnd, rnd.randint(3, 10)) for _ in range(80)),
+        "xata": {
+            "version": rnd.randint(0, 10),
+            "createdAt": "2023-01-01T00:00:00.000Z",
+            "updatedAt": "2023-01-02T00:00:00.000Z",
+        },
+    }
+
+
+def get_query_page(size: int = 200) -> dict:
+    """
+    A full page of query results, as returned by /tables/{table}/query
+    """
+    rnd = random.Random(SEED)
+    return {
+        "meta": {"page": {"cursor": get_random_string(rnd, 120), "more": True, "size": size}},
+        "records": [get_record(rnd, i) for i in range(size)],
+    }
+
+
+def get_transaction(size: int = 1000) -> dict:
+    """
+    A transaction payload with the maximum amount of operations
+    """
+    rnd = random.Random(SEED)
+    ops = []
+    for i in range(size):
+        record = get_record(rnd, i)
+        if i % 3 == 0:
+            ops.append({"insert": {"table": "Posts", "record": record, "createOnly": False}})
+        elif i % 3 == 1:
+            ops.append({"update": {"table": "Posts", "id": record.pop("id"), "fields": record, "upsert": True}})
+        else:
+            ops.append({"delete": {"table": "Posts", "id": record["id"], "columns": [], "failIfMissing": False}})
+    return {"operations": ops}
+
+
+def make_response(status_code: int, content: bytes) -> Response:
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers["content-type"] = "application/json"
+    resp._content = content
+    return resp
@@ -18,8 +18,16 @@
 #
 
 import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
 
+import orjson
+import pytest
+import utils
+
+from xata.api_request import parse_retry_after
 from xata.client import DEFAULT_REGION, XataClient
+from xata.errors import RateLimitError
 
 
 class TestApiRequestInternals(unittest.TestCase):
@@ -47,3 +55,40 @@ class TestApiRequestInternals(unittest.TestCase):
 
         expected = "https://testopia-ab2.%s.sub.subsub.name.lol" % DEFAULT_REGION
         assert expected == c.branch().get_base_url()
+
+    def test_encode_payload(self):
+        client = XataClient(api_key="123", workspace_id="ws_id")
+        headers = {}
+        payload = {"records": [{"name": "a", "created": datetime(2023, 1, 2, tzinfo=timezone.utc)}], 42: True}
+
+        data = client.records().encode_payload(headers, payload)
+        assert headers["content-type"] == "application/json"
+        assert orjson.loads(data) == {"records": [{"name": "a", "created": "2023-01-02T00:00:00+00:00"}], "42": True}
+
+    def test_encode_payload_keeps_raw_data_and_content_type(self):
+        client = XataClient(api_key="123", workspace_id="ws_id")
+        headers = {"content-type": "image/png"}
+
+        assert client.files().encode_payload(headers, None, b"raw") == b"raw"
+        assert client.files().encode_payload(headers, {"ignored": True}, b"raw") == b"raw"
+        assert client.files().encode_payload(headers) is None
+        assert headers == {"content-type": "image/png"}
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("") is None
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("0.5") == 0.5
+        assert parse_retry_after("-1") == 0.0
+        assert parse_retry_after("soon") is None
+
+        later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        assert 25 < parse_retry_after(later) <= 30
+        earlier = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+        assert parse_retry_after(earlier) == 0.0
+
+    def test_rate_limit_error_carries_retry_after(self):
+        client, _ = utils.get_mock_client(lambda m, u, b: (429, {"message": "slow down"}, {"Retry-After": "7"}))
+        with pytest.raises(RateLimitError) as e:
+            client.records().bulk_insert("Posts", {"records": [{"a": 1}]})
+        assert e.value.retry_after == 7.0
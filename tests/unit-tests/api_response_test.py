@@ -17,9 +17,91 @@
 # under the License.
 #
 
+import json
 import unittest
+from unittest import mock
+
+import orjson
+from requests import Response
+
+from xata.api_response import ApiResponse, LazyApiResponse
+from xata.client import XataClient
+
+PAGE = b'{"records": [{"id": "rec_1"}], "meta": {"page": {"cursor": "abc", "more": true}}}'
+
+
+def make_response(status_code: int, content: bytes) -> Response:
+    resp = Response()
+    resp.status_code = status_code
+    resp._content = content
+    return resp
 
 
 class TestApiResponse(unittest.TestCase):
-    # TODO
-    pass
+    def test_parse_body(self):
+        r = ApiResponse(make_response(200, b'{"records": [{"id": "rec_1"}], "meta": {"page": {"cursor": "abc"}}}'))
+        assert r.is_success()
+        assert r["records"] == [{"id": "rec_1"}]
+        assert r.get_cursor() == "abc"
+        assert not r.has_more_results()
+
+    def test_empty_body(self):
+        r = ApiResponse(make_response(204, b""))
+        assert r.is_success()
+        assert r == {}
+        assert r.get_cursor() is None
+
+    def test_body_is_parsed_once(self):
+        with mock.patch("xata.api_response.orjson.loads", wraps=orjson.loads) as loads:
+            r = ApiResponse(make_response(400, b'{"message": "invalid filter"}'))
+            assert r.get_cursor() is None
+            assert not r.has_more_results()
+            assert r.error_message == "invalid filter"
+            assert loads.call_count == 1
+
+    def test_lazy_body_is_parsed_on_first_access(self):
+        with mock.patch("xata.api_response.orjson.loads", wraps=orjson.loads) as loads:
+            r = LazyApiResponse(make_response(200, PAGE))
+            assert r.is_success()
+            assert r.is_lazy()
+            assert loads.call_count == 0
+
+            assert r.get_cursor() == "abc"
+            assert r.has_more_results()
+            assert r["records"][0]["id"] == "rec_1"
+            assert not r.is_lazy()
+            assert loads.call_count == 1
+
+    def test_lazy_dict_protocol(self):
+        expected = orjson.loads(PAGE)
+        assert LazyApiResponse(make_response(200, PAGE)) == expected
+        assert dict(LazyApiResponse(make_response(200, PAGE))) == expected
+        assert list(LazyApiResponse(make_response(200, PAGE))) == ["records", "meta"]
+        assert len(LazyApiResponse(make_response(200, PAGE))) == 2
+        assert "meta" in LazyApiResponse(make_response(200, PAGE))
+        assert LazyApiResponse(make_response(200, PAGE)).get("nope", 42) == 42
+
+        r = LazyApiResponse(make_response(200, PAGE))
+        r["extra"] = True
+        assert r["records"] == expected["records"]
+        assert r["extra"]
+
+    def test_lazy_serialization(self):
+        expected = orjson.loads(PAGE)
+        # serializers read the storage of a dict directly, an unread lazy response must not pass as one
+        assert not isinstance(LazyApiResponse(make_response(200, PAGE)), dict)
+        with self.assertRaises(TypeError):
+            orjson.dumps(LazyApiResponse(make_response(200, PAGE)))
+        with self.assertRaises(TypeError):
+            json.dumps(LazyApiResponse(make_response(200, PAGE)))
+        assert orjson.loads(orjson.dumps(dict(LazyApiResponse(make_response(200, PAGE))))) == expected
+        assert json.loads(json.dumps(dict(LazyApiResponse(make_response(200, PAGE))))) == expected
+
+    def test_client_lazy_parse_threshold(self):
+        client = XataClient(api_key="api_key", workspace_id="ws_id", lazy_parse_threshold=64)
+        assert isinstance(client.records().process_response(make_response(200, PAGE)), LazyApiResponse)
+        small = client.records().process_response(make_response(200, b'{"id": "rec_1"}'))
+        assert not isinstance(small, LazyApiResponse)
+
+        client = XataClient(api_key="api_key", workspace_id="ws_id")
+        assert not isinstance(client.records().process_response(make_response(200, PAGE)), LazyApiResponse)
@@ -0,0 +1,124 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import inspect
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from xata.api_response import ApiResponse
+from xata.async_client import AsyncXataClient
+from xata.errors import RateLimitError
+from xata.transport import AsyncTransport
+
+
+def mock_client(handler) -> AsyncXataClient:
+    client = AsyncXataClient(api_key="api_key", workspace_id="ws_id", db_name="db", branch_name="main")
+    client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+class TestAsyncClient(unittest.TestCase):
+    def test_namespaces_share_one_transport(self):
+        client = AsyncXataClient(api_key="api_key", workspace_id="ws_id")
+        assert isinstance(client.transport, AsyncTransport)
+        for ns in [client.records(), client.data(), client.sql(), client.files(), client.table(), client.branch()]:
+            assert ns.client.transport is client.transport
+
+    def test_sync_context_manager_is_refused(self):
+        client = AsyncXataClient(api_key="api_key", workspace_id="ws_id")
+        with pytest.raises(Exception) as e:
+            with client:
+                pass
+        assert "async with" in str(e.value)
+
+    def test_close_only_owned_transport(self):
+        async def run(client: AsyncXataClient):
+            async with client:
+                pass
+
+        transport = AsyncTransport()
+        with patch.object(transport, "close") as close:
+            asyncio.run(run(AsyncXataClient(api_key="api_key", workspace_id="ws_id", transport=transport)))
+            assert close.call_count == 0
+        client = AsyncXataClient(api_key="api_key", workspace_id="ws_id")
+        with patch.object(client.transport, "close") as close:
+            asyncio.run(run(client))
+            assert close.call_count == 1
+
+    def test_endpoints_are_awaitable(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path == "/db/db:main/tables/Posts/query"
+            assert request.headers["authorization"] == "Bearer api_key"
+            return httpx.Response(200, json={"records": [{"id": "a"}], "meta": {"page": {"cursor": "c", "more": True}}})
+
+        async def run():
+            async with mock_client(handler) as client:
+                coro = client.data().query("Posts", {})
+                assert inspect.isawaitable(coro)
+                return await coro
+
+        resp = asyncio.run(run())
+        assert isinstance(resp, ApiResponse)
+        assert resp.is_success()
+        assert resp["records"] == [{"id": "a"}]
+        assert resp.get_cursor() == "c"
+        assert resp.has_more_results()
+
+    def test_concurrent_requests(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"id": request.url.path.split("/")[-1]})
+
+        async def run():
+            async with mock_client(handler) as client:
+                return await asyncio.gather(*[client.records().get("Posts", f"rec_{i}") for i in range(250)])
+
+        results = asyncio.run(run())
+        assert [r["id"] for r in results] == [f"rec_{i}" for i in range(250)]
+
+    def test_rate_limit_error(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(429, json={"message": "slow down"})
+
+        async def run():
+            async with mock_client(handler) as client:
+                await client.sql().query("SELECT 1")
+
+        with pytest.raises(RateLimitError):
+            asyncio.run(run())
+
+    def test_query_iter(self):
+        records = [{"id": f"rec_{i}"} for i in range(12)]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            offset = int(body.get("page", {}).get("after") or 0)
+            more = offset + 5 < len(records)
+            page = {"cursor": str(offset + 5), "more": more}
+            return httpx.Response(200, json={"records": records[offset : offset + 5], "meta": {"page": page}})
+
+        async def run():
+            async with mock_client(handler) as client:
+                return [r async for r in client.data().query_iter("Posts", {"sort": {"id": "asc"}})]
+
+        assert asyncio.run(run()) == records
@@ -0,0 +1,131 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from xata import config
+from xata.client import XataClient
+
+
+class TestClientConfigCache(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name)
+        self.env = patch.dict(os.environ)
+        self.env.start()
+        for name in ("XATA_API_KEY", "XATA_WORKSPACE_ID", "XATA_DATABASE_URL", "XATA_REGION", "XATA_BRANCH"):
+            os.environ.pop(name, None)
+        config.reload()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.env.stop()
+        self.dir.cleanup()
+        config.reload()
+
+    def write(self, name: str, content: str, mtime_ns: int = None):
+        with open(name, "w") as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(name, ns=(mtime_ns, mtime_ns))
+
+    def test_dotenv_is_read_once(self):
+        self.write(".env", "XATA_API_KEY=dotenv_key\nXATA_WORKSPACE_ID=dotenv_ws\nXATA_REGION=eu-west-1\n")
+        with patch("xata.config.dotenv_values", wraps=config.dotenv_values) as parse:
+            for _ in range(3):
+                client = XataClient(db_name="db")
+                assert client.get_config()["apiKey"] == "dotenv_key"
+                assert client.get_config()["apiKeyLocation"] == "dotenv"
+                assert client.get_workspace_id() == "dotenv_ws"
+                assert client.get_region() == "eu-west-1"
+            assert parse.call_count == 1
+
+    def test_modified_file_is_read_again(self):
+        self.write(".env", "XATA_API_KEY=first\nXATA_WORKSPACE_ID=ws\n", mtime_ns=1_000_000_000)
+        assert XataClient().api_key == "first"
+        self.write(".env", "XATA_API_KEY=second\nXATA_WORKSPACE_ID=ws\n", mtime_ns=2_000_000_000)
+        assert XataClient().api_key == "second"
+
+    def test_reload(self):
+        # same size and modification time, only an explicit reload notices
+        self.write(".env", "XATA_API_KEY=aaaaa\nXATA_WORKSPACE_ID=ws\n", mtime_ns=1_000_000_000)
+        assert XataClient().api_key == "aaaaa"
+        self.write(".env", "XATA_API_KEY=bbbbb\nXATA_WORKSPACE_ID=ws\n", mtime_ns=1_000_000_000)
+        assert XataClient().api_key == "aaaaa"
+        config.reload()
+        assert XataClient().api_key == "bbbbb"
+
+    def test_xatarc(self):
+        self.write(".xatarc", json.dumps({"databaseURL": "https://ws-rc.eu-west-1.xata.sh/db/rc-db"}))
+        with patch("xata.config.json.load", wraps=json.load) as parse:
+            for _ in range(3):
+                client = XataClient(api_key="key")
+                assert client.get_workspace_id() == "ws-rc"
+                assert client.get_region() == "eu-west-1"
+                assert client.get_database_name() == "rc-db"
+            assert parse.call_count == 1
+
+    def test_missing_files(self):
+        assert config.read_dotenv(".env") == {}
+        assert config.read_xatarc(".xatarc") is None
+        assert config.read_api_key_file("key") is None
+        self.write("key", " secret\n")
+        assert config.read_api_key_file("key") == "secret"
+
+
+class TestClientClone(unittest.TestCase):
+    def test_clone(self):
+        client = XataClient(api_key="key", workspace_id="ws_id", region="eu-west-1", db_name="db", branch_name="main")
+        clone = client.clone(db_name="tenant-a")
+
+        assert type(clone) is XataClient
+        assert clone.get_database_name() == "tenant-a"
+        assert clone.get_branch_name() == "main"
+        assert clone.get_workspace_id() == "ws_id"
+        assert clone.get_region() == "eu-west-1"
+        assert clone.transport is client.transport
+        assert clone.get_headers() == client.get_headers()
+        assert client.get_database_name() == "db"
+
+        other = clone.clone(branch_name="dev")
+        assert other.get_db_branch_name() == "tenant-a:dev"
+        assert clone.get_db_branch_name() == "tenant-a:main"
+
+    def test_clone_namespaces_and_headers(self):
+        client = XataClient(api_key="key", workspace_id="ws_id", db_name="db")
+        records = client.records()
+        clone = client.clone(db_name="tenant-a")
+
+        assert clone.records() is not records
+        assert clone.records().client is clone
+        clone.set_header("x-tenant", "a")
+        assert "x-tenant" not in client.get_headers()
+
+    def test_clone_does_not_close_transport(self):
+        client = XataClient(api_key="key", workspace_id="ws_id", db_name="db")
+        with patch.object(client.transport, "close") as close:
+            client.clone(db_name="tenant-a").close()
+            assert close.call_count == 0
+            client.close()
+            assert close.call_count == 1
@@ -0,0 +1,91 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import subprocess
+import sys
+import unittest
+
+import orjson
+
+from xata.client import NAMESPACES, XataClient
+
+# modules that must not be loaded by `import xata` and creating a client
+HEAVY_MODULES = ["asyncio", "httpx", "xata.async_client", "xata.helpers"] + sorted(
+    set(module for module, _ in NAMESPACES.values())
+)
+
+STARTUP_SCRIPT = """
+import sys
+import orjson
+import xata
+client = xata.XataClient(api_key="key", workspace_id="ws_id", region="us-east-1", db_name="db")
+loaded = [m for m in %r if m in sys.modules]
+client.records()
+# the first namespace loads the request machinery, but nothing of the async client
+after_namespace = [m for m in %r if m in sys.modules and m != "xata.api.records"]
+sys.stdout.write(
+    orjson.dumps(
+        {"loaded": loaded, "after_namespace": after_namespace, "records": "xata.api.records" in sys.modules}
+    ).decode()
+)
+"""
+
+
+class TestClientStartup(unittest.TestCase):
+    def test_import_and_init_do_not_load_namespaces(self):
+        # run in a fresh interpreter, the test runner has imported everything already
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT % (HEAVY_MODULES, HEAVY_MODULES)], capture_output=True, check=True
+        ).stdout
+        result = orjson.loads(out)
+        assert result["loaded"] == []
+        assert result["after_namespace"] == []
+        assert result["records"]
+
+    def test_namespaces_are_created_once(self):
+        client = XataClient(api_key="key", workspace_id="ws_id", db_name="db")
+        assert client._namespaces == {}
+        records = client.records()
+        assert records is client.records()
+        assert list(client._namespaces.keys()) == ["records"]
+        assert client.data() is client.data()
+        assert client.sql() is not client.data()
+
+    def test_namespaces_are_per_client(self):
+        a = XataClient(api_key="key", workspace_id="ws_id", db_name="db")
+        b = XataClient(api_key="key", workspace_id="ws_id", db_name="db")
+        assert a.records() is not b.records()
+        assert a.records().client is a
+
+    def test_all_namespaces_resolve(self):
+        client = XataClient(api_key="key", workspace_id="ws_id", db_name="db")
+        for name, (_, cls) in client.namespaces.items():
+            assert type(client._namespace(name)).__name__ == cls
+
+    def test_lazy_exports(self):
+        import xata
+        from xata.async_client import AsyncXataClient
+        from xata.helpers import BulkProcessor, Transaction, to_rfc339
+
+        assert xata.AsyncXataClient is AsyncXataClient
+        assert xata.BulkProcessor is BulkProcessor
+        assert xata.Transaction is Transaction
+        assert xata.to_rfc3339 is to_rfc339
+        with self.assertRaises(AttributeError):
+            xata.DoesNotExist
@@ -0,0 +1,91 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import unittest
+from unittest.mock import patch
+
+import pytest
+import utils
+
+from xata.client import XataClient
+from xata.transport import Transport
+
+
+class TestClientTransport(unittest.TestCase):
+    def test_namespaces_share_one_transport(self):
+        client = XataClient(api_key="api_key", workspace_id="ws_id")
+        assert isinstance(client.transport, Transport)
+
+        sessions = [ns.session for ns in [client.records(), client.data(), client.sql(), client.databases()]]
+        assert all(s is client.transport.session for s in sessions)
+
+    def test_close_only_owned_transport(self):
+        transport = Transport()
+        with patch.object(transport, "close") as close:
+            with XataClient(api_key="api_key", workspace_id="ws_id", transport=transport):
+                pass
+            assert close.call_count == 0
+        client = XataClient(api_key="api_key", workspace_id="ws_id")
+        with patch.object(client.transport, "close") as close:
+            client.close()
+            assert close.call_count == 1
+
+    def test_custom_transport(self):
+        transport = Transport(pool_connections=2, pool_maxsize=42, connect_timeout=1.5, read_timeout=30)
+        client = XataClient(api_key="api_key", workspace_id="ws_id", transport=transport)
+        assert client.transport is transport
+
+        adapter = transport.session.get_adapter("https://ws_id.us-east-1.xata.sh")
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 42
+        assert transport.timeout == (1.5, 30)
+
+    def test_requests_routed_through_transport(self):
+        transport = Transport(connect_timeout=3, read_timeout=7)
+        adapter = utils.MockAdapter(lambda method, url, body: (200, {"ok": True}))
+        transport.session.mount("https://", adapter)
+        client = XataClient(api_key="api_key", workspace_id="ws_id", db_name="db", transport=transport)
+
+        assert client.records().get("Posts", "rec_1")["ok"]
+        assert client.sql().query("SELECT 1")["ok"]
+        assert client.databases().get_base_url() == "https://api.xata.io"
+
+        assert len(adapter.requests) == 2
+        assert adapter.requests[0][0].url == "https://ws_id.us-east-1.xata.sh/db/db:main/tables/Posts/data/rec_1"
+        assert adapter.requests[0][1]["timeout"] == (3, 7)
+        assert adapter.requests[1][0].headers["authorization"] == "Bearer api_key"
+
+    def test_keepalive_expiry_recycles_pool(self):
+        transport = Transport(keepalive_expiry=60)
+        adapter = transport.session.get_adapter("https://")
+
+        transport._recycle_expired_pool()
+        assert transport.session.get_adapter("https://") is adapter
+
+        transport.pool_created -= 61
+        transport._recycle_expired_pool()
+        assert transport.session.get_adapter("https://") is not adapter
+
+    def test_invalid_settings(self):
+        with pytest.raises(Exception):
+            Transport(pool_connections=0)
+        with pytest.raises(Exception):
+            Transport(pool_maxsize=0)
+        with pytest.raises(Exception):
+            Transport(keepalive_expiry=0)
@@ -0,0 +1,121 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import gzip
+import importlib.util
+import unittest
+
+import httpx
+import pytest
+import utils
+
+from xata.async_client import AsyncXataClient
+from xata.compression import COMPRESSION_OFFLOAD_THRESHOLD, Compressor
+
+RECORDS = [{"title": "record %d" % i, "content": "lorem ipsum " * 20} for i in range(100)]
+
+
+def handler(method, url, body):
+    return 200, {"id": "rec_1", "recordIDs": []}
+
+
+class TestCompression(unittest.TestCase):
+    def test_invalid_settings(self):
+        with pytest.raises(Exception):
+            Compressor("brotli")
+        with pytest.raises(Exception):
+            Compressor(threshold=-1)
+
+    @unittest.skipIf(importlib.util.find_spec("zstandard") is not None, "zstandard is installed")
+    def test_zstd_requires_zstandard(self):
+        with pytest.raises(Exception) as e:
+            Compressor("zstd")
+        assert "pip install xata[zstd]" in str(e.value)
+
+    def test_no_compression(self):
+        client, adapter = utils.get_mock_client(handler)
+        client.records().bulk_insert("Posts", {"records": RECORDS})
+        req, _ = adapter.requests[0]
+        assert "content-encoding" not in req.headers
+        assert "accept-encoding" not in client.get_headers()
+
+    def test_large_body_is_compressed(self):
+        compressor = Compressor(threshold=1024)
+        client, adapter = utils.get_mock_client(handler, compression=compressor)
+        bodies = []
+        send = adapter.send
+
+        def send_compressed(request, **kwargs):
+            # keep the raw body, the mock adapter decodes JSON bodies
+            bodies.append((request.headers.get("content-encoding"), request.body))
+            if request.headers.get("content-encoding"):
+                request.body = gzip.decompress(request.body)
+            return send(request, **kwargs)
+
+        adapter.send = send_compressed
+        client.records().bulk_insert("Posts", {"records": RECORDS})
+        client.records().insert_with_id("Posts", "rec_1", {"title": "small"})
+
+        encoding, body = bodies[0]
+        assert encoding == "gzip"
+        assert gzip.decompress(body).startswith(b'{"records":')
+        assert bodies[1][0] is None
+        assert client.get_headers()["accept-encoding"] == client.transport.accept_encoding
+        assert "gzip" in client.transport.accept_encoding
+
+        stats = compressor.get_stats()
+        assert stats["requests"] == 1
+        assert stats["bytes_out"] < stats["bytes_in"]
+        assert stats["ratio"] < 0.5
+
+    def test_raw_data_is_not_compressed(self):
+        client, adapter = utils.get_mock_client(handler, compression=Compressor(threshold=0))
+        headers = {}
+        assert client.files().compress_payload(headers, None) is None
+        assert headers == {}
+        assert client.files().compress_payload({"content-encoding": "br"}, b"x" * 10) == b"x" * 10
+
+    def test_gzip_is_deterministic(self):
+        c = Compressor(threshold=0)
+        assert c.compress(b"a" * 100) == c.compress(b"a" * 100)
+
+    def test_async(self):
+        bodies = []
+
+        def async_handler(request: httpx.Request) -> httpx.Response:
+            bodies.append((request.headers.get("content-encoding"), request.content))
+            return httpx.Response(200, json={"recordIDs": []})
+
+        async def run():
+            client = AsyncXataClient(
+                api_key="api_key", workspace_id="ws_id", db_name="db", compression=Compressor(threshold=1024)
+            )
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(async_handler))
+            async with client:
+                await client.records().bulk_insert("Posts", {"records": RECORDS})
+                # large enough to be compressed in a worker thread
+                large = [{"content": "x" * 1000, "n": i} for i in range(COMPRESSION_OFFLOAD_THRESHOLD // 1000)]
+                await client.records().bulk_insert("Posts", {"records": large})
+                return client.get_headers()
+
+        headers = asyncio.run(run())
+        assert "gzip" in headers["accept-encoding"]
+        assert [e for e, _ in bodies] == ["gzip", "gzip"]
+        assert all(gzip.decompress(b).startswith(b'{"records":') for _, b in bodies)
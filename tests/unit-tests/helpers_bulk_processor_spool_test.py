@@ -0,0 +1,170 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+import orjson
+import utils
+
+from xata.helpers import BulkProcessor
+
+LOGGER = logging.getLogger(__name__)
+
+
+def recover(spool: BulkProcessor.Spool) -> list[tuple]:
+    return [entry for segment in spool.recover() for entry in segment]
+
+
+class TestHelpersBulkProcessorSpool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = os.path.join(self.tmp.name, "spool")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_recover_unacknowledged_records(self):
+        spool = BulkProcessor.Spool(self.dir, 4096, False, LOGGER)
+        assert recover(spool) == []
+        refs = spool.append("Posts", [{"i": i} for i in range(3)])
+        refs += spool.append("Users", [{"name": "a"}, {"name": "b"}])
+        spool.ack([refs[0], refs[3]])
+        spool.close()
+
+        spool = BulkProcessor.Spool(self.dir, 4096, False, LOGGER)
+        pending = recover(spool)
+        assert [(t, r) for _, t, r in pending] == [("Posts", {"i": 1}), ("Posts", {"i": 2}), ("Users", {"name": "b"})]
+
+        spool.ack([ref for ref, _, _ in pending])
+        spool.close()
+        assert os.listdir(self.dir) == []
+
+    def test_segments_roll_and_are_removed_when_processed(self):
+        spool = BulkProcessor.Spool(self.dir, 1024, False, LOGGER)
+        refs = spool.append("Posts", [{"title": "x" * 100, "i": i} for i in range(30)])
+        segments = sorted(os.listdir(self.dir))
+        assert len(segments) > 2
+        assert len({segment_id for segment_id, _ in refs}) == len(segments)
+
+        # records larger than a segment get a segment of their own
+        big = spool.append("Posts", [{"title": "y" * 4096}])
+        assert big[0][0] not in {segment_id for segment_id, _ in refs}
+
+        spool.ack(refs)
+        assert os.listdir(self.dir) == ["segment-%08d.log" % big[0][0]]
+        spool.ack(big)
+        spool.close()
+        assert os.listdir(self.dir) == []
+
+    def test_torn_write_is_ignored(self):
+        spool = BulkProcessor.Spool(self.dir, 4096, False, LOGGER)
+        refs = spool.append("Posts", [{"i": 0}, {"i": 1}])
+        spool.close()
+
+        # corrupt the second entry, as if the process died while writing it
+        path = os.path.join(self.dir, "segment-%08d.log" % refs[1][0])
+        with open(path, "r+b") as f:
+            f.seek(refs[1][1] + BulkProcessor.Spool.HEADER.size)
+            f.write(b"\x00\x00")
+
+        spool = BulkProcessor.Spool(self.dir, 4096, False, LOGGER)
+        assert [r for _, _, r in recover(spool)] == [{"i": 0}]
+
+    def test_bulk_processor_resumes_from_spool(self):
+        spool = BulkProcessor.Spool(self.dir, 4096, False, LOGGER)
+        spool.append("Posts", [{"i": i} for i in range(7)])
+        spool.append("Users", [{"name": "a"}])
+        spool.close()
+
+        client, adapter = utils.get_mock_client(lambda m, u, b: (200, {}))
+        bp = BulkProcessor(client, thread_pool_size=2, batch_size=5, flush_interval=60, spool_dir=self.dir)
+        bp.put_record("Posts", {"i": 7})
+        bp.flush_queue()
+
+        sts = bp.get_stats()
+        assert sts["recovered"] == 8
+        assert sts["tables"] == {"Posts": 8, "Users": 1}
+        posts = [r for req, _ in adapter.requests if "Posts" in req.url for r in orjson.loads(req.body)["records"]]
+        # two workers, batches can arrive in any order
+        assert sorted(posts, key=lambda r: r["i"]) == [{"i": i} for i in range(8)]
+        assert os.listdir(self.dir) == []
+
+    def test_unprocessed_records_stay_in_spool(self):
+        client, adapter = utils.get_mock_client(lambda m, u, b: (200, {}))
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=5, flush_interval=60, spool_dir=self.dir)
+        bp.put_records("Posts", [{"i": i} for i in range(7)])
+        # stop without flushing, as if the process was killed
+        bp.records.close()
+        bp.throttle.close()
+        for worker in bp.thread_workers:
+            worker.join()
+        bp.spool.close()
+
+        spool = BulkProcessor.Spool(self.dir, 4096, False, LOGGER)
+        sent = len(adapter.requests) * 5
+        assert [r for _, _, r in recover(spool)] == [{"i": i} for i in range(sent, 7)]
+
+    def test_read_spooled_records(self):
+        spool = BulkProcessor.Spool(self.dir, 1024, False, LOGGER)
+        refs = spool.append("Posts", [{"title": "x" * 100, "i": i} for i in range(20)])
+        # from sealed segments and the current one
+        assert [r["i"] for r in spool.read(refs[::3])] == list(range(0, 20, 3))
+        spool.close()
+
+    def test_only_a_window_of_records_is_kept_in_memory(self):
+        release = threading.Event()
+
+        def handler(method, url, body):
+            release.wait(5)
+            return 200, {}
+
+        client, adapter = utils.get_mock_client(handler)
+        bp = BulkProcessor(
+            client, thread_pool_size=1, batch_size=5, flush_interval=60, spool_dir=self.dir, spool_memory_records=3
+        )
+        bp.put_records("Posts", [{"i": i} for i in range(23)])
+        table = bp.records.store["Posts"]
+        assert len(table["records"]) <= 3
+        assert bp.records.length("Posts") + 5 * len(adapter.requests) >= 23
+
+        release.set()
+        bp.flush_queue()
+        posts = [r for req, _ in adapter.requests for r in orjson.loads(req.body)["records"]]
+        assert posts == [{"i": i} for i in range(23)]
+        assert bp.get_stats()["total"] == 23
+        assert os.listdir(self.dir) == []
+
+    def test_failed_records_stay_in_spool_until_handed_out(self):
+        client, adapter = utils.get_mock_client(lambda m, u, b: (400, {"message": "invalid record"}))
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=5, flush_interval=60, spool_dir=self.dir)
+        bp.put_records("Posts", [{"i": i} for i in range(7)])
+        bp.flush_queue()
+
+        # a restart before the failures are handed out retries the records
+        spool = BulkProcessor.Spool(self.dir, 4096, False, LOGGER)
+        assert [r for _, _, r in recover(spool)] == [{"i": i} for i in range(7)]
+        spool.close()
+
+        failed = bp.get_failed_batches()
+        assert sum(len(f["records"]) for f in failed) == 7
+        assert os.listdir(self.dir) == []
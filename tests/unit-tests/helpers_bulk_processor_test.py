@@ -17,11 +17,18 @@
 # under the License.
 #
 
+import logging
+import threading
+import time
 import unittest
 
+import orjson
 import pytest
+import utils
+from requests.exceptions import ConnectionError as RequestsConnectionError
 
 from xata.client import XataClient
+from xata.errors import QueueFullError
 from xata.helpers import BulkProcessor
 
 
@@ -45,6 +52,10 @@ class TestHelpersBulkProcessor(unittest.TestCase):
             BulkProcessor(client, processing_timeout=-1)
         assert str(e.value) == "processing timeout can not be negative, default: 0.050000"
 
+        with pytest.raises(Exception) as e:
+            BulkProcessor(client, max_queue_size=0)
+        assert str(e.value) == "max queue size must be greater than 0 or None, default: None"
+
     def test_bulk_processor_stats(self):
         client = XataClient(api_key="api_key", workspace_id="ws_id")
         bp = BulkProcessor(client)
@@ -58,3 +69,304 @@ class TestHelpersBulkProcessor(unittest.TestCase):
         assert sts["queue"] == 0
         assert sts["failed_batches"] == 0
         assert sts["tables"] == {}
+
+    def test_full_batch_ships_without_delay(self):
+        shipped = threading.Event()
+
+        def handler(method, url, body):
+            shipped.set()
+            return 200, {}
+
+        client, adapter = utils.get_mock_client(handler)
+        bp = BulkProcessor(client, thread_pool_size=2, batch_size=10, flush_interval=60)
+        start = time.monotonic()
+        bp.put_records("Posts", [{"title": str(i)} for i in range(10)])
+
+        assert shipped.wait(5)
+        assert time.monotonic() - start < 1
+        bp.flush_queue()
+        assert bp.get_stats()["total_batches"] == 1
+
+    def test_partial_batch_ships_on_flush_interval(self):
+        shipped = threading.Event()
+
+        def handler(method, url, body):
+            shipped.set()
+            return 200, {}
+
+        client, adapter = utils.get_mock_client(handler)
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=100, flush_interval=0.2)
+        bp.put_records("Posts", [{"title": "a"}])
+        assert not shipped.wait(0.05)
+        assert shipped.wait(5)
+        bp.flush_queue()
+        assert bp.get_stats()["total"] == 1
+
+    def test_flush_queue_multiple_tables(self):
+        client, adapter = utils.get_mock_client(lambda method, url, body: (200, {}))
+        bp = BulkProcessor(client, thread_pool_size=3, batch_size=42, flush_interval=60)
+        for _ in range(33):
+            bp.put_records("Posts", [{"title": "a"}] * 9)
+            bp.put_records("Users", [{"name": "b"}] * 7)
+        bp.flush_queue()
+
+        sts = bp.get_stats()
+        assert sts["queue"] == 0
+        assert sts["total"] == 33 * 16
+        assert sts["tables"] == {"Posts": 33 * 9, "Users": 33 * 7}
+        assert sts["total_batches"] == 14
+        assert sum(len(orjson_body(r)["records"]) for r, _ in adapter.requests) == 33 * 16
+        assert not any(w.is_alive() for w in bp.thread_workers)
+
+    def test_idle_workers_wait_for_records(self):
+        records = BulkProcessor.Records(batch_size=5, flush_interval=60, logger=None)
+        batches = []
+        worker = threading.Thread(target=lambda: batches.append(records.next_batch()), daemon=True)
+        worker.start()
+
+        time.sleep(0.05)
+        assert worker.is_alive() and batches == []
+        records.put("Posts", [{"i": i} for i in range(5)])
+        worker.join(5)
+        assert batches == [{"table": "Posts", "records": [{"i": i} for i in range(5)]}]
+
+        records.task_done()
+        records.close()
+        assert records.next_batch() is None
+
+    def test_put_raises_when_queue_is_full(self):
+        records = BulkProcessor.Records(batch_size=5, flush_interval=60, logger=None, max_records=8)
+        records.put("Posts", [{"i": i} for i in range(6)])
+
+        with pytest.raises(QueueFullError) as e:
+            records.put("Users", [{"i": i} for i in range(4)], block=False)
+        assert e.value.queued == 2
+        assert records.size() == 8
+
+        with pytest.raises(QueueFullError):
+            records.put("Users", [{"i": 9}], timeout=0.05)
+
+    def test_put_waits_for_workers_to_make_room(self):
+        records = BulkProcessor.Records(batch_size=2, flush_interval=60, logger=None, max_records_per_table=2)
+        records.put("Posts", [{"i": 0}, {"i": 1}])
+        # other tables are not affected by the per table limit
+        records.put("Users", [{"i": 0}], block=False)
+
+        producer = threading.Thread(target=lambda: records.put("Posts", [{"i": 2}, {"i": 3}]), daemon=True)
+        producer.start()
+        time.sleep(0.05)
+        assert producer.is_alive()
+
+        assert records.next_batch() == {"table": "Posts", "records": [{"i": 0}, {"i": 1}]}
+        producer.join(5)
+        assert not producer.is_alive()
+        assert records.size() == 3
+
+    def test_put_limits_queued_bytes(self):
+        record = {"title": "x" * 90}
+        size = len(orjson.dumps(record))
+        records = BulkProcessor.Records(batch_size=10, flush_interval=60, logger=None, max_bytes=size * 3)
+        with pytest.raises(QueueFullError) as e:
+            records.put("Posts", [record] * 4, block=False)
+        assert e.value.queued == 3
+        assert records.fill_level() == (3, size * 3, 1.0)
+
+        # an empty queue always accepts a record, even above the limit
+        records = BulkProcessor.Records(batch_size=10, flush_interval=0, logger=None, max_bytes=1)
+        records.put("Posts", [record], block=False)
+        assert records.next_batch() == {"table": "Posts", "records": [record]}
+        assert records.fill_level() == (0, 0, 0.0)
+
+    def test_put_limits_queued_bytes_per_table(self):
+        record = {"title": "x" * 90}
+        size = len(orjson.dumps(record))
+        records = BulkProcessor.Records(
+            batch_size=10, flush_interval=60, logger=None, max_bytes=size * 10, max_bytes_per_table=size * 3
+        )
+        with pytest.raises(QueueFullError) as e:
+            records.put("Posts", [record] * 5, block=False)
+        assert e.value.queued == 3
+        # a busy table does not take the budget of the others
+        records.put("Users", [record] * 3, block=False)
+        assert records.fill_level() == (6, size * 6, 1.0)
+
+        # an oversized record still fits into an empty table
+        records.put("Tags", [{"title": "x" * size * 3}], block=False)
+        with pytest.raises(QueueFullError):
+            records.put("Tags", [record], block=False)
+
+        with pytest.raises(Exception):
+            BulkProcessor(utils.get_mock_client(lambda *args: (200, {}))[0], max_queue_bytes_per_table=0)
+
+    def test_bulk_processor_backpressure(self):
+        release = threading.Event()
+
+        def handler(method, url, body):
+            release.wait(5)
+            return 200, {}
+
+        client, adapter = utils.get_mock_client(handler)
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=5, flush_interval=60, max_queue_size=10)
+        bp.put_records("Posts", [{"i": i} for i in range(15)])
+        sts = bp.get_stats()
+        assert sts["queue"] == 10
+        assert sts["queue_fill"] == 1.0
+
+        with pytest.raises(QueueFullError):
+            bp.put_record("Posts", {"i": 15}, timeout=0.05)
+
+        release.set()
+        bp.put_record("Posts", {"i": 15}, timeout=5)
+        bp.flush_queue()
+        sts = bp.get_stats()
+        assert sts["total"] == 16
+        assert sts["queue"] == 0
+        assert sts["queue_fill"] == 0.0
+
+    def test_throttle_additive_increase_multiplicative_decrease(self):
+        records = BulkProcessor.Records(batch_size=20, flush_interval=60, logger=None)
+        throttle = BulkProcessor.Throttle(records, 4, 20, 35, 1.0, True, logging.getLogger())
+
+        throttle.on_response(0.1, True)
+        throttle.on_response(0.1, True)
+        assert throttle.limits() == (4, 35)
+        assert records.batch_size == 35
+
+        throttle.on_response(1.5, True)
+        assert throttle.limits() == (4, 17)
+
+        throttle.on_rate_limited(0)
+        assert throttle.limits() == (2, 8)
+        assert records.batch_size == 8
+
+        throttle.on_response(0.1, True)
+        assert throttle.limits() == (3, 18)
+
+        # fixed limits if not adaptive
+        throttle = BulkProcessor.Throttle(records, 4, 20, 35, 1.0, False, logging.getLogger())
+        throttle.on_response(0.1, True)
+        throttle.on_rate_limited(0)
+        assert throttle.limits() == (4, 20)
+
+    def test_throttle_limits_concurrency_and_pauses(self):
+        records = BulkProcessor.Records(batch_size=20, flush_interval=60, logger=None)
+        throttle = BulkProcessor.Throttle(records, 2, 20, 1000, 1.0, True, logging.getLogger())
+        throttle.on_rate_limited(0.2)
+        assert throttle.limits() == (1, 10)
+
+        start = time.monotonic()
+        assert throttle.acquire()
+        assert time.monotonic() - start >= 0.15
+
+        second = threading.Thread(target=throttle.acquire, daemon=True)
+        second.start()
+        second.join(0.05)
+        assert second.is_alive()
+        throttle.release()
+        second.join(5)
+        assert not second.is_alive()
+
+        throttle.close()
+        assert not throttle.acquire()
+
+    def test_adaptive_bulk_processor_requeues_rate_limited_batches(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append(len(body["records"]))
+            if len(calls) == 1:
+                return 429, {"message": "rate limited"}, {"Retry-After": "0.1"}
+            return 200, {}
+
+        client, adapter = utils.get_mock_client(handler)
+        bp = BulkProcessor(client, thread_pool_size=2, batch_size=10, flush_interval=60, adaptive=True)
+        bp.put_records("Posts", [{"i": i} for i in range(10)])
+        bp.flush_queue()
+
+        sts = bp.get_stats()
+        assert calls[0] == 10
+        assert sum(calls[1:]) == 10
+        assert sts["total"] == 10
+        assert sts["failed_batches"] == 0
+        assert sts["concurrency"] == 2
+        received = [r for req, _ in adapter.requests[1:] for r in orjson_body(req)["records"]]
+        assert received == [{"i": i} for i in range(10)]
+
+    def test_retries_server_and_connection_errors(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append(body["records"])
+            if len(calls) == 1:
+                raise RequestsConnectionError("connection reset")
+            if len(calls) == 2:
+                return 503, {"message": "unavailable"}
+            return 200, {}
+
+        client, adapter = utils.get_mock_client(handler)
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=5, flush_interval=60, retry_backoff=0.01)
+        bp.put_records("Posts", [{"i": i} for i in range(5)])
+        bp.flush_queue()
+
+        sts = bp.get_stats()
+        assert len(calls) == 3
+        assert all(c == [{"i": i} for i in range(5)] for c in calls)
+        assert sts["retries"] == 2
+        assert sts["total"] == 5
+        assert sts["failed_batches"] == 0
+
+    def test_gives_up_after_max_retries(self):
+        client, adapter = utils.get_mock_client(lambda m, u, b: (500, {"message": "boom"}))
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=5, flush_interval=60, max_retries=2, retry_backoff=0)
+        bp.put_records("Posts", [{"i": i} for i in range(5)])
+        bp.flush_queue()
+
+        assert len(adapter.requests) == 3
+        assert bp.get_stats()["retries"] == 2
+        failed = bp.get_failed_batches()
+        assert len(failed) == 1
+        assert failed[0]["table"] == "Posts"
+        assert failed[0]["records"] == [{"i": i} for i in range(5)]
+        assert failed[0]["response"] is None
+        assert "boom" in failed[0]["error"]
+
+    def test_resubmits_valid_records_of_rejected_batch(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append(body["records"])
+            if len(calls) == 1:
+                errors = [{"index": 1, "message": "invalid", "status": 400}, {"index": 3, "message": "invalid"}]
+                return 400, {"errors": errors}
+            return 200, {}
+
+        client, adapter = utils.get_mock_client(handler)
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=5, flush_interval=60)
+        bp.put_records("Posts", [{"i": i} for i in range(5)])
+        bp.flush_queue()
+
+        assert calls[1] == [{"i": 0}, {"i": 2}, {"i": 4}]
+        failed = bp.get_failed_batches()
+        assert len(failed) == 1
+        assert failed[0]["records"] == [{"i": 1}, {"i": 3}]
+        assert failed[0]["response"].status_code == 400
+        sts = bp.get_stats()
+        assert sts["total"] == 5
+        assert sts["retries"] == 0
+        assert sts["failed_batches"] == 1
+
+    def test_rejected_batch_without_record_errors_is_not_resubmitted(self):
+        client, adapter = utils.get_mock_client(lambda m, u, b: (400, {"message": "table not found"}))
+        bp = BulkProcessor(client, thread_pool_size=1, batch_size=5, flush_interval=60)
+        bp.put_records("Posts", [{"i": i} for i in range(5)])
+        bp.flush_queue()
+
+        assert len(adapter.requests) == 1
+        failed = bp.get_failed_batches()
+        assert len(failed) == 1
+        assert len(failed[0]["records"]) == 5
+        assert failed[0]["error"] == "table not found"
+
+
+def orjson_body(request) -> dict:
+    return orjson.loads(request.body)
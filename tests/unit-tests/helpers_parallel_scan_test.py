@@ -0,0 +1,136 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import random
+import unittest
+import uuid
+
+import pytest
+import utils
+
+from xata.helpers import ParallelScan
+
+RECORDS = [{"id": "rec_%04d" % i, "score": i % 10} for i in range(1000)] + [{"id": "rec_9999", "score": None}]
+
+
+def matches(record: dict, f: dict) -> bool:
+    for key, cond in f.items():
+        if key == "$all":
+            if not all(matches(record, c) for c in cond):
+                return False
+        elif key == "$any":
+            if not any(matches(record, c) for c in cond):
+                return False
+        elif key == "$notExists":
+            if record.get(cond) is not None:
+                return False
+        elif isinstance(cond, dict):
+            value = record.get(key)
+            if value is None:
+                return False
+            if "$ge" in cond and not value >= cond["$ge"]:
+                return False
+            if "$lt" in cond and not value < cond["$lt"]:
+                return False
+        elif record.get(key) != cond:
+            return False
+    return True
+
+
+CURSORS = {}
+
+
+def handler(method, url, body):
+    """
+    Query endpoint with filters, random sort and cursors. Like the server,
+    follow up requests only carry the cursor, the filter is implied.
+    """
+    cursor = body.get("page", {}).get("after")
+    if cursor is None:
+        rows = [r for r in RECORDS if matches(r, body.get("filter", {}))]
+        if body.get("sort") == {"*": "random"}:
+            rows = random.sample(rows, len(rows))
+        offset = 0
+    else:
+        rows, offset = CURSORS.pop(cursor)
+    size = body.get("page", {}).get("size", 20)
+    more = offset + size < len(rows)
+    cursor = str(uuid.uuid4())
+    CURSORS[cursor] = (rows, offset + size)
+    page = {"cursor": cursor, "more": more}
+    return 200, {"records": rows[offset : offset + size], "meta": {"page": page}}
+
+
+class TestHelpersParallelScan(unittest.TestCase):
+    def test_init(self):
+        client, _ = utils.get_mock_client(handler)
+        with pytest.raises(Exception) as e:
+            ParallelScan(client, "Posts", partitions=0)
+        assert str(e.value) == "partitions must be greater than 0, default: 4"
+
+    def test_explicit_boundaries(self):
+        client, _ = utils.get_mock_client(handler)
+        scan = ParallelScan(client, "Posts", boundaries=["rec_0250", "rec_0500"], payload={"sort": {"id": "desc"}})
+        partitions = scan.get_partitions()
+
+        assert len(partitions) == 3
+        assert partitions[0]["filter"] == {"$any": [{"id": {"$lt": "rec_0250"}}, {"$notExists": "id"}]}
+        assert partitions[1]["filter"] == {"id": {"$ge": "rec_0250", "$lt": "rec_0500"}}
+        assert partitions[2]["filter"] == {"id": {"$ge": "rec_0500"}}
+        assert all("sort" not in p for p in partitions)
+
+    def test_sampled_boundaries(self):
+        client, _ = utils.get_mock_client(handler)
+        scan = ParallelScan(client, "Posts", partitions=4)
+        boundaries = scan.get_boundaries()
+
+        assert len(boundaries) == 3
+        assert boundaries == sorted(boundaries)
+
+    def test_scan_merged(self):
+        client, _ = utils.get_mock_client(handler)
+        records = list(ParallelScan(client, "Posts", partitions=4, payload={"page": {"size": 50}}).scan())
+
+        assert len(records) == len(RECORDS)
+        assert sorted(r["id"] for r in records) == [r["id"] for r in RECORDS]
+
+    def test_scan_with_filter_on_other_column(self):
+        client, _ = utils.get_mock_client(handler)
+        scan = ParallelScan(
+            client, "Posts", column="score", partitions=3, payload={"filter": {"id": {"$ge": "rec_0500"}}}
+        )
+        records = list(scan.scan())
+
+        assert len(records) == 501
+        assert all(r["id"] >= "rec_0500" for r in records)
+
+    def test_scan_pages(self):
+        client, _ = utils.get_mock_client(handler)
+        scan = ParallelScan(client, "Posts", boundaries=["rec_0500"], payload={"page": {"size": 100}})
+        per_partition = {0: 0, 1: 0}
+        for i, records in scan.scan_pages():
+            assert len(records) <= 100
+            per_partition[i] += len(records)
+
+        assert per_partition == {0: 500, 1: 501}
+
+    def test_scan_raises_errors(self):
+        client, _ = utils.get_mock_client(lambda method, url, body: (400, {"message": "column not found"}))
+        with pytest.raises(Exception):
+            list(ParallelScan(client, "Posts", boundaries=["a"]).scan())
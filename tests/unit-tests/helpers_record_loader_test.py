@@ -0,0 +1,107 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+import utils
+
+from xata.client import XataClient
+from xata.helpers import RecordLoader
+
+
+def query_handler(requests: list):
+    lock = threading.Lock()
+
+    def handler(method, url, body):
+        ids = body["filter"]["id"]["$any"]
+        with lock:
+            requests.append(ids)
+        records = [{"id": i} for i in ids if not i.startswith("missing")]
+        return 200, {"records": records, "meta": {"page": {"more": False}}}
+
+    return handler
+
+
+class TestHelpersRecordLoader(unittest.TestCase):
+    def test_init(self):
+        client = XataClient(api_key="api_key", workspace_id="ws_id")
+        with pytest.raises(Exception) as e:
+            RecordLoader(client, "Posts", max_batch_size=0)
+        assert str(e.value) == "max batch size must be greater than 0, default: 200"
+        with pytest.raises(Exception) as e:
+            RecordLoader(client, "Posts", wait=-1)
+        assert str(e.value) == "wait can not be negative, default: 0.002000"
+
+    def test_concurrent_loads_are_coalesced(self):
+        requests = []
+        client, adapter = utils.get_mock_client(query_handler(requests))
+        loader = RecordLoader(client, "Posts", wait=0.05)
+
+        ids = [str(i % 20) for i in range(40)] + ["missing"]
+        barrier = threading.Barrier(len(ids))
+
+        def load(record_id):
+            barrier.wait()
+            return loader.load(record_id)
+
+        with ThreadPoolExecutor(max_workers=len(ids)) as executor:
+            records = list(executor.map(load, ids))
+
+        assert records[:40] == [{"id": i} for i in ids[:40]]
+        assert records[40] is None
+        assert sum(len(r) for r in requests) == 21
+        assert len(requests) < 5
+        assert loader.get_stats() == {"loads": 41, "batches": len(requests)}
+
+    def test_full_batch_is_sent_right_away(self):
+        requests = []
+        client, adapter = utils.get_mock_client(query_handler(requests))
+        loader = RecordLoader(client, "Posts", wait=60, max_batch_size=5)
+
+        records = loader.load_many([str(i) for i in range(10)])
+        assert records == [{"id": str(i)} for i in range(10)]
+        assert sorted(len(r) for r in requests) == [5, 5]
+
+    def test_load_many_joins_open_batch_without_threads(self):
+        requests = []
+        client, adapter = utils.get_mock_client(query_handler(requests))
+        loader = RecordLoader(client, "Posts", wait=0.2)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # opens the batch and sends it after the wait
+            first = executor.submit(loader.load, "a")
+            while loader.batch is None:
+                pass
+            with patch("xata.helpers.ThreadPoolExecutor", side_effect=AssertionError("thread per id")):
+                assert loader.load_many(["b", "c", "a"]) == [{"id": "b"}, {"id": "c"}, {"id": "a"}]
+            assert first.result() == {"id": "a"}
+        assert requests == [["a", "b", "c"]]
+        assert loader.get_stats() == {"loads": 4, "batches": 1}
+
+    def test_errors_reach_every_caller(self):
+        client, adapter = utils.get_mock_client(lambda m, u, b: (500, {"message": "boom"}))
+        loader = RecordLoader(client, "Posts", wait=0.01)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(loader.load, str(i)) for i in range(3)]
+            for f in futures:
+                with pytest.raises(Exception):
+                    f.result()
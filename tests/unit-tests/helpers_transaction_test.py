@@ -17,8 +17,12 @@
 # under the License.
 #
 
+import time
 import unittest
 
+import pytest
+import utils
+
 from xata.client import XataClient
 from xata.helpers import Transaction
 
@@ -31,3 +35,141 @@ class TestHelpersTranaction(unittest.TestCase):
         assert trx.size() == 0
         trx.get("posts", "abc")
         assert trx.size() == 1
+
+    def test_operations_limit(self):
+        client = XataClient(api_key="api_key", workspace_id="ws_id")
+        trx = Transaction(client)
+        for i in range(1000):
+            trx.get("posts", str(i))
+        with pytest.raises(Exception) as e:
+            trx.get("posts", "1000")
+        assert str(e.value) == "Maximum amount of 1000 transaction operations exceeded."
+
+        trx = Transaction(client, auto_chunk=True)
+        for i in range(2500):
+            trx.get("posts", str(i))
+        assert trx.size() == 2500
+
+    def test_auto_chunk_merges_results_in_order(self):
+        def handler(method, url, body):
+            time.sleep(0.01 * (len(body["operations"]) % 3))
+            return 200, {"results": [{"id": op["get"]["id"]} for op in body["operations"]]}
+
+        client, adapter = utils.get_mock_client(handler)
+        trx = Transaction(client, auto_chunk=True, max_concurrency=3)
+        for i in range(2500):
+            trx.get("posts", str(i))
+        r = trx.run()
+
+        assert len(adapter.requests) == 3
+        assert r.status_code == 200
+        assert not r.has_errors
+        assert [x["id"] for x in r.results] == [str(i) for i in range(2500)]
+        assert [(c["offset"], c["operations"], c["committed"]) for c in r.chunks] == [
+            (0, 1000, True),
+            (1000, 1000, True),
+            (2000, 500, True),
+        ]
+        assert trx.size() == 0
+
+    def test_auto_chunk_reports_failed_chunks(self):
+        def handler(method, url, body):
+            if body["operations"][0]["get"]["id"] == "1000":
+                return 400, {"errors": [{"index": 5, "message": "record not found"}]}
+            return 200, {"results": [{"id": op["get"]["id"]} for op in body["operations"]]}
+
+        client, adapter = utils.get_mock_client(handler)
+        trx = Transaction(client, auto_chunk=True)
+        for i in range(2500):
+            trx.get("posts", str(i))
+        r = trx.run()
+
+        assert r.status_code == 400
+        assert r.has_errors
+        assert r.errors == [{"index": 1005, "message": "record not found"}]
+        assert [c["committed"] for c in r.chunks] == [True, False, True]
+        assert [x["id"] for x in r.results] == [str(i) for i in range(1000)] + [str(i) for i in range(2000, 2500)]
+        # only the operations of the failed chunk are kept
+        assert trx.size() == 1000
+        assert trx.operations["operations"][0] == {"get": {"table": "posts", "id": "1000", "columns": []}}
+
+    def test_auto_chunk_keeps_committed_chunks_on_exceptions(self):
+        committed, failing = [], ["1000"]
+
+        def handler(method, url, body):
+            if body["operations"][0]["get"]["id"] in failing:
+                return 500, {"message": "internal error"}
+            committed.append(body["operations"][0]["get"]["id"])
+            return 200, {"results": [{"id": op["get"]["id"]} for op in body["operations"]]}
+
+        client, adapter = utils.get_mock_client(handler)
+        trx = Transaction(client, auto_chunk=True)
+        for i in range(2500):
+            trx.get("posts", str(i))
+        r = trx.run()
+
+        assert sorted(committed) == ["0", "2000"]
+        assert r.has_errors
+        assert [c["committed"] for c in r.chunks] == [True, False, True]
+        assert r.chunks[1]["status_code"] is None
+        assert "internal error" in r.chunks[1]["error"]
+        assert [x["id"] for x in r.results] == [str(i) for i in range(1000)] + [str(i) for i in range(2000, 2500)]
+        # running again only commits the failed chunk
+        assert trx.size() == 1000
+        committed.clear()
+        failing.clear()
+        assert trx.run().status_code == 200
+        assert committed == ["1000"]
+        assert trx.size() == 0
+
+    def test_auto_chunk_commits_dependent_chunks_in_order(self):
+        sent, failing = [], [True]
+
+        def handler(method, url, body):
+            first = body["operations"][0]
+            sent.append(first.get("get", {}).get("id") or first["insert"]["record"]["id"])
+            if failing[0] and sent[-1] == "a":
+                return 500, {"message": "internal error"}
+            return 200, {"results": [{} for _ in body["operations"]]}
+
+        client, adapter = utils.get_mock_client(handler)
+        trx = Transaction(client, auto_chunk=True, max_concurrency=4)
+        trx.insert("posts", {"id": "a", "title": "a"})
+        for i in range(1, 2000):
+            trx.get("posts", str(i))
+        # chunk 3 reads the record inserted by chunk 1, chunk 2 is independent
+        trx.get("posts", "a")
+        for i in range(2001, 2500):
+            trx.get("posts", str(i))
+        assert Transaction._dependent_chunks(
+            [trx.operations["operations"][i : i + 1000] for i in range(0, 2500, 1000)]
+        ) == [[0, 2], [1]]
+
+        r = trx.run()
+        assert sorted(sent) == ["1000", "a"]
+        assert [c["committed"] for c in r.chunks] == [False, True, False]
+        assert "earlier chunk" in r.chunks[2]["error"]
+        assert trx.size() == 1500
+
+        sent.clear()
+        failing[0] = False
+        assert trx.run().status_code == 200
+        assert sent == ["a", "a"]
+        assert trx.size() == 0
+
+    def test_run_retries_rate_limits(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append(1)
+            if len(calls) == 1:
+                return 429, {"message": "too many requests"}
+            return 200, {"results": [{}]}
+
+        client, adapter = utils.get_mock_client(handler)
+        trx = Transaction(client)
+        trx.get("posts", "a")
+        r = trx.run()
+        assert r.status_code == 200
+        assert r.attempts == 2
+        assert trx.size() == 0
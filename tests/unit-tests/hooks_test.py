@@ -0,0 +1,253 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import http.server
+import threading
+import unittest
+from unittest.mock import patch
+
+import httpx
+import pytest
+import utils
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from xata.async_client import AsyncXataClient
+from xata.errors import XataServerError
+from xata.hooks import Hook, RequestEvent
+from xata.metrics import Metrics
+from xata.retry import RetryPolicy
+from xata.routes import route_template
+from xata.transport import AsyncTransport, Transport
+
+
+class Recorder(Hook):
+    def __init__(self, name: str, calls: list):
+        self.name = name
+        self.calls = calls
+        self.events = []
+
+    def before_send(self, event: RequestEvent):
+        self.calls.append((self.name, "before_send"))
+        event.headers["x-%s" % self.name] = "1"
+
+    def after_response(self, event: RequestEvent):
+        self.calls.append((self.name, "after_response"))
+        self.events.append(event)
+
+    def on_error(self, event: RequestEvent):
+        self.calls.append((self.name, "on_error"))
+        self.events.append(event)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"id": "rec_1"}'
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRoutes(unittest.TestCase):
+    def test_route_template(self):
+        assert route_template("/db/blog:main/tables/Posts/query") == "/db/{db_branch}/tables/{table}/query"
+        assert route_template("/db/blog:main/tables/Posts/data/rec_1?columns=a,b") == (
+            "/db/{db_branch}/tables/{table}/data/{record_id}"
+        )
+        assert route_template("/db/blog:main/tables/Posts") == "/db/{db_branch}/tables/{table}"
+        assert route_template("/db/blog:main/schema/history") == "/db/{db_branch}/schema/history"
+        assert (
+            route_template("/workspaces/ws/invites/key/accept") == "/workspaces/{workspace}/invites/{invite_key}/accept"
+        )
+        assert route_template("/user") == "/user"
+        assert route_template("/unknown/path?x=1") == "/unknown/path"
+
+
+class TestHooks(unittest.TestCase):
+    def test_hook_chain(self):
+        calls = []
+        a, b = Recorder("a", calls), Recorder("b", calls)
+        client, adapter = utils.get_mock_client(lambda m, u, body: (200, {"records": []}), hooks=[a])
+        client.add_hook(b)
+        client.data().query("Posts", {"page": {"size": 5}})
+
+        assert calls == [("a", "before_send"), ("b", "before_send"), ("b", "after_response"), ("a", "after_response")]
+        req, _ = adapter.requests[0]
+        assert req.headers["x-a"] == "1" and req.headers["x-b"] == "1"
+
+        event = a.events[0]
+        assert event is b.events[0]
+        assert event.method == "POST"
+        assert event.route == "/db/{db_branch}/tables/{table}/query"
+        assert event.url_path == "/db/db:main/tables/Posts/query"
+        assert event.status_code == 200
+        assert event.bytes_out == len(b'{"page":{"size":5}}')
+        assert event.bytes_in == len(b'{"records":[]}')
+        assert event.retries == 0
+        assert event.error is None
+        assert event.elapsed > 0
+        assert set(event.timings.keys()) == {"dns", "connect", "tls", "ttfb", "total"}
+
+        assert client.remove_hook(a)
+        assert not client.remove_hook(a)
+        client.data().query("Posts", {})
+        assert len(a.events) == 1 and len(b.events) == 2
+
+    def test_error_status_and_retries(self):
+        calls = []
+        hook = Recorder("a", calls)
+        statuses = [503, 503, 503]
+        client, _ = utils.get_mock_client(
+            lambda m, u, body: (statuses.pop(0) if statuses else 200, {"message": "unavailable"}),
+            hooks=[hook],
+            retry_policy=RetryPolicy(backoff=0.001, max_backoff=0.001, max_retries=1),
+        )
+        with pytest.raises(XataServerError):
+            client.records().get("Posts", "rec_1")
+        # a response is not an error, once per request not per attempt
+        assert calls == [("a", "before_send"), ("a", "after_response")]
+        assert hook.events[0].status_code == 503
+        assert hook.events[0].retries == 1
+
+    def test_on_error(self):
+        def handler(method, url, body):
+            raise RequestsConnectionError("connection refused")
+
+        calls = []
+        hook = Recorder("a", calls)
+        client, _ = utils.get_mock_client(handler, hooks=[hook])
+        with pytest.raises(RequestsConnectionError):
+            client.records().get("Posts", "rec_1")
+        assert calls == [("a", "before_send"), ("a", "on_error")]
+        event = hook.events[0]
+        assert isinstance(event.error, RequestsConnectionError)
+        assert event.status_code is None
+        assert event.route == "/db/{db_branch}/tables/{table}/data/{record_id}"
+
+    def test_before_send_aborts(self):
+        class Deny(Hook):
+            def before_send(self, event):
+                raise Exception("denied")
+
+        client, adapter = utils.get_mock_client(lambda m, u, body: (200, {}), hooks=[Deny()])
+        with pytest.raises(Exception, match="denied"):
+            client.records().get("Posts", "rec_1")
+        assert adapter.requests == []
+
+    def test_clone_has_own_hooks(self):
+        client, _ = utils.get_mock_client(lambda m, u, body: (200, {}), hooks=[Hook()])
+        clone = client.clone(db_name="other")
+        clone.add_hook(Hook())
+        assert len(client.hooks) == 1 and len(clone.hooks) == 2
+
+    def test_async(self):
+        calls = []
+        hook = Recorder("a", calls)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.headers["x-a"] == "1"
+            return httpx.Response(200, json={"records": []})
+
+        async def run():
+            client = AsyncXataClient(api_key="api_key", workspace_id="ws_id", db_name="db", hooks=[hook])
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                await client.data().query("Posts", {})
+
+        asyncio.run(run())
+        assert calls == [("a", "before_send"), ("a", "after_response")]
+        assert hook.events[0].route == "/db/{db_branch}/tables/{table}/query"
+        assert hook.events[0].status_code == 200
+
+
+class TestTransportTimings(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://localhost:%d/db/db:main/tables/Posts/data/rec_1" % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_sync(self):
+        transport = Transport()
+        first = transport.request("GET", self.url).timings
+        assert first["dns"] > 0 and first["connect"] > 0
+        assert first["tls"] >= 0
+        assert 0 < first["ttfb"] <= first["total"]
+
+        # the pooled connection is reused
+        second = transport.request("GET", self.url).timings
+        assert second["dns"] == 0 and second["connect"] == 0
+        assert 0 < second["ttfb"] <= second["total"]
+        transport.close()
+
+    def test_sync_untraced(self):
+        transport = Transport()
+        # urllib3 resolves the host, the traced connection does not look it up again
+        with patch("xata.transport.allowed_gai_family", side_effect=AssertionError("traced connection")):
+            timings = transport.request("GET", self.url, trace=False).timings
+        assert timings["dns"] is None and timings["connect"] is None and timings["ttfb"] is None
+        assert timings["total"] > 0
+        transport.close()
+
+    def test_async_untraced(self):
+        async def run():
+            transport = AsyncTransport()
+            try:
+                return (await transport.request("GET", self.url, trace=False)).timings
+            finally:
+                await transport.close()
+
+        timings = asyncio.run(run())
+        assert timings["connect"] is None and timings["ttfb"] is None
+        assert timings["total"] > 0
+
+    def test_traced_only_with_hooks(self):
+        client, _ = utils.get_mock_client(lambda method, url, body: (200, {"records": []}), metrics=Metrics())
+        with patch.object(client.transport, "request", wraps=client.transport.request) as request:
+            # metrics only need the latency
+            client.data().query("Posts", {})
+            assert request.call_args.kwargs["trace"] is False
+            assert client.get_metrics()["data.query"]["calls"] == 1
+            client.add_hook(Hook())
+            client.data().query("Posts", {})
+            assert request.call_args.kwargs["trace"] is True
+
+    def test_async(self):
+        async def run():
+            transport = AsyncTransport()
+            try:
+                return [(await transport.request("GET", self.url)).timings for _ in range(2)]
+            finally:
+                await transport.close()
+
+        first, second = asyncio.run(run())
+        # DNS is part of connect
+        assert first["dns"] is None and first["connect"] > 0
+        assert 0 < first["ttfb"] <= first["total"]
+        assert second["connect"] == 0
@@ -0,0 +1,133 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import re
+import unittest
+
+import pytest
+import utils
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from xata.errors import RateLimitError, XataServerError
+from xata.hooks import RequestEvent
+from xata.metrics import Metrics
+from xata.routes import operation_name
+
+
+def event(operation_path: str, elapsed: float, status_code: int = 200, method: str = "POST") -> RequestEvent:
+    e = RequestEvent(method, operation_path, "https://ws.us-east-1.xata.sh" + operation_path, {}, b"{}")
+    e.elapsed = elapsed
+    e.status_code = status_code
+    e.bytes_in = 10
+    return e
+
+
+class TestMetrics(unittest.TestCase):
+    def test_operation_name(self):
+        assert operation_name("POST", "/db/{db_branch}/tables/{table}/query") == "data.query"
+        assert operation_name("post", "/db/{db_branch}/tables/{table}/bulk") == "records.bulk_insert"
+        assert operation_name("POST", "/db/{db_branch}/sql") == "sql.query"
+        assert operation_name("GET", "/db/{db_branch}/tables/{table}/data/{record_id}") == "records.get"
+        assert operation_name("GET", "/unknown") == "GET /unknown"
+
+    def test_client_metrics(self):
+        statuses = [200, 429, 503, 200]
+
+        def handler(method, url, body):
+            status = statuses.pop(0)
+            return status, {"records": []} if status == 200 else {"message": "error"}
+
+        client, _ = utils.get_mock_client(handler, metrics=Metrics())
+        assert client.get_metrics() == {}
+        client.data().query("Posts", {})
+        with pytest.raises(RateLimitError):
+            client.data().query("Posts", {})
+        with pytest.raises(XataServerError):
+            client.records().bulk_insert("Posts", {"records": [{"a": 1}]})
+        client.sql().query("SELECT 1")
+
+        metrics = client.get_metrics()
+        assert list(metrics.keys()) == ["data.query", "records.bulk_insert", "sql.query"]
+        query = metrics["data.query"]
+        assert query["calls"] == 2
+        assert query["errors"] == {"RateLimitError": 1}
+        assert query["bytes_out"] == 4
+        assert query["bytes_in"] > 0
+        assert metrics["records.bulk_insert"]["errors"] == {"XataServerError": 1}
+        assert metrics["sql.query"]["errors"] == {}
+        latency = query["latency"]
+        assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+        assert sum(latency["buckets"].values()) == 2
+
+        # clones report to the same metrics
+        statuses.append(200)
+        client.clone(db_name="other").sql().query("SELECT 1")
+        assert client.get_metrics(reset=True)["sql.query"]["calls"] == 2
+        assert client.get_metrics() == {}
+
+    def test_transport_errors(self):
+        def handler(method, url, body):
+            raise RequestsConnectionError("refused")
+
+        client, _ = utils.get_mock_client(handler, metrics=Metrics())
+        with pytest.raises(RequestsConnectionError):
+            client.records().get("Posts", "rec_1")
+        assert client.get_metrics()["records.get"]["errors"] == {"ConnectionError": 1}
+
+    def test_no_metrics(self):
+        client, _ = utils.get_mock_client(lambda m, u, b: (200, {}))
+        assert client.metrics is None
+        assert client.get_metrics() == {}
+
+    def test_percentiles(self):
+        metrics = Metrics(buckets=(0.1, 0.2, 0.5, 1.0))
+        for i in range(100):
+            # 90 fast, 9 slower, 1 very slow request
+            metrics.after_response(event("/db/db:main/tables/Posts/query", 0.05 if i < 90 else 0.3 if i < 99 else 4.0))
+        latency = metrics.get_metrics()["data.query"]["latency"]
+        assert 0 < latency["p50"] <= 0.1
+        assert 0.2 < latency["p95"] <= 0.5
+        assert latency["p99"] <= 0.5
+        assert latency["max"] == 4.0
+        assert latency["buckets"] == {0.1: 90, 0.2: 0, 0.5: 9, 1.0: 0, float("inf"): 1}
+
+    def test_invalid_buckets(self):
+        with pytest.raises(Exception):
+            Metrics(buckets=())
+        with pytest.raises(Exception):
+            Metrics(buckets=(1.0, 0.5))
+
+    def test_prometheus(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.after_response(event("/db/db:main/tables/Posts/query", 0.05))
+        metrics.after_response(event("/db/db:main/tables/Posts/query", 0.5, status_code=429))
+        text = metrics.export_prometheus()
+
+        assert "# TYPE xata_requests_total counter" in text
+        assert 'xata_requests_total{operation="data.query"} 2' in text
+        assert 'xata_request_errors_total{operation="data.query",error="RateLimitError"} 1' in text
+        assert 'xata_request_bytes_out_total{operation="data.query"} 4' in text
+        assert 'xata_response_bytes_in_total{operation="data.query"} 20' in text
+        assert 'xata_request_duration_seconds_bucket{operation="data.query",le="0.1"} 1' in text
+        assert 'xata_request_duration_seconds_bucket{operation="data.query",le="1.0"} 2' in text
+        assert 'xata_request_duration_seconds_bucket{operation="data.query",le="+Inf"} 2' in text
+        assert 'xata_request_duration_seconds_count{operation="data.query"} 2' in text
+        sample = re.compile(r"^[a-z_]+(\{[^}]*\})? [0-9.e+-]+$")
+        for line in text.splitlines():
+            assert line.startswith("# ") or sample.match(line), line
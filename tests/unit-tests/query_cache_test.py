@@ -0,0 +1,223 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import httpx
+import pytest
+import utils
+
+from xata.async_client import AsyncXataClient
+from xata.cache import MemoryQueryCacheBackend, QueryCache, SQLiteQueryCacheBackend
+
+
+class CountingHandler(object):
+    def __init__(self):
+        self.version = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, body):
+        with self.lock:
+            self.calls += 1
+        if url.endswith("/query") or url.endswith("/aggregate") or url.endswith("/summarize"):
+            return 200, {"records": [{"version": self.version}], "meta": {"page": {"more": False}}}
+        self.version += 1
+        return 200, {"results": []}
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_init(self):
+        with pytest.raises(Exception) as e:
+            QueryCache(ttl=0)
+        assert str(e.value) == "time to live must be greater than 0, default: 30.000000"
+        with pytest.raises(Exception) as e:
+            QueryCache(stale_ttl=-1)
+        assert str(e.value) == "stale time to live can not be negative, default: 0"
+
+    def test_keyed_by_canonical_payload(self):
+        handler = CountingHandler()
+        cache = QueryCache()
+        client, adapter = utils.get_mock_client(handler, query_cache=cache)
+
+        client.data().query("Posts", {"filter": {"a": 1}, "page": {"size": 5}})
+        r = client.data().query("Posts", {"page": {"size": 5}, "filter": {"a": 1}})
+        assert r["records"] == [{"version": 0}]
+        assert handler.calls == 1
+
+        client.data().query("Posts", {"filter": {"a": 2}})
+        client.data().query("Users", {"filter": {"a": 1}, "page": {"size": 5}})
+        client.data().query("Posts", {"filter": {"a": 1}, "page": {"size": 5}}, branch_name="dev")
+        client.data().aggregate("Posts", {"filter": {"a": 1}, "page": {"size": 5}})
+        client.data().summarize("Posts", {"filter": {"a": 1}, "page": {"size": 5}})
+        client.data().summarize("Posts", {"filter": {"a": 1}, "page": {"size": 5}})
+        assert handler.calls == 6
+        assert cache.get_stats() == {"hits": 2, "stale_hits": 0, "misses": 6, "refreshes": 0}
+
+    def test_defaults_are_normalized(self):
+        handler = CountingHandler()
+        client, adapter = utils.get_mock_client(handler, query_cache=QueryCache())
+
+        client.data().query("Posts", {"sort": "title"})
+        client.data().query("Posts", {"sort": ["title"], "page": {"size": 20}, "columns": ["*"]})
+        client.data().query("Posts", {"sort": {"title": "asc"}, "filter": {}})
+        client.data().query("Posts", {"sort": [{"title": "asc"}], "page": {}})
+        assert handler.calls == 1
+
+        client.data().query("Posts", {"sort": {"title": "desc"}})
+        client.data().query("Posts", {"sort": "title", "page": {"size": 21}})
+        client.data().query("Posts", {"sort": "title", "columns": ["id"]})
+        assert handler.calls == 4
+
+    def test_writes_invalidate_table(self):
+        handler = CountingHandler()
+        client, adapter = utils.get_mock_client(handler, query_cache=QueryCache())
+
+        def version(table="Posts"):
+            return client.data().query(table, {})["records"][0]["version"]
+
+        assert version() == 0
+        assert version("Users") == 0
+        client.records().insert("Posts", {"title": "a"})
+        assert version() == 1
+        client.records().bulk_insert("Posts", {"records": [{"title": "b"}]})
+        assert version() == 2
+        client.records().transaction({"operations": [{"delete": {"table": "Posts", "id": "a"}}]})
+        assert version() == 3
+        # reads do not invalidate, other tables keep their results
+        client.records().transaction({"operations": [{"get": {"table": "Posts", "id": "a"}}]})
+        assert version() == 3
+        assert version("Users") == 0
+
+    def test_sql_writes_invalidate_branch(self):
+        handler = CountingHandler()
+        client, adapter = utils.get_mock_client(handler, query_cache=QueryCache())
+
+        def version(table="Posts"):
+            return client.data().query(table, {})["records"][0]["version"]
+
+        assert version() == 0 and version("Users") == 0
+        client.sql().query('SELECT * FROM "Posts"')
+        client.sql().query("  explain SELECT 1")
+        assert version() == 0 and version("Users") == 0
+        client.sql().query('UPDATE "Posts" SET title = $1', ["a"])
+        assert version() == 3 and version("Users") == 3
+        # other branches keep their results
+        assert client.data().query("Posts", {}, branch_name="dev")["records"][0]["version"] == 3
+        client.sql().query('DELETE FROM "Posts"', branch_name="dev")
+        assert version() == 3
+
+    def test_stale_while_revalidate(self):
+        handler = CountingHandler()
+        cache = QueryCache(ttl=0.05, stale_ttl=60)
+        client, adapter = utils.get_mock_client(handler, query_cache=cache)
+        assert client.data().query("Posts", {})["records"] == [{"version": 0}]
+
+        time.sleep(0.06)
+        handler.version = 1
+        # stale result right away, refreshed in the background
+        assert client.data().query("Posts", {})["records"] == [{"version": 0}]
+        deadline = time.monotonic() + 5
+        while handler.calls < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.02)
+        assert client.data().query("Posts", {})["records"] == [{"version": 1}]
+        assert handler.calls == 2
+        assert cache.get_stats()["refreshes"] == 1
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        backend = MemoryQueryCacheBackend(max_bytes=10)
+        backend.set("a", 1.0, b"1234")
+        backend.set("b", 1.0, b"1234")
+        backend.get("a")
+        backend.set("c", 1.0, b"1234")
+        assert backend.get("b") is None
+        assert backend.get("a") == (1.0, b"1234")
+        assert backend.size == 8
+        backend.set("d", 1.0, b"x" * 11)
+        assert backend.get("d") is None
+
+    def test_sqlite_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            handler = CountingHandler()
+            client, adapter = utils.get_mock_client(
+                handler, query_cache=QueryCache(backend=SQLiteQueryCacheBackend(path))
+            )
+            client.data().query("Posts", {"columns": ["id"]})
+
+            # a new process finds the results
+            backend = SQLiteQueryCacheBackend(path, max_bytes=200)
+            client, adapter = utils.get_mock_client(handler, query_cache=QueryCache(backend=backend))
+            assert client.data().query("Posts", {"columns": ["id"]})["records"] == [{"version": 0}]
+            assert handler.calls == 1
+
+            backend.clear()
+            backend.set("a", 1.0, b"x" * 150)
+            backend.set("b", 2.0, b"y" * 100)
+            assert backend.get("a") is None
+            assert backend.get("b") == (2.0, b"y" * 100)
+            # replacing an entry does not count its old size
+            backend.set("b", 3.0, b"z" * 100)
+            backend.set("c", 4.0, b"w" * 100)
+            assert backend.get("b") == (3.0, b"z" * 100)
+            backend.clear()
+            assert backend.get("b") is None
+            backend.close()
+
+    def test_sqlite_backend_shares_invalidation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            handler = CountingHandler()
+            reader, adapter = utils.get_mock_client(
+                handler, query_cache=QueryCache(backend=SQLiteQueryCacheBackend(path))
+            )
+            # another process writing to the table
+            writer, adapter = utils.get_mock_client(
+                handler, query_cache=QueryCache(backend=SQLiteQueryCacheBackend(path))
+            )
+
+            assert reader.data().query("Posts", {})["records"] == [{"version": 0}]
+            writer.records().insert("Posts", {"title": "a"})
+            assert reader.data().query("Posts", {})["records"] == [{"version": 1}]
+            assert handler.calls == 3
+
+    def test_async_client(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"records": [], "meta": {"page": {"more": False}}})
+
+        async def run():
+            client = AsyncXataClient(
+                api_key="api_key", workspace_id="ws_id", db_name="db", branch_name="main", query_cache=QueryCache()
+            )
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                await client.data().query("Posts", {})
+                await client.data().query("Posts", {})
+
+        asyncio.run(run())
+        assert calls == ["/db/db:main/tables/Posts/query"]
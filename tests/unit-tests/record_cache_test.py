@@ -0,0 +1,151 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import time
+import unittest
+
+import pytest
+import utils
+
+from xata.cache import RecordCache
+
+
+def record_handler(store: dict):
+    def handler(method, url, body):
+        record_id = url.split("?")[0].split("/")[-1]
+        if method == "GET":
+            if record_id not in store:
+                return 404, {"message": "not found"}
+            return 200, {"id": record_id, **store[record_id]}
+        if url.endswith("/transaction"):
+            for op in body["operations"]:
+                kind, params = next(iter(op.items()))
+                if kind == "update":
+                    store[params["id"]].update(params["fields"])
+            return 200, {"results": []}
+        if method == "DELETE":
+            store.pop(record_id, None)
+            return 204, None
+        store[record_id] = {**store.get(record_id, {}), **body}
+        return 200, {"id": record_id}
+
+    return handler
+
+
+class TestRecordCache(unittest.TestCase):
+    def test_init(self):
+        with pytest.raises(Exception) as e:
+            RecordCache(max_size=0)
+        assert str(e.value) == "max size must be greater than 0, default: 1000"
+        with pytest.raises(Exception) as e:
+            RecordCache(table_ttls={"Posts": -1})
+        assert str(e.value) == "time to live can not be negative, default: 60.000000"
+
+    def test_read_through(self):
+        cache = RecordCache()
+        client, adapter = utils.get_mock_client(record_handler({"a": {"title": "one"}}), record_cache=cache)
+
+        assert client.records().get("Posts", "a")["title"] == "one"
+        assert client.records().get("Posts", "a")["title"] == "one"
+        assert len(adapter.requests) == 1
+
+        # columns are part of the key, in any order
+        client.records().get("Posts", "a", columns=["title", "id"])
+        client.records().get("Posts", "a", columns=["id", "title"])
+        # other branches are cached separately
+        client.records().get("Posts", "a", branch_name="dev")
+        assert len(adapter.requests) == 3
+
+        # misses are not cached
+        assert client.records().get("Posts", "b").status_code == 404
+        assert client.records().get("Posts", "b").status_code == 404
+        assert len(adapter.requests) == 5
+        assert cache.get_stats() == {"hits": 2, "misses": 5, "evictions": 0, "invalidations": 0, "size": 3}
+
+    def test_cached_responses_are_independent(self):
+        client, adapter = utils.get_mock_client(record_handler({"a": {"title": "one"}}), record_cache=RecordCache())
+        first = client.records().get("Posts", "a")
+        first["title"] = "changed"
+        assert client.records().get("Posts", "a")["title"] == "one"
+
+    def test_writes_invalidate(self):
+        cache = RecordCache()
+        client, adapter = utils.get_mock_client(record_handler({"a": {"n": 1}, "x": {"n": 0}}), record_cache=cache)
+        client.records().get("Posts", "x")
+
+        def get():
+            return client.records().get("Posts", "a").get("n")
+
+        assert get() == 1
+        client.records().update("Posts", "a", {"n": 2})
+        assert get() == 2
+        client.records().upsert("Posts", "a", {"n": 3})
+        assert get() == 3
+        client.records().insert_with_id("Posts", "a", {"n": 4})
+        assert get() == 4
+        client.records().transaction({"operations": [{"update": {"table": "Posts", "id": "a", "fields": {"n": 5}}}]})
+        assert get() == 5
+        client.records().delete("Posts", "a")
+        assert get() is None
+
+        # other records are not affected
+        client.records().update("Posts", "b", {"n": 1})
+        assert client.records().get("Posts", "x")["n"] == 0
+        assert cache.get_stats()["hits"] == 1
+
+    def test_ttl_and_lru_eviction(self):
+        cache = RecordCache(max_size=2, ttl=60, table_ttls={"Users": 0.05, "Logs": 0})
+        store = {"a": {}, "b": {}, "c": {}}
+        client, adapter = utils.get_mock_client(record_handler(store), record_cache=cache)
+
+        client.records().get("Users", "a")
+        client.records().get("Users", "a")
+        assert len(adapter.requests) == 1
+        time.sleep(0.06)
+        client.records().get("Users", "a")
+        assert len(adapter.requests) == 2
+
+        # ttl of 0 disables caching for a table
+        client.records().get("Logs", "a")
+        client.records().get("Logs", "a")
+        assert len(adapter.requests) == 4
+
+        cache.clear()
+        client.records().get("Posts", "a")
+        client.records().get("Posts", "b")
+        client.records().get("Posts", "a")
+        client.records().get("Posts", "c")  # evicts b, least recently used
+        n = len(adapter.requests)
+        client.records().get("Posts", "a")
+        assert len(adapter.requests) == n
+        client.records().get("Posts", "b")
+        assert len(adapter.requests) == n + 1
+        assert cache.get_stats()["evictions"] == 2
+
+    def test_reads_racing_writes_are_not_cached(self):
+        cache = RecordCache()
+        cached, token = cache.lookup("GET", "/db/db:main/tables/Posts/data/a")
+        assert cached is None
+        cache.invalidate_request("PATCH", "/db/db:main/tables/Posts/data/a")
+
+        class Response:
+            status_code = 200
+
+        cache.store(token, Response())
+        assert cache.get_stats()["size"] == 0
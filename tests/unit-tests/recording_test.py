@@ -0,0 +1,189 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+import httpx
+import orjson
+import pytest
+import utils
+
+from xata.async_client import AsyncXataClient
+from xata.client import XataClient
+from xata.recording import (
+    AsyncRecordingTransport,
+    AsyncReplayTransport,
+    RecordingTransport,
+    ReplayTransport,
+    _decode_body,
+    _encode_body,
+)
+
+PAGES = [[{"id": "rec_%d" % (p * 3 + i), "n": p * 3 + i} for i in range(3)] for p in range(3)]
+
+
+def handler(method, url, body):
+    if url.endswith("/query"):
+        page = int(body["page"]["after"]) if "after" in body.get("page", {}) else 0
+        more = page + 1 < len(PAGES)
+        return 200, {"records": PAGES[page], "meta": {"page": {"cursor": str(page + 1), "more": more}}}
+    if url.endswith("/bulk"):
+        return 200, {"recordIDs": [r["id"] for r in body["records"]]}
+    return 404, {"message": "not found"}
+
+
+def workload(client: XataClient) -> list:
+    records = list(client.data().query_iter("Posts", {"page": {"size": 3}}))
+    r = client.records().bulk_insert("Posts", {"records": records})
+    missing = client.records().get("Posts", "nope")
+    return [records, r["recordIDs"], missing.status_code]
+
+
+def record(path: str) -> list:
+    transport = RecordingTransport(path)
+    adapter = utils.MockAdapter(handler)
+    transport.session.mount("https://", adapter)
+    client = XataClient(api_key="api_key", workspace_id="ws_id", db_name="db", transport=transport)
+    result = workload(client)
+    transport.close()
+    return result
+
+
+def replay_client(path: str, speed: float = None) -> XataClient:
+    return XataClient(api_key="api_key", workspace_id="ws_id", db_name="db", transport=ReplayTransport(path, speed))
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_log_format(self):
+        path = os.path.join(self.dir.name, "traffic.jsonl")
+        record(path)
+        with open(path, "rb") as f:
+            lines = [orjson.loads(line) for line in f]
+        assert lines[0]["recording"] == 1
+        assert "sdk" in lines[0]
+        assert [e["route"] for e in lines[1:]] == [
+            "/db/{db_branch}/tables/{table}/query",
+            "/db/{db_branch}/tables/{table}/query",
+            "/db/{db_branch}/tables/{table}/query",
+            "/db/{db_branch}/tables/{table}/bulk",
+            "/db/{db_branch}/tables/{table}/data/{record_id}",
+        ]
+        assert lines[1]["path"] == "/db/db:main/tables/Posts/query"
+        assert orjson.loads(lines[1]["request"]) == {"page": {"size": 3}}
+        assert orjson.loads(lines[1]["response"])["records"] == PAGES[0]
+        assert lines[5]["status"] == 404
+        assert lines[5]["request"] is None
+        assert "total" in lines[1]["timings"]
+        assert all(b["at"] >= a["at"] for a, b in zip(lines[1:], lines[2:]))
+
+    def test_replay(self):
+        path = os.path.join(self.dir.name, "traffic.jsonl.gz")
+        recorded = record(path)
+        with gzip.open(path) as f:
+            assert len(f.readlines()) == 6
+
+        client = replay_client(path)
+        assert workload(client) == recorded
+        assert client.transport.recording.remaining() == 0
+        with pytest.raises(Exception) as e:
+            client.records().get("Posts", "nope")
+        assert "no recorded response left for GET" in str(e.value)
+
+    def test_replay_matches_bodies(self):
+        path = os.path.join(self.dir.name, "traffic.jsonl")
+        record(path)
+        client = replay_client(path)
+        # pages requested out of order get the response recorded for their cursor
+        r = client.data().query("Posts", {"page": {"after": "2", "size": 3}})
+        assert r["records"] == PAGES[2]
+        r = client.data().query("Posts", {"page": {"size": 3}})
+        assert r["records"] == PAGES[0]
+
+    def test_binary_bodies(self):
+        for body in [b"\x89PNG\xff", b"b64:text", b'{"id": "rec_1"}', None]:
+            assert _decode_body(_encode_body(body)) == body
+        assert _encode_body(b"\x89PNG\xff").startswith("b64:")
+        assert _encode_body(b'{"id": "rec_1"}') == '{"id": "rec_1"}'
+
+    def test_replay_timing(self):
+        path = os.path.join(self.dir.name, "traffic.jsonl")
+        with open(path, "wb") as f:
+            f.write(orjson.dumps({"recording": 1, "sdk": "1.0.0"}) + b"\n")
+            for _ in range(2):
+                entry = {
+                    "at": 0.0,
+                    "method": "GET",
+                    "route": "/db/{db_branch}/tables/{table}/data/{record_id}",
+                    "path": "/db/db:main/tables/Posts/data/rec_1",
+                    "request": None,
+                    "status": 200,
+                    "headers": {"content-type": "application/json"},
+                    "response": '{"id": "rec_1"}',
+                    "timings": {"total": 0.2},
+                }
+                f.write(orjson.dumps(entry) + b"\n")
+
+        client = replay_client(path, speed=4)
+        start = time.monotonic()
+        r = client.records().get("Posts", "rec_1")
+        assert time.monotonic() - start >= 0.05
+        assert r["id"] == "rec_1"
+        assert r.response.timings["total"] == 0.2
+
+        with pytest.raises(Exception):
+            ReplayTransport(path, speed=0)
+
+    def test_not_a_recording(self):
+        path = os.path.join(self.dir.name, "traffic.jsonl")
+        with open(path, "wb") as f:
+            f.write(b'{"hello": "world"}\n')
+        with pytest.raises(Exception) as e:
+            ReplayTransport(path)
+        assert "is not a recording" in str(e.value)
+
+    def test_async_record_and_replay(self):
+        path = os.path.join(self.dir.name, "traffic.jsonl")
+
+        def async_handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"id": request.url.path.split("/")[-1]})
+
+        async def run(transport):
+            async with AsyncXataClient(
+                api_key="api_key", workspace_id="ws_id", db_name="db", transport=transport
+            ) as client:
+                if isinstance(transport, AsyncRecordingTransport):
+                    client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(async_handler))
+                responses = await asyncio.gather(*[client.records().get("Posts", "rec_%d" % i) for i in range(5)])
+            await transport.close()
+            return responses
+
+        recorded = asyncio.run(run(AsyncRecordingTransport(path)))
+        replayed = asyncio.run(run(AsyncReplayTransport(path)))
+        assert [r["id"] for r in replayed] == [r["id"] for r in recorded] == ["rec_%d" % i for i in range(5)]
@@ -0,0 +1,138 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import threading
+import unittest
+
+import httpx
+import orjson
+import pytest
+import utils
+
+from xata.async_client import AsyncXataClient
+
+
+def transaction_handler(method, url, body):
+    results = []
+    for op in body["operations"]:
+        kind, params = next(iter(op.items()))
+        results.append({"operation": kind, "id": params["id"], "rows": 1})
+    return 200, {"results": results}
+
+
+class TestRecordsBulk(unittest.TestCase):
+    def test_bulk_update_chunks_and_keeps_order(self):
+        lock = threading.Lock()
+        sizes = []
+
+        def handler(method, url, body):
+            assert url.endswith("/db/db:main/transaction")
+            with lock:
+                sizes.append(len(body["operations"]))
+            return transaction_handler(method, url, body)
+
+        client, adapter = utils.get_mock_client(handler)
+        records = [{"id": "r%d" % i, "fields": {"n": i}} for i in range(2300)]
+        results = client.records().bulk_update("Posts", records, max_concurrency=2)
+
+        assert sorted(sizes) == [300, 1000, 1000]
+        assert [r["id"] for r in results] == ["r%d" % i for i in range(2300)]
+        assert all(r["success"] for r in results)
+        assert results[5]["result"] == {"operation": "update", "id": "r5", "rows": 1}
+        first = orjson.loads(adapter.requests[0][0].body)["operations"][0]
+        assert first["update"]["table"] == "Posts"
+        assert first["update"]["upsert"] is False
+
+    def test_bulk_upsert_and_delete_operations(self):
+        client, adapter = utils.get_mock_client(transaction_handler)
+        results = client.records().bulk_upsert("Posts", [{"id": "a", "fields": {"n": 1}}])
+        assert results == [{"id": "a", "success": True, "result": {"operation": "update", "id": "a", "rows": 1}}]
+        assert orjson.loads(adapter.requests[0][0].body)["operations"][0]["update"]["upsert"] is True
+
+        results = client.records().bulk_delete("Posts", ["a", "b"])
+        assert [r["result"]["operation"] for r in results] == ["delete", "delete"]
+        assert orjson.loads(adapter.requests[1][0].body) == {
+            "operations": [{"delete": {"table": "Posts", "id": "a"}}, {"delete": {"table": "Posts", "id": "b"}}]
+        }
+        assert client.records().bulk_delete("Posts", []) == []
+
+    def test_bulk_update_requires_ids(self):
+        client, adapter = utils.get_mock_client(transaction_handler)
+        with pytest.raises(Exception) as e:
+            client.records().bulk_update("Posts", [{"id": "a", "fields": {}}, {"fields": {}}])
+        assert str(e.value) == "record at index 1 has no id"
+        assert adapter.requests == []
+
+    def test_rejected_records_are_reported_and_others_resubmitted(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append([op["update"]["id"] for op in body["operations"]])
+            if len(calls) == 1:
+                return 400, {"errors": [{"index": 1, "message": "column [x] not found"}]}
+            return transaction_handler(method, url, body)
+
+        client, adapter = utils.get_mock_client(handler)
+        results = client.records().bulk_update("Posts", [{"id": i, "fields": {}} for i in "abc"])
+
+        assert calls == [["a", "b", "c"], ["a", "c"]]
+        assert [r["success"] for r in results] == [True, False, True]
+        assert results[1] == {"id": "b", "success": False, "error": "column [x] not found"}
+
+    def test_retries_and_gives_up(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append(1)
+            if len(calls) == 1:
+                return 429, {"message": "slow down"}, {"Retry-After": "0"}
+            return 503, {"message": "unavailable"}
+
+        client, adapter = utils.get_mock_client(handler)
+        results = client.records().bulk_delete("Posts", ["a", "b"], max_retries=2)
+        assert len(calls) == 3
+        assert [r["success"] for r in results] == [False, False]
+        assert "unavailable" in results[0]["error"]
+
+    def test_failed_transaction_without_record_errors(self):
+        client, adapter = utils.get_mock_client(lambda m, u, b: (404, {"message": "table not found"}))
+        results = client.records().bulk_delete("Posts", ["a"])
+        assert results == [{"id": "a", "success": False, "error": "table not found"}]
+        assert len(adapter.requests) == 1
+
+    def test_async_bulk_update(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = orjson.loads(request.content)
+            calls.append(len(body["operations"]))
+            status, content = transaction_handler("POST", str(request.url), body)
+            return httpx.Response(status, json=content)
+
+        async def run():
+            client = AsyncXataClient(api_key="api_key", workspace_id="ws_id", db_name="db", branch_name="main")
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                return await client.records().bulk_update("Posts", [{"id": str(i), "fields": {}} for i in range(1500)])
+
+        results = asyncio.run(run())
+        assert sorted(calls) == [500, 1000]
+        assert [r["id"] for r in results] == [str(i) for i in range(1500)]
+        assert all(r["success"] for r in results)
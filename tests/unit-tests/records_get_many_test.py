@@ -0,0 +1,83 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import unittest
+
+import httpx
+import orjson
+import pytest
+import utils
+
+from xata.async_client import AsyncXataClient
+
+
+def query_handler(missing: set = frozenset()):
+    def handler(method, url, body):
+        assert url.endswith("/tables/Posts/query")
+        ids = body["filter"]["id"]["$any"]
+        assert body["page"]["size"] == len(ids)
+        records = [{"id": i, "title": "t%s" % i} for i in reversed(ids) if i not in missing]
+        return 200, {"records": records, "meta": {"page": {"more": False}}}
+
+    return handler
+
+
+class TestRecordsGetMany(unittest.TestCase):
+    def test_get_many_keeps_order_and_marks_misses(self):
+        client, adapter = utils.get_mock_client(query_handler({"b"}))
+        records = client.records().get_many("Posts", ["c", "b", "a", "c"])
+
+        assert records == [{"id": "c", "title": "tc"}, None, {"id": "a", "title": "ta"}, {"id": "c", "title": "tc"}]
+        assert len(adapter.requests) == 1
+        assert orjson.loads(adapter.requests[0][0].body)["filter"] == {"id": {"$any": ["c", "b", "a"]}}
+        assert client.records().get_many("Posts", []) == []
+
+    def test_get_many_chunks_ids(self):
+        client, adapter = utils.get_mock_client(query_handler())
+        ids = [str(i) for i in range(450)]
+        records = client.records().get_many("Posts", ids, columns=["title"])
+
+        assert [r["id"] for r in records] == ids
+        bodies = [orjson.loads(r.body) for r, _ in adapter.requests]
+        assert sorted(len(b["filter"]["id"]["$any"]) for b in bodies) == [50, 200, 200]
+        assert all(b["columns"] == ["id", "title"] for b in bodies)
+
+    def test_get_many_raises_on_error(self):
+        client, adapter = utils.get_mock_client(lambda m, u, b: (400, {"message": "invalid filter"}))
+        with pytest.raises(Exception) as e:
+            client.records().get_many("Posts", ["a"])
+        assert str(e.value) == "unable to get records of table 'Posts', with error: 400 - invalid filter"
+
+    def test_async_get_many(self):
+        sync_handler = query_handler({"x"})
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status, content = sync_handler("POST", str(request.url), orjson.loads(request.content))
+            return httpx.Response(status, json=content)
+
+        async def run():
+            client = AsyncXataClient(api_key="api_key", workspace_id="ws_id", db_name="db", branch_name="main")
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                return await client.records().get_many("Posts", ["x"] + [str(i) for i in range(300)])
+
+        records = asyncio.run(run())
+        assert records[0] is None
+        assert [r["id"] for r in records[1:]] == [str(i) for i in range(300)]
@@ -0,0 +1,311 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import time
+import unittest
+
+import httpx
+import pytest
+import utils
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from xata.async_client import AsyncXataClient
+from xata.errors import CircuitOpenError, RateLimitError, XataServerError
+from xata.helpers import Transaction
+from xata.retry import RetryPolicy
+
+QUERY_PATH = "/db/db:main/tables/Posts/query"
+
+
+def policy(**kwargs) -> RetryPolicy:
+    kwargs.setdefault("backoff", 0.001)
+    kwargs.setdefault("max_backoff", 0.01)
+    return RetryPolicy(**kwargs)
+
+
+def flaky(*statuses):
+    """
+    Handler answering with the given status codes, then 200
+    """
+    calls = []
+
+    def handler(method, url, body):
+        calls.append((method, url))
+        status = statuses[len(calls) - 1] if len(calls) <= len(statuses) else 200
+        return status, {"message": "status %d" % status} if status >= 400 else {"id": "rec_1", "records": []}
+
+    return handler, calls
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_rules(self):
+        p = RetryPolicy(overrides={"POST /db/*/sql": {"safe": True, "max_retries": 1}, "GET /user": {"max_retries": 0}})
+        assert p.rule("GET", "/db/db:main/tables/Posts/data/rec_1")["safe"]
+        assert p.rule("PUT", "/db/db:main/tables/Posts/data/rec_1")["safe"]
+        assert p.rule("POST", QUERY_PATH)["safe"]
+        assert p.rule("post", "/db/db:main/search")["safe"]
+        assert not p.rule("POST", "/db/db:main/tables/Posts/data")["safe"]
+        assert not p.rule("PATCH", "/db/db:main/tables/Posts/data/rec_1")["safe"]
+        assert not p.rule("POST", "/db/db:main/transaction")["safe"]
+
+        sql = p.rule("POST", "/db/db:main/sql")
+        assert sql["safe"] and sql["max_retries"] == 1
+        assert p.rule("GET", "/user")["max_retries"] == 0
+        assert p.rule("GET", "/user/keys")["max_retries"] == 3
+
+    def test_invalid_settings(self):
+        with pytest.raises(Exception):
+            RetryPolicy(max_retries=-1)
+        with pytest.raises(Exception):
+            RetryPolicy(backoff=0)
+        with pytest.raises(Exception):
+            RetryPolicy(budget_ratio=2)
+        with pytest.raises(Exception):
+            RetryPolicy(overrides={"GET /user": {"retries": 1}})
+
+    def test_retry_delay(self):
+        p = RetryPolicy(backoff=1, max_backoff=3, jitter=False)
+        assert p.retry_delay("GET", "/user", 0, 503) == 1
+        assert p.retry_delay("GET", "/user", 1, 503) == 2
+        assert p.retry_delay("GET", "/user", 2, None) == 3
+        assert p.retry_delay("GET", "/user", 3, 503) is None
+        assert p.retry_delay("GET", "/user", 0, 400) is None
+        # not idempotent, except for rate limits
+        assert p.retry_delay("POST", "/db/db:main/transaction", 0, 503) is None
+        assert p.retry_delay("POST", "/db/db:main/transaction", 0, None) is None
+        assert p.retry_delay("POST", "/db/db:main/transaction", 0, 429) == 1
+        assert p.retry_delay("POST", "/db/db:main/transaction", 0, 429, retry_after=7) == 7
+
+        jittered = RetryPolicy(backoff=1, max_backoff=3)
+        for attempt in range(3):
+            assert 0 <= jittered.retry_delay("GET", "/user", attempt, 503) <= 2**attempt
+
+    def test_budget(self):
+        p = RetryPolicy(budget_ratio=0.5, budget_min_retries=2, jitter=False)
+        for _ in range(4):
+            p.acquire("https://ws.us-east-1.xata.sh/db/db:main")
+        assert p.retry_delay("GET", "/user", 0, 503) is not None
+        assert p.retry_delay("GET", "/user", 0, 503) is not None
+        assert p.retry_delay("GET", "/user", 0, 503) is None
+        assert p.get_stats()["budget_exceeded"] == 1
+
+    def test_circuit_breaker(self):
+        url = "https://ws.us-east-1.xata.sh/db/db:main"
+        p = RetryPolicy(breaker_threshold=2, breaker_reset_timeout=60)
+        for _ in range(2):
+            p.acquire(url)
+            p.record(url, False)
+        with pytest.raises(CircuitOpenError) as e:
+            p.acquire(url)
+        assert isinstance(e.value, XataServerError)
+        assert 0 < e.value.retry_in <= 60
+        # other hosts are not affected
+        p.acquire("https://api.xata.io/workspaces")
+        assert p.get_stats()["circuits"][urlhost(url)] == "open"
+
+        breaker = p.breakers[urlhost(url)]
+        breaker.opened_at -= 60
+        p.acquire(url)  # the probe
+        with pytest.raises(CircuitOpenError):
+            p.acquire(url)
+        p.record(url, False)
+        assert p.get_stats()["circuits"][urlhost(url)] == "open"
+
+        # an abandoned probe lets the next request probe
+        breaker.opened_at -= 60
+        p.acquire(url)
+        p.release(url)
+        p.acquire(url)
+        p.record(url, False)
+        assert p.get_stats()["circuits"][urlhost(url)] == "open"
+
+        breaker.opened_at -= 60
+        p.acquire(url)
+        p.record(url, True)
+        assert p.get_stats()["circuits"][urlhost(url)] == "closed"
+        p.acquire(url)
+
+
+def urlhost(url: str) -> str:
+    return url.split("/")[2]
+
+
+class TestRetryPolicyRequests(unittest.TestCase):
+    def test_no_policy(self):
+        handler, calls = flaky(503)
+        client, _ = utils.get_mock_client(handler)
+        with pytest.raises(XataServerError):
+            client.records().get("Posts", "rec_1")
+        assert len(calls) == 1
+
+    def test_retry_get(self):
+        handler, calls = flaky(503, 502)
+        client, _ = utils.get_mock_client(handler, retry_policy=policy())
+        r = client.records().get("Posts", "rec_1")
+        assert r.is_success()
+        assert r.retries == 2
+        assert len(calls) == 3
+
+    def test_retries_exhausted(self):
+        handler, calls = flaky(503, 503, 503)
+        client, _ = utils.get_mock_client(handler, retry_policy=policy(max_retries=2))
+        with pytest.raises(XataServerError):
+            client.records().get("Posts", "rec_1")
+        assert len(calls) == 3
+
+    def test_post_only_if_safe(self):
+        handler, calls = flaky(503, 503)
+        client, _ = utils.get_mock_client(handler, retry_policy=policy())
+        with pytest.raises(XataServerError):
+            client.records().insert("Posts", {"title": "a"})
+        assert len(calls) == 1
+        assert client.data().query("Posts", {}).is_success()
+        assert len(calls) == 3
+
+    def test_rate_limited_post(self):
+        handler, calls = flaky(429)
+        client, _ = utils.get_mock_client(handler, retry_policy=policy())
+        assert client.records().insert("Posts", {"title": "a"}).is_success()
+        assert len(calls) == 2
+
+    def test_connection_error(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append(url)
+            if len(calls) == 1:
+                raise RequestsConnectionError("connection reset")
+            return 200, {"id": "rec_1"}
+
+        client, _ = utils.get_mock_client(handler, retry_policy=policy())
+        assert client.records().get("Posts", "rec_1").is_success()
+        assert len(calls) == 2
+
+    def test_circuit_opens(self):
+        handler, calls = flaky(*[503] * 10)
+        client, _ = utils.get_mock_client(handler, retry_policy=policy(max_retries=1, breaker_threshold=3))
+        with pytest.raises(XataServerError):
+            client.records().get("Posts", "rec_1")
+        with pytest.raises(CircuitOpenError):
+            client.records().get("Posts", "rec_1")
+        assert len(calls) == 3
+        # the control plane is another host
+        with pytest.raises(XataServerError) as e:
+            client.users().get()
+        assert not isinstance(e.value, CircuitOpenError)
+        assert len(calls) == 5
+
+    def test_interrupted_probe(self):
+        calls = []
+
+        def handler(method, url, body):
+            calls.append(url)
+            if len(calls) == 1:
+                return 503, {"message": "unavailable"}
+            if len(calls) == 2:
+                raise KeyboardInterrupt()
+            return 200, {"id": "rec_1"}
+
+        client, _ = utils.get_mock_client(
+            handler, retry_policy=policy(max_retries=0, breaker_threshold=1, breaker_reset_timeout=0.05)
+        )
+        with pytest.raises(XataServerError):
+            client.records().get("Posts", "rec_1")
+        time.sleep(0.06)
+        with pytest.raises(KeyboardInterrupt):
+            client.records().get("Posts", "rec_1")
+        assert client.records().get("Posts", "rec_1").is_success()
+        assert len(calls) == 3
+
+    def test_transaction_uses_policy(self):
+        handler, calls = flaky(429, 429)
+        client, _ = utils.get_mock_client(handler, retry_policy=policy())
+        trx = Transaction(client)
+        trx.insert("Posts", {"title": "a"})
+        summary = trx.run()
+        assert summary["attempts"] == 3
+        assert len(calls) == 3
+
+    def test_async(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if len(calls) == 1:
+                raise httpx.ConnectError("refused")
+            if len(calls) == 2:
+                return httpx.Response(429, json={"message": "slow down"}, headers={"retry-after": "0"})
+            return httpx.Response(200, json={"records": []})
+
+        async def run():
+            client = AsyncXataClient(api_key="api_key", workspace_id="ws_id", db_name="db", retry_policy=policy())
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                return await client.data().query("Posts", {})
+
+        r = asyncio.run(run())
+        assert r.is_success()
+        assert r.retries == 2
+        assert len(calls) == 3
+
+    def test_async_not_retried(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(429, json={"message": "slow down"})
+
+        async def run():
+            client = AsyncXataClient(
+                api_key="api_key", workspace_id="ws_id", db_name="db", retry_policy=policy(max_retries=0)
+            )
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                return await client.data().query("Posts", {})
+
+        with pytest.raises(RateLimitError):
+            asyncio.run(run())
+
+    def test_async_cancelled_probe(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(503, json={"message": "unavailable"})
+            if len(calls) == 2:
+                await asyncio.sleep(1)
+            return httpx.Response(200, json={"records": []})
+
+        async def run():
+            client = AsyncXataClient(
+                api_key="api_key",
+                workspace_id="ws_id",
+                db_name="db",
+                retry_policy=policy(max_retries=0, breaker_threshold=1, breaker_reset_timeout=0.05),
+            )
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                with pytest.raises(XataServerError):
+                    await client.data().query("Posts", {})
+                await asyncio.sleep(0.06)
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.data().query("Posts", {}), 0.05)
+                return await client.data().query("Posts", {})
+
+        assert asyncio.run(run()).is_success()
+        assert len(calls) == 3
@@ -0,0 +1,100 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import threading
+import unittest
+
+import orjson
+import pytest
+import utils
+
+
+def paginated(records: list, page_size: int, fetched: list = None):
+    """
+    Handler that serves the records in pages, the cursor is the offset
+    """
+
+    def handler(method, url, body):
+        offset = int(body.get("page", {}).get("after") or 0)
+        if fetched is not None:
+            fetched.append(offset)
+        page = records[offset : offset + page_size]
+        more = offset + page_size < len(records)
+        return 200, {"records": page, "meta": {"page": {"cursor": str(offset + page_size), "more": more}}}
+
+    return handler
+
+
+class TestSearchAndFilterQueryIter(unittest.TestCase):
+    def test_iterate_all_pages(self):
+        records = [{"id": f"rec_{i}"} for i in range(23)]
+        client, adapter = utils.get_mock_client(paginated(records, 5))
+        query = {
+            "columns": ["id"],
+            "filter": {"id": {"$startsWith": "rec"}},
+            "sort": {"id": "asc"},
+            "page": {"size": 5},
+        }
+
+        assert list(client.data().query_iter("Posts", query)) == records
+        assert len(adapter.requests) == 5
+
+        first = orjson.loads(adapter.requests[0][0].body)
+        assert first == query
+        for request, _ in adapter.requests[1:]:
+            follow_up = orjson.loads(request.body)
+            assert "sort" not in follow_up
+            assert "filter" not in follow_up
+            assert follow_up["columns"] == ["id"]
+            assert follow_up["page"]["size"] == 5
+            assert follow_up["page"]["after"] is not None
+
+    def test_without_prefetch(self):
+        records = [{"id": f"rec_{i}"} for i in range(7)]
+        client, adapter = utils.get_mock_client(paginated(records, 3))
+        assert list(client.data().query_iter("Posts", prefetch=False)) == records
+        assert len(adapter.requests) == 3
+
+    def test_empty_table(self):
+        client, adapter = utils.get_mock_client(paginated([], 5))
+        assert list(client.data().query_iter("Posts")) == []
+        assert len(adapter.requests) == 1
+
+    def test_next_page_is_prefetched(self):
+        records = [{"id": f"rec_{i}"} for i in range(10)]
+        next_page_requested = threading.Event()
+        handler = paginated(records, 5)
+
+        def signalling_handler(method, url, body):
+            if body.get("page", {}).get("after"):
+                next_page_requested.set()
+            return handler(method, url, body)
+
+        client, _ = utils.get_mock_client(signalling_handler)
+        it = client.data().query_iter("Posts", {"page": {"size": 5}})
+        assert next(it) == records[0]
+        # the caller is still on page one, page two is already on the way
+        assert next_page_requested.wait(5)
+        assert list(it) == records[1:]
+
+    def test_failed_page_raises(self):
+        client, _ = utils.get_mock_client(lambda method, url, body: (400, {"message": "invalid filter"}))
+        with pytest.raises(Exception) as e:
+            list(client.data().query_iter("Posts", {"filter": {"nope": 1}}))
+        assert "invalid filter" in str(e.value)
@@ -0,0 +1,163 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import unittest
+
+import httpx
+import orjson
+import pytest
+from requests import Response
+from requests.adapters import BaseAdapter
+
+from xata.async_client import AsyncXataClient
+from xata.client import XataClient
+from xata.sse import SSEDecoder
+from xata.transport import Transport
+
+
+class ChunkedRaw(object):
+    """
+    Response body handing out the chunks one by one, as if they arrive over the network
+    """
+
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    def stream(self, amt=None, decode_content=None):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+    def release_conn(self):
+        self.closed = True
+
+
+class StreamingAdapter(BaseAdapter):
+    def __init__(self, status_code: int, raw: ChunkedRaw):
+        super().__init__()
+        self.status_code = status_code
+        self.raw = raw
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append((request, kwargs))
+        resp = Response()
+        resp.status_code = self.status_code
+        resp.raw = self.raw
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+
+def mock_client(adapter) -> XataClient:
+    transport = Transport()
+    transport.session.mount("https://", adapter)
+    return XataClient(api_key="api_key", workspace_id="ws_id", db_name="db", branch_name="main", transport=transport)
+
+
+class TestSSE(unittest.TestCase):
+    def test_decoder(self):
+        decoder = SSEDecoder()
+        stream = ': keep alive\r\ndata: {"text": "Hällo"}\r\n\r\nevent: done\nid: 7\ndata: line 1\ndata:line 2\n\n'
+        events = []
+        for i in range(len(stream.encode())):
+            # one byte at a time, splits lines and multi byte characters
+            events += list(decoder.feed(stream.encode()[i : i + 1]))
+        assert events == [
+            {"event": "message", "data": '{"text": "Hällo"}', "id": None},
+            {"event": "done", "data": "line 1\nline 2", "id": "7"},
+        ]
+        assert decoder.buffer == b""
+
+    def test_decoder_many_events_in_one_chunk(self):
+        decoder = SSEDecoder()
+        chunk = b"".join(b"data: %d\n\n" % i for i in range(1000)) + b"data: tail"
+        events = decoder.feed(chunk)
+        assert [next(events)["data"] for _ in range(3)] == ["0", "1", "2"]
+        # the lines not read yet stay in the buffer
+        events.close()
+        assert decoder.buffer == chunk[len(b"data: 0\n\ndata: 1\n\ndata: 2\n\n") :]
+        assert [e["data"] for e in decoder.feed(b"")] == [str(i) for i in range(3, 1000)]
+        assert decoder.buffer == b"data: tail"
+
+    def test_decoder_flushes_on_close(self):
+        decoder = SSEDecoder()
+        assert list(decoder.feed(b"event: ignored\n\ndata: tail")) == []
+        assert list(decoder.close()) == [{"event": "message", "data": "tail", "id": None}]
+
+    def test_ask_stream_yields_events_as_they_arrive(self):
+        raw = ChunkedRaw(
+            [b'data: {"text": "Hel', b'lo"}\n\ndata: {"text": " world"}\n\n', b'data: {"sessionId": "s1"}\n\n']
+        )
+        adapter = StreamingAdapter(200, raw)
+        client = mock_client(adapter)
+
+        stream = client.data().ask_stream("Posts", "what?", rules=["be brief"], options={"searchType": "keyword"})
+        assert adapter.requests == []
+        assert next(stream) == {"text": "Hello"}
+        assert raw.sent == 2
+        assert list(stream) == [{"text": " world"}, {"sessionId": "s1"}]
+        assert raw.closed
+
+        request, kwargs = adapter.requests[0]
+        assert request.url == "https://ws_id.us-east-1.xata.sh/db/db:main/tables/Posts/ask"
+        assert request.headers["accept"] == "text/event-stream"
+        assert kwargs["stream"]
+        assert orjson.loads(request.body) == {"searchType": "keyword", "question": "what?", "rules": ["be brief"]}
+
+    def test_ask_follow_up_stream(self):
+        adapter = StreamingAdapter(200, ChunkedRaw([b"data: plain text\n\n"]))
+        client = mock_client(adapter)
+        assert list(client.data().ask_follow_up_stream("Posts", "s1", "and?")) == ["plain text"]
+        request, _ = adapter.requests[0]
+        assert request.url.endswith("/tables/Posts/ask/s1")
+        assert orjson.loads(request.body) == {"message": "and?"}
+
+    def test_ask_stream_error(self):
+        raw = ChunkedRaw([b'{"message": "table not found"}'])
+        client = mock_client(StreamingAdapter(404, raw))
+        with pytest.raises(Exception) as e:
+            list(client.data().ask_stream("Posts", "what?"))
+        assert str(e.value) == "unable to ask table 'Posts', with error: 404 - table not found"
+        assert raw.closed
+
+    def test_async_ask_stream(self):
+        async def body():
+            yield b'data: {"text": "a"}\n'
+            yield b'\ndata: {"text": "b"}\n\n'
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.headers["accept"] == "text/event-stream"
+            return httpx.Response(200, content=body())
+
+        async def run():
+            client = AsyncXataClient(api_key="api_key", workspace_id="ws_id", db_name="db", branch_name="main")
+            client.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                return [e async for e in client.data().ask_stream("Posts", "what?")]
+
+        assert asyncio.run(run()) == [{"text": "a"}, {"text": "b"}]
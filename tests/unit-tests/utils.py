@@ -19,5 +19,49 @@
 
 import re
 
+import orjson
+from requests import Response
+from requests.adapters import BaseAdapter
+
+from xata.client import XataClient
+from xata.transport import Transport
+
 PATTERNS_UUID4 = re.compile(r"^[\da-f]{8}-([\da-f]{4}-){3}[\da-f]{12}$", re.IGNORECASE)
 PATTERNS_SDK_VERSION = re.compile(r"^[0-9]{1,3}.[0-9]{1,3}.[0-9]{1,3}(.?[ab][0-9]{1,3})*$")
+
+
+class MockAdapter(BaseAdapter):
+    """
+    Transport adapter that answers requests with a handler instead of the network.
+    The handler receives the method, url and decoded JSON body of a request and
+    returns a tuple of status code and JSON body, optionally followed by headers.
+    """
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append((request, kwargs))
+        body = orjson.loads(request.body) if request.body else None
+        status_code, content, *headers = self.handler(request.method, request.url, body)
+        resp = Response()
+        resp.status_code = status_code
+        if headers:
+            resp.headers.update(headers[0])
+        resp._content = orjson.dumps(content) if content is not None else b""
+        resp.request = request
+        resp.url = request.url
+        return resp
+
+    def close(self):
+        pass
+
+
+def get_mock_client(handler, **kwargs) -> (XataClient, MockAdapter):
+    transport = Transport()
+    adapter = MockAdapter(handler)
+    transport.session.mount("https://", adapter)
+    client = XataClient(api_key="api_key", workspace_id="ws_id", db_name="db", transport=transport, **kwargs)
+    return client, adapter
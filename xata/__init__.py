@@ -17,6 +17,25 @@
 # under the License.
 #
 
+from importlib import import_module
+
 from .client import XataClient
 
-__all__ = ("XataClient", "BulkProcessor", "to_rfc3339", "Transaction")
+__all__ = ("XataClient", "AsyncXataClient", "BulkProcessor", "to_rfc3339", "Transaction")
+
+# imported on first access, to keep `import xata` fast
+LAZY_EXPORTS = {
+    "AsyncXataClient": ("xata.async_client", "AsyncXataClient"),
+    "BulkProcessor": ("xata.helpers", "BulkProcessor"),
+    "to_rfc3339": ("xata.helpers", "to_rfc339"),
+    "Transaction": ("xata.helpers", "Transaction"),
+}
+
+
+def __getattr__(name: str):
+    if name in LAZY_EXPORTS:
+        module, attr = LAZY_EXPORTS[name]
+        value = getattr(import_module(module), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError("module 'xata' has no attribute '%s'" % name)
@@ -23,8 +23,6 @@
 # Specification: workspace:v1.0
 # ------------------------------------------------------- #
 
-from requests import request
-
 from xata.api_request import ApiRequest
 from xata.api_response import ApiResponse
 from xata.errors import XataServerError
@@ -304,7 +302,7 @@ class Files(ApiRequest):
         """
         endpoint = self.transform_url(url, operations)
 
-        resp = request("GET", endpoint)
+        resp = self.client.transport.request("GET", endpoint)
         if resp.status_code != 200:
             raise XataServerError(f"code: {resp.status_code}, server error: {resp.text}")
         return resp.content
@@ -23,8 +23,23 @@
 # Specification: workspace:v1.0
 # ------------------------------------------------------- #
 
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import Timeout as RequestsTimeout
+
 from xata.api_request import ApiRequest
 from xata.api_response import ApiResponse
+from xata.errors import RateLimitError, XataServerError
+
+BULK_MAX_OPERATIONS = 1000
+BULK_DEFAULT_CONCURRENCY = 4
+BULK_DEFAULT_MAX_RETRIES = 3
+BULK_RETRY_BACKOFF = 0.1
+BULK_MAX_RETRY_BACKOFF = 10.0
+GET_MANY_CHUNK_SIZE = 200
 
 
 class Records(ApiRequest):
@@ -334,3 +349,247 @@ class Records(ApiRequest):
             url_path += "?columns=%s" % ",".join(columns)
         headers = {"content-type": "application/json"}
         return self.request("POST", url_path, headers, payload)
+
+    def bulk_update(
+        self,
+        table_name: str,
+        records: list[dict],
+        db_name: str = None,
+        branch_name: str = None,
+        upsert: bool = False,
+        max_concurrency: int = BULK_DEFAULT_CONCURRENCY,
+        max_retries: int = BULK_DEFAULT_MAX_RETRIES,
+    ) -> list[dict]:
+        """
+        Update many records by id. The updates are sent as transactions of up to 1000
+        operations, in parallel. Rate limits, server and connection errors are retried
+        with backoff. If a transaction is rejected because of single records, the other
+        records are sent again without them.
+
+        :param table_name: str The Table name
+        :param records: list[dict] Updates as `{"id": str, "fields": dict}`
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+        :param upsert: bool = False Insert the record if no record exists with the id
+        :param max_concurrency: int = 4 How many transactions are sent in parallel
+        :param max_retries: int = 3 How often a transaction is retried
+
+        :returns list[dict] Result per record in input order, `{"id", "success", "result"}` or
+            `{"id", "success", "error"}`
+
+        :raises Exception if a record has no id
+        """
+        for i, r in enumerate(records):
+            if "id" not in r:
+                raise Exception("record at index %d has no id" % i)
+        operations = [
+            {"update": {"table": table_name, "id": r["id"], "fields": r.get("fields", {}), "upsert": upsert}}
+            for r in records
+        ]
+        ids = [r["id"] for r in records]
+        return self._bulk_operations(operations, ids, db_name, branch_name, max_concurrency, max_retries)
+
+    def bulk_upsert(
+        self,
+        table_name: str,
+        records: list[dict],
+        db_name: str = None,
+        branch_name: str = None,
+        max_concurrency: int = BULK_DEFAULT_CONCURRENCY,
+        max_retries: int = BULK_DEFAULT_MAX_RETRIES,
+    ) -> list[dict]:
+        """
+        Update or insert many records by id, see `bulk_update()`
+
+        :param table_name: str The Table name
+        :param records: list[dict] Records as `{"id": str, "fields": dict}`
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+        :param max_concurrency: int = 4 How many transactions are sent in parallel
+        :param max_retries: int = 3 How often a transaction is retried
+
+        :returns list[dict] Result per record in input order
+
+        :raises Exception if a record has no id
+        """
+        return self.bulk_update(table_name, records, db_name, branch_name, True, max_concurrency, max_retries)
+
+    def bulk_delete(
+        self,
+        table_name: str,
+        ids: list[str],
+        db_name: str = None,
+        branch_name: str = None,
+        max_concurrency: int = BULK_DEFAULT_CONCURRENCY,
+        max_retries: int = BULK_DEFAULT_MAX_RETRIES,
+    ) -> list[dict]:
+        """
+        Delete many records by id, see `bulk_update()`. Missing records do not fail the delete.
+
+        :param table_name: str The Table name
+        :param ids: list[str] Record ids
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+        :param max_concurrency: int = 4 How many transactions are sent in parallel
+        :param max_retries: int = 3 How often a transaction is retried
+
+        :returns list[dict] Result per record in input order
+        """
+        operations = [{"delete": {"table": table_name, "id": record_id}} for record_id in ids]
+        return self._bulk_operations(operations, list(ids), db_name, branch_name, max_concurrency, max_retries)
+
+    def get_many(
+        self,
+        table_name: str,
+        ids: list[str],
+        db_name: str = None,
+        branch_name: str = None,
+        columns: list = None,
+        max_concurrency: int = BULK_DEFAULT_CONCURRENCY,
+    ) -> list:
+        """
+        Retrieve many records by id, with one query per 200 ids instead of one request
+        per record. The queries run in parallel.
+
+        :param table_name: str The Table name
+        :param ids: list[str] Record ids, duplicates are only fetched once
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+        :param columns: list = None Column filters
+        :param max_concurrency: int = 4 How many queries are sent in parallel
+
+        :returns list The records in the order of the ids, None for ids without record
+
+        :raises Exception if a query fails
+        """
+        chunks = self._get_many_chunks(ids)
+        found = {}
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(max(max_concurrency, 1), len(chunks))) as executor:
+                futures = [
+                    executor.submit(
+                        self.client.data().query,
+                        table_name,
+                        self._get_many_payload(chunk, columns),
+                        db_name,
+                        branch_name,
+                    )
+                    for chunk in chunks
+                ]
+                for f in futures:
+                    self._get_many_collect(table_name, f.result(), found)
+        return [found.get(record_id) for record_id in ids]
+
+    @staticmethod
+    def _get_many_chunks(ids: list[str]) -> list[list[str]]:
+        unique = list(dict.fromkeys(ids))
+        return [unique[i : i + GET_MANY_CHUNK_SIZE] for i in range(0, len(unique), GET_MANY_CHUNK_SIZE)]
+
+    @staticmethod
+    def _get_many_payload(ids: list[str], columns: list = None) -> dict:
+        payload = {"filter": {"id": {"$any": ids}}, "page": {"size": len(ids)}}
+        if columns is not None:
+            payload["columns"] = columns if "id" in columns else ["id"] + list(columns)
+        return payload
+
+    @staticmethod
+    def _get_many_collect(table_name: str, page: ApiResponse, found: dict):
+        if not page.is_success():
+            raise Exception(
+                "unable to get records of table '%s', with error: %d - %s"
+                % (table_name, page.status_code, page.error_message)
+            )
+        for record in page.get("records", []):
+            found[record["id"]] = record
+
+    def _bulk_operations(
+        self,
+        operations: list[dict],
+        ids: list[str],
+        db_name: str,
+        branch_name: str,
+        max_concurrency: int,
+        max_retries: int,
+    ) -> list[dict]:
+        results = [None] * len(operations)
+        chunks = self._bulk_chunks(len(operations))
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(max(max_concurrency, 1), len(chunks))) as executor:
+                futures = [
+                    executor.submit(
+                        self._bulk_chunk, operations, ids, chunk, results, db_name, branch_name, max_retries
+                    )
+                    for chunk in chunks
+                ]
+                for f in futures:
+                    f.result()
+        return results
+
+    def _bulk_chunk(
+        self,
+        operations: list[dict],
+        ids: list[str],
+        pending: list[int],
+        results: list,
+        db_name: str,
+        branch_name: str,
+        max_retries: int,
+    ):
+        attempt = 0
+        while pending:
+            try:
+                r = self.transaction({"operations": [operations[i] for i in pending]}, db_name, branch_name)
+            except self._bulk_retryable_errors() as exc:
+                if attempt >= max_retries:
+                    self._bulk_fail(ids, pending, results, str(exc))
+                    return
+                time.sleep(self._bulk_backoff(attempt, exc))
+                attempt += 1
+                continue
+            pending = self._bulk_apply(ids, pending, results, r)
+
+    @staticmethod
+    def _bulk_chunks(n: int) -> list[list[int]]:
+        return [list(range(i, min(i + BULK_MAX_OPERATIONS, n))) for i in range(0, n, BULK_MAX_OPERATIONS)]
+
+    @staticmethod
+    def _bulk_retryable_errors() -> tuple:
+        return (RateLimitError, XataServerError, RequestsConnectionError, RequestsTimeout)
+
+    @staticmethod
+    def _bulk_backoff(attempt: int, exc: Exception) -> float:
+        """
+        Honour the Retry-After of rate limits, otherwise exponential backoff with jitter
+        """
+        if isinstance(exc, RateLimitError) and exc.retry_after is not None:
+            return exc.retry_after
+        delay = min(BULK_RETRY_BACKOFF * (2**attempt), BULK_MAX_RETRY_BACKOFF)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _bulk_fail(ids: list[str], pending: list[int], results: list, error: str):
+        for i in pending:
+            results[i] = {"id": ids[i], "success": False, "error": error}
+
+    @staticmethod
+    def _bulk_apply(ids: list[str], pending: list[int], results: list, r: ApiResponse) -> list[int]:
+        """
+        Record the results of a transaction
+
+        :returns list[int] Operations to send again, without the rejected ones
+        """
+        if r.is_success():
+            for i, result in zip(pending, r.get("results", [])):
+                results[i] = {"id": ids[i], "success": True, "result": result}
+            return []
+        errors = r.get("errors") if isinstance(r.get("errors"), list) else []
+        rejected = {}
+        for err in errors:
+            if isinstance(err, dict) and isinstance(err.get("index"), int) and 0 <= err["index"] < len(pending):
+                rejected[err["index"]] = err.get("message", "operation rejected")
+        if r.status_code != 400 or not rejected:
+            Records._bulk_fail(ids, pending, results, r.error_message or str(errors) or "status %d" % r.status_code)
+            return []
+        for k, message in rejected.items():
+            results[pending[k]] = {"id": ids[pending[k]], "success": False, "error": message}
+        return [i for k, i in enumerate(pending) if k not in rejected]
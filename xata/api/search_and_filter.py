@@ -23,8 +23,14 @@
 # Specification: workspace:v1.0
 # ------------------------------------------------------- #
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
 from xata.api_request import ApiRequest
 from xata.api_response import ApiResponse
+from xata.sse import SSEDecoder, decode_data
+
+SSE_HEADERS = {"content-type": "application/json", "accept": "text/event-stream"}
 
 
 class SearchAndFilter(ApiRequest):
@@ -1164,3 +1170,149 @@ class SearchAndFilter(ApiRequest):
         url_path = f"/db/{db_branch_name}/tables/{table_name}/aggregate"
         headers = {"content-type": "application/json"}
         return self.request("POST", url_path, headers, payload)
+
+    def query_iter(
+        self,
+        table_name: str,
+        payload: dict = None,
+        db_name: str = None,
+        branch_name: str = None,
+        prefetch: bool = True,
+    ) -> Iterator[dict]:
+        """
+        Iterate over all records of a query, page by page. The cursor handling is taken
+        care of: follow up requests only send the cursor, as the sort and filter are
+        implied by the first request. While the records of a page are consumed, the
+        next page is already fetched on a background thread.
+
+        :param table_name: str The Table name
+        :param payload: dict = None Query, see `query()`. Use `page.size` to control the page size
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+        :param prefetch: bool = True Fetch the next page while the current page is consumed
+
+        :returns Iterator[dict] records
+
+        :raises Exception if a page can not be retrieved
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-iter") if prefetch else None
+        pending = None
+        try:
+            page = self.query(table_name, payload, db_name, branch_name)
+            while True:
+                self._raise_for_query_page(table_name, page)
+                cursor = page.get_cursor() if page.has_more_results() else None
+                if cursor is not None and executor is not None:
+                    pending = executor.submit(
+                        self.query, table_name, self._next_page_payload(payload, cursor), db_name, branch_name
+                    )
+                yield from page.get("records", [])
+
+                if cursor is None:
+                    return
+                if pending is not None:
+                    page, pending = pending.result(), None
+                else:
+                    page = self.query(table_name, self._next_page_payload(payload, cursor), db_name, branch_name)
+        finally:
+            if executor is not None:
+                if pending is not None:
+                    pending.cancel()
+                executor.shutdown(wait=False)
+
+    def _next_page_payload(self, payload: dict, cursor: str) -> dict:
+        """
+        Only the first request can have a sort and filter defined. Every following
+        cursor request has them implied by the first request.
+        """
+        page = {"after": cursor}
+        if payload and "size" in payload.get("page", {}):
+            page["size"] = payload["page"]["size"]
+        follow_up = {k: v for k, v in (payload or {}).items() if k not in ("sort", "filter", "page")}
+        follow_up["page"] = page
+        return follow_up
+
+    def _raise_for_query_page(self, table_name: str, page: ApiResponse):
+        if not page.is_success():
+            raise Exception(
+                "unable to query table '%s', with error: %d - %s" % (table_name, page.status_code, page.error_message)
+            )
+
+    def ask_stream(
+        self,
+        table_name: str,
+        question: str,
+        rules: list[str] = [],
+        options: dict = {},
+        db_name: str = None,
+        branch_name: str = None,
+    ) -> Iterator:
+        """
+        Ask your table a question and iterate over the server-sent events of the answer
+        as they arrive, instead of waiting for the complete response. The request is sent
+        when the iteration starts.
+
+        :param table_name: str The Table name
+        :param question: str question to ask
+        :param rules: list[str] specific rules you want to apply, default: []
+        :param options: dict more options to adjust the query, e.g. `searchType`, default: {}
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+
+        :returns Iterator of the decoded event data, e.g. `{"text": ...}` or `{"sessionId": ...}`
+
+        :raises Exception if the question can not be answered
+        """
+        db_branch_name = self.client.get_db_branch_name(db_name, branch_name)
+        url_path = f"/db/{db_branch_name}/tables/{table_name}/ask"
+        return self._stream_events(table_name, url_path, self._ask_payload(question, rules, options))
+
+    def ask_follow_up_stream(
+        self,
+        table_name: str,
+        session_id: str,
+        question: str,
+        db_name: str = None,
+        branch_name: str = None,
+    ) -> Iterator:
+        """
+        Ask a follow-up question and iterate over the server-sent events of the answer, see `ask_stream()`
+
+        :param table_name: str The Table name
+        :param session_id: str Session id from initial question
+        :param question: str follow up question to ask
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+
+        :returns Iterator of the decoded event data
+
+        :raises Exception if the question can not be answered
+        """
+        db_branch_name = self.client.get_db_branch_name(db_name, branch_name)
+        url_path = f"/db/{db_branch_name}/tables/{table_name}/ask/{session_id}"
+        return self._stream_events(table_name, url_path, {"message": question})
+
+    def _stream_events(self, table_name: str, url_path: str, payload: dict) -> Iterator:
+        resp = self.stream("POST", url_path, SSE_HEADERS, payload)
+        try:
+            if not 200 <= resp.status_code < 300:
+                self._raise_for_stream(table_name, self.process_response(resp))
+            decoder = SSEDecoder()
+            for chunk in resp.iter_content(chunk_size=None):
+                for event in decoder.feed(chunk):
+                    yield decode_data(event)
+            for event in decoder.close():
+                yield decode_data(event)
+        finally:
+            resp.close()
+
+    @staticmethod
+    def _ask_payload(question: str, rules: list[str], options: dict) -> dict:
+        payload = {**options, "question": question}
+        if rules:
+            payload["rules"] = rules
+        return payload
+
+    @staticmethod
+    def _raise_for_stream(table_name: str, r: ApiResponse):
+        raise Exception("unable to ask table '%s', with error: %d - %s" % (table_name, r.status_code, r.error_message))
@@ -18,20 +18,54 @@
 #
 
 import logging
+import time
+from email.utils import parsedate_to_datetime
+from threading import Thread
 
-from requests import Session, request
+import orjson
+from requests import Session
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import Timeout as RequestsTimeout
 
-from xata.api_response import ApiResponse
+from xata.api_response import ApiResponse, LazyApiResponse
 
+from .compression import COMPRESSION_OFFLOAD_THRESHOLD
 from .errors import RateLimitError, UnauthorizedError, XataServerError
+from .hooks import RequestEvent
+
+
+def parse_retry_after(value: str) -> float:
+    """
+    Parse a Retry-After header, either delay seconds or an HTTP date
+
+    :param value: str Header value
+    :returns float seconds to wait, or None if absent or unparsable
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
 
 
 class ApiRequest:
     def __init__(self, client):
-        self.session = Session()
         self.client = client
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    @property
+    def session(self) -> Session:
+        """
+        The session of the transport shared by all namespaces of the client
+        :returns requests.Session
+        """
+        return self.client.transport.session
+
     def get_scope(self) -> str:
         return self.scope
 
@@ -79,34 +113,437 @@ class ApiRequest:
         :raises UnauthorizedError
         :raises ServerError
         """
+        caches = self._caches()
+        tokens = []
+        for cache in caches:
+            cached, token = cache.lookup(http_method, url_path, payload)
+            if cached is not None:
+                if token is not None:
+                    # stale entry, refresh it in the background
+                    Thread(
+                        target=self._refresh,
+                        args=(cache, token, http_method, url_path, headers, payload, override_base_url),
+                        daemon=True,
+                    ).start()
+                return self.process_response(cached)
+            tokens.append(token)
+
+        resp = self._send(http_method, url_path, headers, payload, data, is_streaming, override_base_url)
+        for cache, token in zip(caches, tokens):
+            cache.store(token, resp)
+        return self.process_response(resp)
+
+    def _send(
+        self,
+        http_method: str,
+        url_path: str,
+        headers: dict,
+        payload: dict,
+        data: bytes,
+        is_streaming: bool,
+        override_base_url: str,
+    ):
         headers = {**headers, **self.client.get_headers()}
-        base_url = self.get_base_url() if override_base_url is None else override_base_url
-        url = "%s/%s" % (base_url, url_path.lstrip("/"))
-
-        # In order not exhaust the connection pool with open connections from unread streams
-        # we opt for Session usage on all non-stream requests
-        # https://requests.readthedocs.io/en/latest/user/advanced/#body-content-workflow
-        if is_streaming:
-            if payload is None and data is None:
-                resp = request(http_method, url, headers=headers, stream=True)
-            elif data is not None:
-                resp = request(http_method, url, headers=headers, data=data, stream=True)
-            else:
-                resp = request(http_method, url, headers=headers, json=payload, stream=True)
-        else:
-            if payload is None and data is None:
-                resp = self.session.request(http_method, url, headers=headers)
-            elif data is not None:
-                resp = self.session.request(http_method, url, headers=headers, data=data)
+        url = self.get_url(url_path, override_base_url)
+        if data is None:
+            data = self.compress_payload(headers, self.encode_payload(headers, payload))
+        event = self._before_send(http_method, url_path, url, headers, data)
+        try:
+            resp = self._transmit(http_method, url_path, url, headers, data, is_streaming, event)
+        except Exception as exc:
+            self._on_error(event, exc)
+            raise
+        finally:
+            # once the write is done, reads in flight can not cache stale results
+            for cache in self._caches():
+                cache.invalidate_request(http_method, url_path, payload)
+        self._after_response(event, resp, is_streaming)
+        return resp
+
+    def _transmit(
+        self, http_method: str, url_path: str, url: str, headers: dict, data: bytes, is_streaming: bool, event
+    ):
+        """
+        Send a request through the transport, retried as the retry policy of the client allows
+        """
+        trace = self._trace()
+        policy = self.client.retry_policy
+        if policy is None:
+            return self.client.transport.request(
+                http_method, url, headers=headers, data=data, is_streaming=is_streaming, trace=trace
+            )
+        attempt = 0
+        while True:
+            if event is not None:
+                event.retries = attempt
+            policy.acquire(url, attempt)
+            try:
+                resp = self.client.transport.request(
+                    http_method, url, headers=headers, data=data, is_streaming=is_streaming, trace=trace
+                )
+            except Exception as exc:
+                policy.record(url, False)
+                wait = policy.retry_delay(http_method, url_path, attempt) if self._retryable(exc) else None
+                if wait is None:
+                    raise
+            except BaseException:
+                # cancelled or interrupted, a half-open circuit must not wait for this probe forever
+                policy.release(url)
+                raise
             else:
-                resp = self.session.request(http_method, url, headers=headers, json=payload)
+                wait = self._retry_delay(policy, http_method, url, url_path, attempt, resp)
+                if wait is None:
+                    resp.retries = attempt
+                    return resp
+                resp.close()
+            self.logger.info("attempt %d of %s %s failed, retry in %.2f s" % (attempt + 1, http_method, url_path, wait))
+            time.sleep(wait)
+            attempt += 1
+
+    def _trace(self) -> bool:
+        """
+        Measure each phase of the request, costs a DNS lookup per new connection.
+        Only done if a registered hook reads the timings of the connection phases.
+        """
+        return any(getattr(hook, "traces_connections", True) for hook in self.client.hooks)
+
+    def _before_send(self, http_method: str, url_path: str, url: str, headers: dict, data: bytes) -> RequestEvent:
+        """
+        Call the before_send hooks of the client
+
+        :returns RequestEvent or None if the client has no hooks
+        """
+        if not self.client.hooks:
+            return None
+        event = RequestEvent(http_method, url_path, url, headers, data)
+        for hook in self.client.hooks:
+            hook.before_send(event)
+        return event
+
+    def _after_response(self, event: RequestEvent, resp, is_streaming: bool = False):
+        if event is None:
+            return
+        event.completed(resp, is_streaming)
+        for hook in reversed(self.client.hooks):
+            hook.after_response(event)
+
+    def _on_error(self, event: RequestEvent, exc: Exception):
+        if event is None:
+            return
+        event.failed(exc)
+        for hook in reversed(self.client.hooks):
+            hook.on_error(event)
+
+    def _retryable(self, exc: Exception) -> bool:
+        """
+        Is the exception of the transport a connection error worth another attempt?
+        """
+        return isinstance(exc, (RequestsConnectionError, RequestsTimeout))
+
+    def _retry_delay(self, policy, http_method: str, url: str, url_path: str, attempt: int, resp) -> float:
+        """
+        Report the response to the retry policy and get the wait before the next attempt
+
+        :returns float or None if the response is final
+        """
+        policy.record(url, resp.status_code < 500)
+        if resp.status_code < 400:
+            return None
+        retry_after = parse_retry_after(resp.headers.get("retry-after"))
+        return policy.retry_delay(http_method, url_path, attempt, resp.status_code, retry_after)
+
+    def _refresh(self, cache, token, http_method: str, url_path: str, headers: dict, payload: dict, base_url: str):
+        try:
+            cache.store(token, self._send(http_method, url_path, headers, payload, None, False, base_url))
+        except Exception as exc:
+            self.logger.warning("unable to refresh cached response of %s: %s" % (url_path, exc))
+        finally:
+            cache.release(token)
+
+    def _caches(self) -> list:
+        return [c for c in (self.client.record_cache, self.client.query_cache) if c is not None]
+
+    def stream(self, http_method: str, url_path: str, headers: dict = {}, payload: dict = None):
+        """
+        Send a request and return the HTTP response without reading the body, to
+        consume it while it arrives. The caller has to close the response.
+
+        :param http_method: str
+        :param url_path: str
+        :param headers: dict = {}
+        :param payload: dict = None
+
+        :returns requests.Response
+        """
+        headers = {**headers, **self.client.get_headers()}
+        url = self.get_url(url_path)
+        data = self.encode_payload(headers, payload)
+        event = self._before_send(http_method, url_path, url, headers, data)
+        try:
+            resp = self.client.transport.request(
+                http_method, url, headers=headers, data=data, is_streaming=True, trace=self._trace()
+            )
+        except Exception as exc:
+            self._on_error(event, exc)
+            raise
+        self._after_response(event, resp, True)
+        return resp
+
+    def get_url(self, url_path: str, override_base_url: str = None) -> str:
+        """
+        Build the full URL of an endpoint
+
+        :param url_path: str
+        :param override_base_url: str = None Set alternative base URL
+
+        :returns str
+        """
+        base_url = self.get_base_url() if override_base_url is None else override_base_url
+        return "%s/%s" % (base_url, url_path.lstrip("/"))
+
+    def encode_payload(self, headers: dict, payload: dict = None, data: bytes = None) -> bytes:
+        """
+        Serialize the JSON payload with orjson. Raw data takes precedence over the payload.
+        Sets the content type to JSON, if not defined by the endpoint.
+
+        :param headers: dict Request headers, updated in place
+        :param payload: dict = None
+        :param data: bytes = None
+
+        :returns bytes
+        """
+        if data is not None or payload is None:
+            return data
+        if "content-type" not in headers:
+            headers["content-type"] = "application/json"
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+    def compress_payload(self, headers: dict, data: bytes) -> bytes:
+        """
+        Compress a serialized payload, if the client has a compressor and the body is large enough.
+        Sets the content encoding.
+
+        :param headers: dict Request headers, updated in place
+        :param data: bytes Serialized payload
+
+        :returns bytes
+        """
+        compressor = self.client.compression
+        if compressor is None or not compressor.should_compress(headers, data):
+            return data
+        headers["content-encoding"] = compressor.encoding
+        return compressor.compress(data)
+
+    def process_response(self, resp) -> ApiResponse:
+        """
+        Map special status codes to exceptions and wrap the HTTP response
 
+        :param resp: requests.Response | httpx.Response
+
+        :returns ApiResponse
+
+        :raises RateLimitError
+        :raises UnauthorizedError
+        :raises ServerError
+        """
         # Any special status code we can raise an exception for ?
         if resp.status_code == 429:
-            raise RateLimitError(f"code: {resp.status_code}, rate limited: {resp.json()}")
+            raise RateLimitError(
+                f"code: {resp.status_code}, rate limited: {resp.json()}",
+                retry_after=parse_retry_after(resp.headers.get("retry-after")),
+            )
         if resp.status_code == 401:
             raise UnauthorizedError(f"code: {resp.status_code}, unauthorized: {resp.json()}")
         elif resp.status_code >= 500:
             raise XataServerError(f"code: {resp.status_code}, server error: {resp.text}")
 
+        threshold = self.client.lazy_parse_threshold
+        if threshold is not None and len(resp.content) >= threshold:
+            return LazyApiResponse(resp)
         return ApiResponse(resp)
+
+
+class AsyncApiRequest(ApiRequest):
+    """
+    Awaitable counterpart of ApiRequest. Mixed into the generated namespaces
+    by the AsyncXataClient, every endpoint method then returns a coroutine.
+    All requests are sent through the pooled transport of the client.
+    """
+
+    def __init__(self, client):
+        super().__init__(client)
+        # keep references to background refreshes of stale cache entries
+        self._refreshing = set()
+
+    async def request(
+        self,
+        http_method: str,
+        url_path: str,
+        headers: dict = {},
+        payload: dict = None,
+        data: bytes = None,
+        is_streaming: bool = False,
+        override_base_url=None,
+    ) -> ApiResponse:
+        """
+        :param http_method: str
+        :param url_path: str
+        :headers: dict = {}
+        :param payload: dict = None
+        :param data: bytes = None
+        :param is_streaming: bool = False
+        :param override_base_url = None Set alternative base URL
+
+        :returns ApiResponse
+
+        :raises RateLimitError
+        :raises UnauthorizedError
+        :raises ServerError
+        """
+        caches = self._caches()
+        tokens = []
+        for cache in caches:
+            cached, token = cache.lookup(http_method, url_path, payload)
+            if cached is not None:
+                if token is not None:
+                    # stale entry, refresh it in the background
+                    import asyncio
+
+                    task = asyncio.ensure_future(
+                        self._refresh(cache, token, http_method, url_path, headers, payload, override_base_url)
+                    )
+                    self._refreshing.add(task)
+                    task.add_done_callback(self._refreshing.discard)
+                return self.process_response(cached)
+            tokens.append(token)
+
+        resp = await self._send(http_method, url_path, headers, payload, data, is_streaming, override_base_url)
+        for cache, token in zip(caches, tokens):
+            cache.store(token, resp)
+        return self.process_response(resp)
+
+    async def stream(self, http_method: str, url_path: str, headers: dict = {}, payload: dict = None):
+        """
+        Send a request and return the HTTP response without reading the body, to
+        consume it while it arrives. The caller has to close the response.
+
+        :param http_method: str
+        :param url_path: str
+        :param headers: dict = {}
+        :param payload: dict = None
+
+        :returns httpx.Response
+        """
+        headers = {**headers, **self.client.get_headers()}
+        url = self.get_url(url_path)
+        data = self.encode_payload(headers, payload)
+        event = self._before_send(http_method, url_path, url, headers, data)
+        try:
+            resp = await self.client.transport.stream(http_method, url, headers=headers, data=data)
+        except Exception as exc:
+            self._on_error(event, exc)
+            raise
+        self._after_response(event, resp, True)
+        return resp
+
+    async def _send(
+        self,
+        http_method: str,
+        url_path: str,
+        headers: dict,
+        payload: dict,
+        data: bytes,
+        is_streaming: bool,
+        override_base_url: str,
+    ):
+        headers = {**headers, **self.client.get_headers()}
+        url = self.get_url(url_path, override_base_url)
+        if data is None:
+            data = await self.compress_payload(headers, self.encode_payload(headers, payload))
+        event = self._before_send(http_method, url_path, url, headers, data)
+        try:
+            resp = await self._transmit(http_method, url_path, url, headers, data, is_streaming, event)
+        except Exception as exc:
+            self._on_error(event, exc)
+            raise
+        finally:
+            for cache in self._caches():
+                cache.invalidate_request(http_method, url_path, payload)
+        self._after_response(event, resp, is_streaming)
+        return resp
+
+    async def _transmit(
+        self, http_method: str, url_path: str, url: str, headers: dict, data: bytes, is_streaming: bool, event
+    ):
+        trace = self._trace()
+        policy = self.client.retry_policy
+        if policy is None:
+            return await self.client.transport.request(
+                http_method, url, headers=headers, data=data, is_streaming=is_streaming, trace=trace
+            )
+        # imported here, the sync client does not need to load asyncio
+        import asyncio
+
+        attempt = 0
+        while True:
+            if event is not None:
+                event.retries = attempt
+            policy.acquire(url, attempt)
+            try:
+                resp = await self.client.transport.request(
+                    http_method, url, headers=headers, data=data, is_streaming=is_streaming, trace=trace
+                )
+            except Exception as exc:
+                policy.record(url, False)
+                wait = policy.retry_delay(http_method, url_path, attempt) if self._retryable(exc) else None
+                if wait is None:
+                    raise
+            except BaseException:
+                # cancelled or interrupted, a half-open circuit must not wait for this probe forever
+                policy.release(url)
+                raise
+            else:
+                wait = self._retry_delay(policy, http_method, url, url_path, attempt, resp)
+                if wait is None:
+                    resp.retries = attempt
+                    return resp
+                await resp.aclose()
+            self.logger.info("attempt %d of %s %s failed, retry in %.2f s" % (attempt + 1, http_method, url_path, wait))
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    async def compress_payload(self, headers: dict, data: bytes) -> bytes:
+        """
+        Compress a serialized payload like ApiRequest.compress_payload, large
+        bodies in a worker thread to keep the event loop responsive.
+
+        :param headers: dict Request headers, updated in place
+        :param data: bytes Serialized payload
+
+        :returns bytes
+        """
+        compressor = self.client.compression
+        if compressor is None or not compressor.should_compress(headers, data):
+            return data
+        headers["content-encoding"] = compressor.encoding
+        if len(data) < COMPRESSION_OFFLOAD_THRESHOLD:
+            return compressor.compress(data)
+        import asyncio
+
+        # asyncio.to_thread needs python 3.9
+        return await asyncio.get_running_loop().run_in_executor(None, compressor.compress, data)
+
+    def _retryable(self, exc: Exception) -> bool:
+        import httpx
+
+        return isinstance(exc, httpx.TransportError)
+
+    async def _refresh(
+        self, cache, token, http_method: str, url_path: str, headers: dict, payload: dict, base_url: str
+    ):
+        try:
+            cache.store(token, await self._send(http_method, url_path, headers, payload, None, False, base_url))
+        except Exception as exc:
+            self.logger.warning("unable to refresh cached response of %s: %s" % (url_path, exc))
+        finally:
+            cache.release(token)
@@ -18,27 +18,18 @@
 #
 
 import logging
+from collections.abc import MutableMapping
 from typing import Union
 
 import deprecation
+import orjson
 from requests import Response
-from requests.exceptions import JSONDecodeError
 
 
-class ApiResponse(dict):
-    def __init__(self, response: Response):
-        self.response = response
-        self.logger = logging.getLogger(self.__class__.__name__)
-
-        # Don't serialize an empty response
-        try:
-            self.update(self.response.json())
-        except JSONDecodeError:
-            pass
-
-        # log server message
-        if "x-xata-message" in self.headers:
-            self.logger.warn(self.headers["x-xata-message"])
+class ResponseAccessors(object):
+    """
+    Accessors of the HTTP response, shared by ApiResponse and LazyApiResponse
+    """
 
     def server_message(self) -> Union[str, None]:
         """
@@ -62,7 +53,7 @@ class ApiResponse(dict):
         :returns str or None
         """
         try:
-            return self.response.json()["meta"]["page"]["cursor"]
+            return self["meta"]["page"]["cursor"]
         except Exception:
             return None
 
@@ -72,7 +63,7 @@ class ApiResponse(dict):
         :return bool
         """
         try:
-            return self.response.json()["meta"]["page"].get("more", False)
+            return self["meta"]["page"].get("more", False)
         except Exception:
             return False
 
@@ -86,7 +77,15 @@ class ApiResponse(dict):
         Legacy support for requests.Response from 0.x
         :returns dict
         """
-        return self.response.json()
+        return dict(self)
+
+    @property
+    def retries(self) -> int:
+        """
+        Get the amount of retries the retry policy of the client took
+        :returns int
+        """
+        return getattr(self.response, "retries", 0)
 
     @property
     def status_code(self) -> int:
@@ -104,7 +103,7 @@ class ApiResponse(dict):
         """
         if self.status_code < 300:
             return None
-        return self.response.json().get("message", None)
+        return self.get("message", None)
 
     @property
     def headers(self) -> dict:
@@ -121,3 +120,107 @@ class ApiResponse(dict):
         :returns bytes
         """
         return self.response.content
+
+
+class ApiResponse(ResponseAccessors, dict):
+    def __init__(self, response: Response):
+        self.response = response
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.parsed = False
+
+        if not self.is_lazy():
+            self.parse()
+
+        # log server message
+        if "x-xata-message" in self.headers:
+            self.logger.warn(self.headers["x-xata-message"])
+
+    def is_lazy(self) -> bool:
+        """
+        Is the body parsed on first access instead of on init?
+        :returns bool
+        """
+        return False
+
+    def parse(self):
+        """
+        Parse the body into the dict. The body is only parsed once,
+        all accessors share the result.
+        """
+        if self.parsed:
+            return
+        self.parsed = True
+        # Don't serialize an empty response
+        try:
+            dict.update(self, orjson.loads(self.response.content))
+        except orjson.JSONDecodeError:
+            pass
+
+
+class LazyApiResponse(ResponseAccessors, MutableMapping):
+    """
+    ApiResponse for large bodies, the body is only parsed when the
+    content is accessed for the first time. Checking the status or the
+    headers of the response does not parse the body.
+
+    It is a mapping and not a dict, as serializers like `json` and `orjson`
+    read the items of a dict without calling its methods, and would not see
+    an unparsed body. Use `dict(r)` to get a dict.
+    """
+
+    def __init__(self, response: Response):
+        self.response = response
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.parsed = False
+        self.data = {}
+
+        # log server message
+        if "x-xata-message" in self.headers:
+            self.logger.warn(self.headers["x-xata-message"])
+
+    def is_lazy(self) -> bool:
+        """
+        Is the body not parsed yet?
+        :returns bool
+        """
+        return not self.parsed
+
+    def parse(self):
+        """
+        Parse the body, only once
+        """
+        if self.parsed:
+            return
+        self.parsed = True
+        try:
+            self.data.update(orjson.loads(self.response.content))
+        except orjson.JSONDecodeError:
+            pass
+
+    def __getitem__(self, key):
+        self.parse()
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.parse()
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        self.parse()
+        del self.data[key]
+
+    def __iter__(self):
+        self.parse()
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        self.parse()
+        return len(self.data)
+
+    def __contains__(self, key) -> bool:
+        self.parse()
+        return key in self.data
+
+    def __repr__(self) -> str:
+        self.parse()
+        return repr(self.data)
@@ -0,0 +1,416 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+from typing import AsyncIterator
+
+from .api.authentication import Authentication
+from .api.branch import Branch
+from .api.databases import Databases
+from .api.files import Files
+from .api.invites import Invites
+from .api.migrations import Migrations
+from .api.records import BULK_DEFAULT_CONCURRENCY, Records
+from .api.search_and_filter import SSE_HEADERS, SearchAndFilter
+from .api.sql import Sql
+from .api.table import Table
+from .api.users import Users
+from .api.workspaces import Workspaces
+from .api_request import AsyncApiRequest
+from .cache import QueryCache, RecordCache
+from .client import (
+    DEFAULT_BRANCH_NAME,
+    DEFAULT_CONTROL_PLANE_DOMAIN,
+    DEFAULT_DATA_PLANE_DOMAIN,
+    DEFAULT_REGION,
+    NAMESPACES,
+    XataClient,
+)
+from .compression import Compressor
+from .errors import RateLimitError, XataServerError
+from .metrics import Metrics
+from .retry import RetryPolicy
+from .sse import SSEDecoder, decode_data
+from .transport import AsyncTransport
+
+
+class AsyncAuthentication(AsyncApiRequest, Authentication):
+    pass
+
+
+class AsyncBranch(AsyncApiRequest, Branch):
+    pass
+
+
+class AsyncDatabases(AsyncApiRequest, Databases):
+    pass
+
+
+class AsyncFiles(AsyncApiRequest, Files):
+    async def transform(self, url: str, operations: dict[str, any]) -> bytes:
+        """
+        Image transformations
+        All possible combinations: https://xata.io/docs/concepts/file-storage#image-transformations
+
+        :param url: str Public or signed URL of the image
+        :param operations: dict Image operations
+
+        :return Response
+        """
+        endpoint = self.transform_url(url, operations)
+
+        resp = await self.client.transport.request("GET", endpoint)
+        if resp.status_code != 200:
+            raise XataServerError(f"code: {resp.status_code}, server error: {resp.text}")
+        return resp.content
+
+
+class AsyncInvites(AsyncApiRequest, Invites):
+    pass
+
+
+class AsyncMigrations(AsyncApiRequest, Migrations):
+    pass
+
+
+class AsyncRecords(AsyncApiRequest, Records):
+    async def get_many(
+        self,
+        table_name: str,
+        ids: list[str],
+        db_name: str = None,
+        branch_name: str = None,
+        columns: list = None,
+        max_concurrency: int = BULK_DEFAULT_CONCURRENCY,
+    ) -> list:
+        """
+        Retrieve many records by id, with one query per 200 ids. The queries run concurrently.
+
+        :param table_name: str The Table name
+        :param ids: list[str] Record ids, duplicates are only fetched once
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+        :param columns: list = None Column filters
+        :param max_concurrency: int = 4 How many queries are sent concurrently
+
+        :returns list The records in the order of the ids, None for ids without record
+
+        :raises Exception if a query fails
+        """
+        semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+        async def run(chunk: list[str]):
+            async with semaphore:
+                return await self.client.data().query(
+                    table_name, self._get_many_payload(chunk, columns), db_name, branch_name
+                )
+
+        found = {}
+        for page in await asyncio.gather(*[run(chunk) for chunk in self._get_many_chunks(ids)]):
+            self._get_many_collect(table_name, page, found)
+        return [found.get(record_id) for record_id in ids]
+
+    async def _bulk_operations(
+        self,
+        operations: list[dict],
+        ids: list[str],
+        db_name: str,
+        branch_name: str,
+        max_concurrency: int,
+        max_retries: int,
+    ) -> list[dict]:
+        results = [None] * len(operations)
+        semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+        async def run(chunk: list[int]):
+            async with semaphore:
+                await self._bulk_chunk(operations, ids, chunk, results, db_name, branch_name, max_retries)
+
+        await asyncio.gather(*[run(chunk) for chunk in self._bulk_chunks(len(operations))])
+        return results
+
+    async def _bulk_chunk(
+        self,
+        operations: list[dict],
+        ids: list[str],
+        pending: list[int],
+        results: list,
+        db_name: str,
+        branch_name: str,
+        max_retries: int,
+    ):
+        attempt = 0
+        while pending:
+            try:
+                r = await self.transaction({"operations": [operations[i] for i in pending]}, db_name, branch_name)
+            except self._bulk_retryable_errors() as exc:
+                if attempt >= max_retries:
+                    self._bulk_fail(ids, pending, results, str(exc))
+                    return
+                await asyncio.sleep(self._bulk_backoff(attempt, exc))
+                attempt += 1
+                continue
+            pending = self._bulk_apply(ids, pending, results, r)
+
+    @staticmethod
+    def _bulk_retryable_errors() -> tuple:
+        import httpx
+
+        return (RateLimitError, XataServerError, httpx.TransportError)
+
+
+class AsyncSearchAndFilter(AsyncApiRequest, SearchAndFilter):
+    async def query_iter(
+        self,
+        table_name: str,
+        payload: dict = None,
+        db_name: str = None,
+        branch_name: str = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate over all records of a query, page by page. While the records of a
+        page are consumed, the next page is already fetched in a background task.
+
+        :param table_name: str The Table name
+        :param payload: dict = None Query, see `query()`. Use `page.size` to control the page size
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+        :param prefetch: bool = True Fetch the next page while the current page is consumed
+
+        :returns AsyncIterator[dict] records
+
+        :raises Exception if a page can not be retrieved
+        """
+        pending = None
+        try:
+            page = await self.query(table_name, payload, db_name, branch_name)
+            while True:
+                self._raise_for_query_page(table_name, page)
+                cursor = page.get_cursor() if page.has_more_results() else None
+                if cursor is not None and prefetch:
+                    pending = asyncio.ensure_future(
+                        self.query(table_name, self._next_page_payload(payload, cursor), db_name, branch_name)
+                    )
+                for record in page.get("records", []):
+                    yield record
+
+                if cursor is None:
+                    return
+                if pending is not None:
+                    page, pending = await pending, None
+                else:
+                    page = await self.query(table_name, self._next_page_payload(payload, cursor), db_name, branch_name)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def ask_stream(
+        self,
+        table_name: str,
+        question: str,
+        rules: list[str] = [],
+        options: dict = {},
+        db_name: str = None,
+        branch_name: str = None,
+    ) -> AsyncIterator:
+        """
+        Ask your table a question and iterate over the server-sent events of the answer
+        as they arrive, instead of waiting for the complete response.
+
+        :param table_name: str The Table name
+        :param question: str question to ask
+        :param rules: list[str] specific rules you want to apply, default: []
+        :param options: dict more options to adjust the query, e.g. `searchType`, default: {}
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+
+        :returns AsyncIterator of the decoded event data
+
+        :raises Exception if the question can not be answered
+        """
+        db_branch_name = self.client.get_db_branch_name(db_name, branch_name)
+        url_path = f"/db/{db_branch_name}/tables/{table_name}/ask"
+        async for data in self._stream_events(table_name, url_path, self._ask_payload(question, rules, options)):
+            yield data
+
+    async def ask_follow_up_stream(
+        self,
+        table_name: str,
+        session_id: str,
+        question: str,
+        db_name: str = None,
+        branch_name: str = None,
+    ) -> AsyncIterator:
+        """
+        Ask a follow-up question and iterate over the server-sent events of the answer, see `ask_stream()`
+
+        :param table_name: str The Table name
+        :param session_id: str Session id from initial question
+        :param question: str follow up question to ask
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+
+        :returns AsyncIterator of the decoded event data
+
+        :raises Exception if the question can not be answered
+        """
+        db_branch_name = self.client.get_db_branch_name(db_name, branch_name)
+        url_path = f"/db/{db_branch_name}/tables/{table_name}/ask/{session_id}"
+        async for data in self._stream_events(table_name, url_path, {"message": question}):
+            yield data
+
+    async def _stream_events(self, table_name: str, url_path: str, payload: dict) -> AsyncIterator:
+        resp = await self.stream("POST", url_path, SSE_HEADERS, payload)
+        try:
+            if not 200 <= resp.status_code < 300:
+                await resp.aread()
+                self._raise_for_stream(table_name, self.process_response(resp))
+            decoder = SSEDecoder()
+            async for chunk in resp.aiter_bytes():
+                for event in decoder.feed(chunk):
+                    yield decode_data(event)
+            for event in decoder.close():
+                yield decode_data(event)
+        finally:
+            await resp.aclose()
+
+
+class AsyncSql(AsyncApiRequest, Sql):
+    pass
+
+
+class AsyncTable(AsyncApiRequest, Table):
+    pass
+
+
+class AsyncUsers(AsyncApiRequest, Users):
+    pass
+
+
+class AsyncWorkspaces(AsyncApiRequest, Workspaces):
+    pass
+
+
+ASYNC_NAMESPACES = {name: ("xata.async_client", "Async%s" % cls) for name, (module, cls) in NAMESPACES.items()}
+
+
+class AsyncXataClient(XataClient):
+    """The asyncio flavour of the Xata Client. It exposes the same namespaces as
+    the XataClient, but every endpoint method is awaitable. All namespaces share
+    one pooled HTTP transport, so many requests can be in flight concurrently
+    from a single event loop. Requires the optional dependency `httpx`.
+
+    Use the client as async context manager, or call `close()` when done:
+
+    .. code-block:: python
+
+        async with AsyncXataClient() as xata:
+            record = await xata.records().get("Posts", "rec_123")
+
+    :meta public:
+    :param api_key: API key to use for authentication.
+    :param db_url: The database URL to use. If this is specified,
+                   then workspace_id, region and db_name must not be specified.
+    :param workspace_id: The workspace ID to use.
+    :param region: The region to use.
+    :param db_name: The database name to use.
+    :param branch_name: The branch name to use. Defaults to `main`
+    :param domain_core: The domain to use for "core", the control plane. Defaults to api.xata.io.
+    :param domain_workspace: The domain to use for "workspace", data plane. Defaults to xata.sh.
+    :param lazy_parse_threshold: Response bodies of this size in bytes or larger are only parsed when their
+                                 content is first accessed. Defaults to None, every body is parsed right away.
+    :param transport: The pooled HTTP transport to use. Defaults to an AsyncTransport with default limits.
+                      A transport passed in is not closed by `close()`.
+    :param record_cache: Read-through cache for `records().get()`, invalidated by writes through this client.
+                         Defaults to None, no caching.
+    :param query_cache: Cache for query, aggregate and summarize results, invalidated by writes through this
+                        client. Defaults to None, no caching.
+    :param retry_policy: Retries with backoff and a circuit breaker for every request of this client.
+                         Defaults to None, errors are raised right away.
+    :param compression: Compress request bodies above a size threshold and ask for compressed responses.
+                        Defaults to None, no compression.
+    :param hooks: Hooks called before a request is sent and after its response or error, see `add_hook`.
+                  Defaults to None, no hooks.
+    :param metrics: Request counters and latency histograms per namespace method, see `get_metrics`.
+                    Defaults to None, no metrics.
+    """
+
+    namespaces = ASYNC_NAMESPACES
+
+    def __init__(
+        self,
+        api_key: str = None,
+        region: str = DEFAULT_REGION,
+        workspace_id: str = None,
+        db_name: str = None,
+        db_url: str = None,
+        branch_name: str = DEFAULT_BRANCH_NAME,
+        domain_core: str = DEFAULT_CONTROL_PLANE_DOMAIN,
+        domain_workspace: str = DEFAULT_DATA_PLANE_DOMAIN,
+        lazy_parse_threshold: int = None,
+        transport: AsyncTransport = None,
+        record_cache: RecordCache = None,
+        query_cache: QueryCache = None,
+        retry_policy: RetryPolicy = None,
+        compression: Compressor = None,
+        hooks: list = None,
+        metrics: Metrics = None,
+    ):
+        """
+        Constructor for the AsyncXataClient.
+        """
+        super().__init__(
+            api_key=api_key,
+            region=region,
+            workspace_id=workspace_id,
+            db_name=db_name,
+            db_url=db_url,
+            branch_name=branch_name,
+            domain_core=domain_core,
+            domain_workspace=domain_workspace,
+            lazy_parse_threshold=lazy_parse_threshold,
+            transport=AsyncTransport() if transport is None else transport,
+            record_cache=record_cache,
+            query_cache=query_cache,
+            retry_policy=retry_policy,
+            compression=compression,
+            hooks=hooks,
+            metrics=metrics,
+        )
+        self._owns_transport = transport is None
+
+    async def close(self):
+        """
+        Close the pooled connections of the transport
+        """
+        if self._owns_transport:
+            await self.transport.close()
+
+    def __enter__(self):
+        raise Exception("AsyncXataClient is an asynchronous context manager, use: async with AsyncXataClient()")
+
+    def __exit__(self, *args):
+        pass
+
+    async def __aenter__(self) -> "AsyncXataClient":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -0,0 +1,642 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import hashlib
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Union
+from urllib.parse import unquote
+
+import orjson
+
+RECORD_CACHE_DEFAULT_MAX_SIZE = 1000
+RECORD_CACHE_DEFAULT_TTL = 60.0
+QUERY_CACHE_DEFAULT_TTL = 30.0
+QUERY_CACHE_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# defaults of the query endpoint, a payload that sets them explicitly is the same query
+QUERY_DEFAULT_PAGE_SIZE = 20
+QUERY_DEFAULT_COLUMNS = ["*"]
+
+# GET, PUT, PATCH, DELETE and POST (insert with id) of a single record
+RECORD_PATH = re.compile(r"^/db/(?P<db_branch>[^/]+)/tables/(?P<table>[^/]+)/data/(?P<id>[^/?]+)(?:\?(?P<query>.*))?$")
+TRANSACTION_PATH = re.compile(r"^/db/(?P<db_branch>[^/]+)/transaction$")
+QUERY_PATH = re.compile(r"^/db/(?P<db_branch>[^/]+)/tables/(?P<table>[^/]+)/(?P<endpoint>query|aggregate|summarize)$")
+SQL_PATH = re.compile(r"^/db/(?P<db_branch>[^/]+)/sql$")
+# statements that can not change data, any other SQL statement invalidates the whole branch
+SQL_READ_ONLY = re.compile(r"^\s*(?:select|show|explain)\b", re.IGNORECASE)
+# requests other than GET that change the records or the schema of a table
+TABLE_WRITE_PATH = re.compile(
+    r"^/db/(?P<db_branch>[^/]+)/tables/(?P<table>[^/?]+)(?:/(?:data|bulk|columns|schema)(?:/.*)?)?(?:\?.*)?$"
+)
+
+
+class RecordCache(object):
+    """
+    Read-through cache for `records().get()`, with a time to live and least recently
+    used eviction. Records are cached per database branch, table, id and columns.
+    Writes of a record through the same client, directly or in a transaction,
+    invalidate every cached variant of the record.
+
+    Pass an instance to the client to enable it:
+    `XataClient(record_cache=RecordCache(max_size=10_000, ttl=30, table_ttls={"Users": 5}))`
+    """
+
+    def __init__(
+        self,
+        max_size: int = RECORD_CACHE_DEFAULT_MAX_SIZE,
+        ttl: float = RECORD_CACHE_DEFAULT_TTL,
+        table_ttls: dict = None,
+    ):
+        """
+        :param max_size: int Maximum amount of cached responses (default: 1000)
+        :param ttl: float Seconds a record is served from the cache (default: 60)
+        :param table_ttls: dict Time to live per table name, overrides `ttl`. A time to
+            live of 0 disables caching for a table (default: None)
+
+        :raises Exception if the size or a time to live is invalid
+        """
+        if max_size < 1:
+            raise Exception("max size must be greater than 0, default: %d" % RECORD_CACHE_DEFAULT_MAX_SIZE)
+        for t in [ttl] + list((table_ttls or {}).values()):
+            if t < 0:
+                raise Exception("time to live can not be negative, default: %f" % RECORD_CACHE_DEFAULT_TTL)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.table_ttls = dict(table_ttls or {})
+
+        self.lock = Lock()
+        self.entries = OrderedDict()  # key -> (expires, response)
+        self.variants = {}  # (db_branch, table, id) -> set of keys
+        self.epoch = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def lookup(self, http_method: str, url_path: str, payload: dict = None):
+        """
+        Get the cached response of a record request
+
+        :param http_method: str
+        :param url_path: str
+        :param payload: dict = None Not used, records are identified by the path
+
+        :returns tuple of the cached HTTP response or None, and a token to pass to `store()`
+        """
+        key = self._key(http_method, url_path)
+        if key is None:
+            return None, None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[1], None
+            if entry is not None:
+                self._remove(key)
+            self.counters["misses"] += 1
+            return None, (key, self.epoch)
+
+    def store(self, token: tuple, response):
+        """
+        Cache a successful record response. Skipped if a write happened since the lookup.
+
+        :param token: tuple returned by `lookup()`
+        :param response: requests.Response | httpx.Response
+        """
+        if token is None or response.status_code != 200:
+            return
+        key, epoch = token
+        ttl = self.table_ttls.get(key[1], self.ttl)
+        if ttl <= 0:
+            return
+        with self.lock:
+            if epoch != self.epoch:
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + ttl, response)
+            self.variants.setdefault(key[0:3], set()).add(key)
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+                self.counters["evictions"] += 1
+
+    def invalidate_request(self, http_method: str, url_path: str, payload: dict = None):
+        """
+        Invalidate the records a request writes to. Called once the request is done, so
+        reads that were in flight during the write are not cached.
+
+        :param http_method: str
+        :param url_path: str
+        :param payload: dict = None Request body, for transactions
+        """
+        if http_method == "GET":
+            return
+        m = RECORD_PATH.match(url_path)
+        if m is not None:
+            self.invalidate(m.group("db_branch"), unquote(m.group("table")), unquote(m.group("id")))
+            return
+        m = TRANSACTION_PATH.match(url_path)
+        if m is not None and payload:
+            for op in payload.get("operations", []):
+                for kind, params in op.items():
+                    if kind == "get" or not isinstance(params, dict):
+                        continue
+                    record_id = params.get("id", (params.get("record") or {}).get("id"))
+                    if record_id is not None:
+                        self.invalidate(m.group("db_branch"), params.get("table"), str(record_id))
+
+    def invalidate(self, db_branch: str, table_name: str, record_id: str):
+        """
+        Drop every cached variant of a record
+
+        :param db_branch: str Database and branch name as `db:branch`
+        :param table_name: str
+        :param record_id: str
+        """
+        with self.lock:
+            self.epoch += 1
+            self.counters["invalidations"] += 1
+            for key in list(self.variants.get((db_branch, table_name, record_id), ())):
+                self._remove(key)
+
+    def clear(self):
+        """
+        Drop all cached records
+        """
+        with self.lock:
+            self.epoch += 1
+            self.entries.clear()
+            self.variants.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Get hit, miss, eviction and invalidation counters and the amount of cached responses
+
+        :returns dict
+        """
+        with self.lock:
+            return {**self.counters, "size": len(self.entries)}
+
+    def _key(self, http_method: str, url_path: str) -> tuple:
+        if http_method != "GET":
+            return None
+        m = RECORD_PATH.match(url_path)
+        if m is None:
+            return None
+        columns = ()
+        for param in (m.group("query") or "").split("&"):
+            if param.startswith("columns="):
+                columns = tuple(sorted(unquote(param[len("columns=") :]).split(",")))
+        return (m.group("db_branch"), unquote(m.group("table")), unquote(m.group("id")), columns)
+
+    def _remove(self, key: tuple):
+        self.entries.pop(key, None)
+        variants = self.variants.get(key[0:3])
+        if variants is not None:
+            variants.discard(key)
+            if not variants:
+                del self.variants[key[0:3]]
+
+
+class CachedResponse(object):
+    """
+    Stands in for the HTTP response of a cached query
+    """
+
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {"content-type": "application/json"}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return orjson.loads(self.content)
+
+
+class QueryCacheBackend(object):
+    """
+    Storage of a QueryCache. Implementations must be thread safe.
+    """
+
+    def get(self, key: str) -> Union[tuple[float, bytes], None]:
+        """
+        :param key: str
+        :returns tuple of the time the entry was stored and the response body, or None
+        """
+        raise NotImplementedError()
+
+    def set(self, key: str, stored_at: float, content: bytes):
+        """
+        :param key: str
+        :param stored_at: float Unix timestamp
+        :param content: bytes Response body
+        """
+        raise NotImplementedError()
+
+    def delete(self, key: str):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def get_generation(self, table: str) -> int:
+        """
+        Writes seen to a table, part of the key of its entries. A backend shared by
+        processes has to share the generations too, or writes in one process do not
+        invalidate the results read by another.
+
+        :param table: str Database branch and table name, or only the branch for writes to all its tables
+        :returns int
+        """
+        raise NotImplementedError()
+
+    def increment_generation(self, table: str):
+        """
+        :param table: str Database branch and table name, or only the branch for writes to all its tables
+        """
+        raise NotImplementedError()
+
+
+class MemoryQueryCacheBackend(QueryCacheBackend):
+    """
+    In process storage, the least recently used entries are evicted beyond `max_bytes`
+    """
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_DEFAULT_MAX_BYTES):
+        """
+        :param max_bytes: int Maximum size of all cached bodies (default: 64 MiB)
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.lock = Lock()
+
+    def get(self, key: str) -> Union[tuple[float, bytes], None]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, stored_at: float, content: bytes):
+        with self.lock:
+            self._delete(key)
+            if len(content) > self.max_bytes:
+                return
+            self.entries[key] = (stored_at, content)
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                self._delete(next(iter(self.entries)))
+
+    def delete(self, key: str):
+        with self.lock:
+            self._delete(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def get_generation(self, table: str) -> int:
+        with self.lock:
+            return self.generations.get(table, 0)
+
+    def increment_generation(self, table: str):
+        with self.lock:
+            self.generations[table] = self.generations.get(table, 0) + 1
+
+    def _delete(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class SQLiteQueryCacheBackend(QueryCacheBackend):
+    """
+    SQLite file storage, can be shared by processes and survives restarts. The
+    oldest entries are evicted beyond `max_bytes`. The generations of the tables
+    are stored with the entries, so a write in one process invalidates the results
+    of the table in every process.
+    """
+
+    def __init__(self, path: str, max_bytes: int = QUERY_CACHE_DEFAULT_MAX_BYTES):
+        """
+        :param path: str Database file, created if missing
+        :param max_bytes: int Maximum size of all cached bodies (default: 64 MiB)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS query_cache "
+            "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, size INTEGER NOT NULL, content BLOB NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS query_cache_stored_at ON query_cache (stored_at)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS query_cache_generations (tbl TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+        )
+        # running total of the cached bytes, to not sum up all entries on every write
+        self.db.execute("CREATE TABLE IF NOT EXISTS query_cache_size (id INTEGER PRIMARY KEY, size INTEGER NOT NULL)")
+        self.db.execute(
+            "INSERT OR IGNORE INTO query_cache_size (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM query_cache"
+        )
+
+    def get(self, key: str) -> Union[tuple[float, bytes], None]:
+        with self.lock:
+            row = self.db.execute("SELECT stored_at, content FROM query_cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else (row[0], bytes(row[1]))
+
+    def set(self, key: str, stored_at: float, content: bytes):
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self._delete(key)
+            if len(content) > self.max_bytes:
+                return
+            self.db.execute(
+                "INSERT INTO query_cache (key, stored_at, size, content) VALUES (?, ?, ?, ?)",
+                (key, stored_at, len(content), content),
+            )
+            self.db.execute("UPDATE query_cache_size SET size = size + ? WHERE id = 0", (len(content),))
+            size = self.db.execute("SELECT size FROM query_cache_size WHERE id = 0").fetchone()[0]
+            while size > self.max_bytes:
+                oldest = self.db.execute("SELECT key FROM query_cache ORDER BY stored_at LIMIT 1").fetchone()[0]
+                size -= self._delete(oldest)
+
+    def delete(self, key: str):
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self._delete(key)
+
+    def clear(self):
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute("DELETE FROM query_cache")
+            self.db.execute("UPDATE query_cache_size SET size = 0 WHERE id = 0")
+
+    def get_generation(self, table: str) -> int:
+        with self.lock:
+            row = self.db.execute("SELECT generation FROM query_cache_generations WHERE tbl = ?", (table,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def increment_generation(self, table: str):
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO query_cache_generations (tbl, generation) VALUES (?, 1) "
+                "ON CONFLICT (tbl) DO UPDATE SET generation = generation + 1",
+                (table,),
+            )
+
+    def _delete(self, key: str) -> int:
+        """
+        Delete an entry in the open transaction
+
+        :returns int bytes freed
+        """
+        row = self.db.execute("SELECT size FROM query_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return 0
+        self.db.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+        self.db.execute("UPDATE query_cache_size SET size = size - ? WHERE id = 0", (row[0],))
+        return row[0]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class QueryCache(object):
+    """
+    Cache for the results of `data().query()`, `data().aggregate()` and `data().summarize()`.
+    Entries are keyed by a hash of the database branch, table, endpoint and the normalized
+    payload: keys are sorted, defaults and the short forms of `sort` are expanded. Writes
+    through a client sharing the backend make the cached results of the table unreachable,
+    SQL statements other than `SELECT`, `SHOW` and `EXPLAIN` those of the whole branch.
+    With `stale_ttl`, expired results are still served for that long while a background
+    request refreshes them.
+
+    Pass an instance to the client to enable it:
+    `XataClient(query_cache=QueryCache(ttl=10, stale_ttl=60))`
+    """
+
+    def __init__(
+        self,
+        ttl: float = QUERY_CACHE_DEFAULT_TTL,
+        stale_ttl: float = 0,
+        max_bytes: int = QUERY_CACHE_DEFAULT_MAX_BYTES,
+        backend: QueryCacheBackend = None,
+    ):
+        """
+        :param ttl: float Seconds a result is fresh (default: 30)
+        :param stale_ttl: float Seconds after the ttl a result is served while it is refreshed (default: 0)
+        :param max_bytes: int Maximum size of the default memory backend (default: 64 MiB)
+        :param backend: QueryCacheBackend Storage, defaults to MemoryQueryCacheBackend
+
+        :raises Exception if a time to live is invalid
+        """
+        if ttl <= 0:
+            raise Exception("time to live must be greater than 0, default: %f" % QUERY_CACHE_DEFAULT_TTL)
+        if stale_ttl < 0:
+            raise Exception("stale time to live can not be negative, default: 0")
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.backend = MemoryQueryCacheBackend(max_bytes) if backend is None else backend
+
+        self.lock = Lock()
+        self.refreshing = set()
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+    def lookup(self, http_method: str, url_path: str, payload: dict = None):
+        """
+        Get the cached result of a query request
+
+        :param http_method: str
+        :param url_path: str
+        :param payload: dict = None
+
+        :returns tuple of the cached response or None, and a token. A token next to a
+            cached response asks to refresh the entry in the background.
+        """
+        token = self._token(http_method, url_path, payload)
+        if token is None:
+            return None, None
+        entry = self.backend.get(token[0])
+        age = None if entry is None else time.time() - entry[0]
+        with self.lock:
+            if age is not None and age < self.ttl:
+                self.counters["hits"] += 1
+                return CachedResponse(entry[1]), None
+            if age is not None and age < self.ttl + self.stale_ttl:
+                self.counters["stale_hits"] += 1
+                if token[0] in self.refreshing:
+                    return CachedResponse(entry[1]), None
+                self.refreshing.add(token[0])
+                self.counters["refreshes"] += 1
+                return CachedResponse(entry[1]), token
+            self.counters["misses"] += 1
+        return None, token
+
+    def store(self, token: tuple, response):
+        """
+        Cache a successful query response. Skipped if the table was written to since the lookup.
+
+        :param token: tuple returned by `lookup()`
+        :param response: requests.Response | httpx.Response
+        """
+        if token is None or response.status_code != 200:
+            return
+        key, table, generation = token
+        if self._generation(table) != generation:
+            return
+        self.backend.set(key, time.time(), response.content)
+
+    def release(self, token: tuple):
+        """
+        Mark a background refresh as done
+
+        :param token: tuple returned by `lookup()`
+        """
+        if token is not None:
+            with self.lock:
+                self.refreshing.discard(token[0])
+
+    def invalidate_request(self, http_method: str, url_path: str, payload: dict = None):
+        """
+        Drop the cached results of the tables a request writes to
+
+        :param http_method: str
+        :param url_path: str
+        :param payload: dict = None Request body, for transactions and SQL statements
+        """
+        if http_method == "GET" or QUERY_PATH.match(url_path):
+            return
+        m = SQL_PATH.match(url_path)
+        if m is not None:
+            if not SQL_READ_ONLY.match((payload or {}).get("statement") or ""):
+                self.invalidate_branch(m.group("db_branch"))
+            return
+        m = TABLE_WRITE_PATH.match(url_path)
+        if m is not None:
+            self.invalidate(m.group("db_branch"), unquote(m.group("table")))
+            return
+        m = TRANSACTION_PATH.match(url_path)
+        if m is not None and payload:
+            tables = set()
+            for op in payload.get("operations", []):
+                for kind, params in op.items():
+                    if kind != "get" and isinstance(params, dict) and "table" in params:
+                        tables.add(params["table"])
+            for table_name in tables:
+                self.invalidate(m.group("db_branch"), table_name)
+
+    def invalidate(self, db_branch: str, table_name: str):
+        """
+        Drop the cached results of a table
+
+        :param db_branch: str Database and branch name as `db:branch`
+        :param table_name: str
+        """
+        self.backend.increment_generation("%s/%s" % (db_branch, table_name))
+
+    def invalidate_branch(self, db_branch: str):
+        """
+        Drop the cached results of all tables of a branch
+
+        :param db_branch: str Database and branch name as `db:branch`
+        """
+        self.backend.increment_generation(db_branch)
+
+    def clear(self):
+        """
+        Drop all cached results
+        """
+        self.backend.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Get hit, stale hit, miss and refresh counters
+
+        :returns dict
+        """
+        with self.lock:
+            return dict(self.counters)
+
+    def _token(self, http_method: str, url_path: str, payload: dict) -> tuple:
+        if http_method != "POST":
+            return None
+        m = QUERY_PATH.match(url_path)
+        if m is None:
+            return None
+        table = "%s/%s" % (m.group("db_branch"), unquote(m.group("table")))
+        generation = self._generation(table)
+        canonical = orjson.dumps(
+            [table, generation, m.group("endpoint"), self._normalize(m.group("endpoint"), payload)],
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+        return hashlib.sha256(canonical).hexdigest(), table, generation
+
+    def _generation(self, table: str) -> list:
+        """
+        Writes seen to the table and to its whole branch
+        """
+        return [self.backend.get_generation(table.split("/")[0]), self.backend.get_generation(table)]
+
+    @staticmethod
+    def _normalize(endpoint: str, payload: dict) -> dict:
+        """
+        Payload of a query with the defaults removed and `sort` as a list of `{column: direction}`,
+        so equivalent queries share an entry
+        """
+        payload = dict(payload or {})
+        for key in ("filter", "page"):
+            if not payload.get(key):
+                payload.pop(key, None)
+        if endpoint != "query":
+            return payload
+        if payload.get("columns") == QUERY_DEFAULT_COLUMNS:
+            del payload["columns"]
+        page = payload.get("page")
+        if page is not None and page.get("size") == QUERY_DEFAULT_PAGE_SIZE:
+            page = {k: v for k, v in page.items() if k != "size"}
+            if page:
+                payload["page"] = page
+            else:
+                del payload["page"]
+        sort = payload.get("sort")
+        if sort is not None:
+            items = sort if isinstance(sort, list) else [sort]
+            normalized = []
+            for item in items:
+                if isinstance(item, str):
+                    normalized.append({item: "asc"})
+                elif isinstance(item, dict):
+                    normalized += [{column: direction} for column, direction in item.items()]
+                else:
+                    normalized.append(item)
+            if normalized:
+                payload["sort"] = normalized
+            else:
+                del payload["sort"]
+        return payload
@@ -17,25 +17,33 @@
 # under the License.
 #
 
-import json
+import copy
 import os
 import uuid
-from typing import Literal
-
-from dotenv import dotenv_values
-
-from .api.authentication import Authentication
-from .api.branch import Branch
-from .api.databases import Databases
-from .api.files import Files
-from .api.invites import Invites
-from .api.migrations import Migrations
-from .api.records import Records
-from .api.search_and_filter import SearchAndFilter
-from .api.sql import Sql
-from .api.table import Table
-from .api.users import Users
-from .api.workspaces import Workspaces
+from importlib import import_module
+from typing import TYPE_CHECKING, Literal
+
+from . import config as config_files
+from .transport import Transport
+
+if TYPE_CHECKING:
+    from .api.authentication import Authentication
+    from .api.branch import Branch
+    from .api.databases import Databases
+    from .api.files import Files
+    from .api.invites import Invites
+    from .api.migrations import Migrations
+    from .api.records import Records
+    from .api.search_and_filter import SearchAndFilter
+    from .api.sql import Sql
+    from .api.table import Table
+    from .api.users import Users
+    from .api.workspaces import Workspaces
+    from .cache import QueryCache, RecordCache
+    from .compression import Compressor
+    from .hooks import Hook
+    from .metrics import Metrics
+    from .retry import RetryPolicy
 
 # TODO this is a manual task, to keep in sync with pyproject.toml
 # could/should be automated to keep in sync
@@ -48,6 +56,22 @@ DEFAULT_REGION = "us-east-1"
 DEFAULT_BRANCH_NAME = "main"
 CONFIG_LOCATION = ".xatarc"
 
+# API namespaces, the modules are imported on first access
+NAMESPACES = {
+    "authentication": ("xata.api.authentication", "Authentication"),
+    "branch": ("xata.api.branch", "Branch"),
+    "databases": ("xata.api.databases", "Databases"),
+    "files": ("xata.api.files", "Files"),
+    "invites": ("xata.api.invites", "Invites"),
+    "migrations": ("xata.api.migrations", "Migrations"),
+    "records": ("xata.api.records", "Records"),
+    "search_and_filter": ("xata.api.search_and_filter", "SearchAndFilter"),
+    "sql": ("xata.api.sql", "Sql"),
+    "table": ("xata.api.table", "Table"),
+    "users": ("xata.api.users", "Users"),
+    "workspaces": ("xata.api.workspaces", "Workspaces"),
+}
+
 ApiKeyLocation = Literal["env", "dotenv", "profile", "parameter"]
 WorkspaceIdLocation = Literal["parameter", "env", "config"]
 
@@ -72,10 +96,27 @@ class XataClient:
     :param branch_name: The branch name to use. Defaults to `main`
     :param domain_core: The domain to use for "core", the control plane. Defaults to api.xata.io.
     :param domain_workspace: The domain to use for "workspace", data plane. Defaults to xata.sh.
+    :param lazy_parse_threshold: Response bodies of this size in bytes or larger are only parsed when their
+                                 content is first accessed. Defaults to None, every body is parsed right away.
+    :param transport: The pooled HTTP transport shared by all namespaces. Defaults to a Transport with default
+                      pool size and timeouts. A transport passed in is not closed by `close()`.
+    :param record_cache: Read-through cache for `records().get()`, invalidated by writes through this client.
+                         Defaults to None, no caching.
+    :param query_cache: Cache for query, aggregate and summarize results, invalidated by writes through this
+                        client. Defaults to None, no caching.
+    :param retry_policy: Retries with backoff and a circuit breaker for every request of this client.
+                         Defaults to None, errors are raised right away.
+    :param compression: Compress request bodies above a size threshold and ask for compressed responses.
+                        Defaults to None, no compression.
+    :param hooks: Hooks called before a request is sent and after its response or error, see `add_hook`.
+                  Defaults to None, no hooks.
+    :param metrics: Request counters and latency histograms per namespace method, see `get_metrics`.
+                    Defaults to None, no metrics.
     """
 
     config_read: bool = False
     config = None
+    namespaces = NAMESPACES
 
     def __init__(
         self,
@@ -87,6 +128,14 @@ class XataClient:
         branch_name: str = DEFAULT_BRANCH_NAME,
         domain_core: str = DEFAULT_CONTROL_PLANE_DOMAIN,
         domain_workspace: str = DEFAULT_DATA_PLANE_DOMAIN,
+        lazy_parse_threshold: int = None,
+        transport: Transport = None,
+        record_cache: "RecordCache" = None,
+        query_cache: "QueryCache" = None,
+        retry_policy: "RetryPolicy" = None,
+        compression: "Compressor" = None,
+        hooks: list = None,
+        metrics: "Metrics" = None,
     ):
         """
         Constructor for the XataClient.
@@ -119,6 +168,15 @@ class XataClient:
 
         self.domain_core = domain_core
         self.domain_workspace = domain_workspace
+        self.lazy_parse_threshold = lazy_parse_threshold
+        self.record_cache = record_cache
+        self.query_cache = query_cache
+        self.retry_policy = retry_policy
+        self.compression = compression
+        self.hooks = [] if hooks is None else list(hooks)
+        self.metrics = metrics
+        if metrics is not None:
+            self.hooks.append(metrics)
 
         # init default headers
         self.headers = {
@@ -131,21 +189,93 @@ class XataClient:
             "x-xata-agent": f"client=PY_SDK; version={__version__}",
         }
 
-        # init namespaces
-        self._authentication = Authentication(self)
-        self._branch = Branch(self)
-        self._search_and_filter = SearchAndFilter(self)
-        self._databases = Databases(self)
-        self._files = Files(self)
-        self._invites = Invites(self)
-        self._migrations = Migrations(self)
-        self._records = Records(self)
-        self._sql = Sql(self)
-        self._table = Table(self)
-        self._users = Users(self)
-        self._workspaces = Workspaces(self)
-
-    def get_config(self) -> dict:
+        # one connection pool for all namespaces
+        self.transport = Transport() if transport is None else transport
+        # a transport passed in can be shared with other clients, its owner closes it
+        self._owns_transport = transport is None
+
+        if compression is not None:
+            self.headers["accept-encoding"] = self.transport.accept_encoding
+
+        self._namespaces = {}
+
+    def clone(self, db_name: str = None, branch_name: str = None) -> "XataClient":
+        """
+        Create a client for another database or branch that reuses the resolved
+        configuration, headers, caches and the transport of this client. Nothing
+        is read from the environment or disk, so it is cheap enough to create a
+        client per request. Closing a clone does not close the shared transport.
+
+        :param db_name: str Defaults to the database name of this client
+        :param branch_name: str Defaults to the branch name of this client
+
+        :returns XataClient of the same type as this client
+        """
+        client = copy.copy(self)
+        client.headers = dict(self.headers)
+        client.hooks = list(self.hooks)
+        client._namespaces = {}
+        client._owns_transport = False
+        client.set_db_and_branch_names(db_name, branch_name)
+        return client
+
+    def _namespace(self, name: str):
+        """
+        Get an API namespace, its module is imported and the namespace created on first access
+
+        :param name: str Key of `namespaces`
+        """
+        ns = self._namespaces.get(name)
+        if ns is None:
+            module, cls = self.namespaces[name]
+            ns = self._namespaces.setdefault(name, getattr(import_module(module), cls)(self))
+        return ns
+
+    def add_hook(self, hook: "Hook"):
+        """
+        Register a hook, called for every request sent by the namespaces of this client
+
+        :param hook: Hook
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: "Hook") -> bool:
+        """
+        Unregister a hook
+
+        :param hook: Hook
+        :returns bool False if the hook was not registered
+        """
+        if hook not in self.hooks:
+            return False
+        self.hooks.remove(hook)
+        return True
+
+    def get_metrics(self, reset: bool = False) -> dict:
+        """
+        Request counters and latency percentiles per namespace method, e.g. `data.query`.
+        Requires the client to be created with `metrics`.
+
+        :param reset: bool Start over after the snapshot (default: False)
+
+        :returns dict empty if the client has no metrics
+        """
+        return {} if self.metrics is None else self.metrics.get_metrics(reset)
+
+    def close(self):
+        """
+        Close the pooled connections of the transport
+        """
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self) -> "XataClient":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_config(self) -> "dict":
         """
         Get the configuration
         """
@@ -173,7 +303,7 @@ class XataClient:
     def get_workspace_id(self) -> str:
         return self.get_config()["workspaceId"]
 
-    def get_headers(self) -> dict:
+    def get_headers(self) -> "dict":
         """
         Get the static headers that are iniatilized on client init.
         """
@@ -205,13 +335,13 @@ class XataClient:
         if os.environ.get("XATA_API_KEY") is not None:
             return os.environ.get("XATA_API_KEY"), "env"
 
-        env_vals = dotenv_values(".env")
+        env_vals = config_files.read_dotenv(".env")
         if env_vals.get("XATA_API_KEY") is not None:
             return env_vals.get("XATA_API_KEY"), "dotenv"
 
-        if os.path.isfile(os.path.expanduser(PERSONAL_API_KEY_LOCATION)):
-            with open(os.path.expanduser(PERSONAL_API_KEY_LOCATION), "r") as f:
-                return f.read().strip(), "profile"
+        api_key = config_files.read_api_key_file(PERSONAL_API_KEY_LOCATION)
+        if api_key is not None:
+            return api_key, "profile"
 
         raise Exception(
             f"No API key found. Searched in `XATA_API_KEY` env, "
@@ -226,7 +356,7 @@ class XataClient:
                 "env",
             )
 
-        env_vals = dotenv_values(".env")
+        env_vals = config_files.read_dotenv(".env")
         if env_vals.get("XATA_WORKSPACE_ID") is not None:
             return (
                 env_vals.get("XATA_WORKSPACE_ID"),
@@ -285,9 +415,9 @@ class XataClient:
     def ensure_config_read(self) -> bool:
         if self.config_read:
             return False
-        if os.path.isfile(CONFIG_LOCATION):
-            with open(CONFIG_LOCATION, "r") as f:
-                self.config = json.load(f)
+        config = config_files.read_xatarc(CONFIG_LOCATION)
+        if config is not None:
+            self.config = config
         self.config_read = True
         return True
 
@@ -321,78 +451,78 @@ class XataClient:
         # does not have a branch defined
         return host_parts[0], host_parts[1], db_branch_parts[0], DEFAULT_BRANCH_NAME, domain
 
-    def authentication(self) -> Authentication:
+    def authentication(self) -> "Authentication":
         """
         :returns Authentication
         """
-        return self._authentication
+        return self._namespace("authentication")
 
-    def databases(self) -> Databases:
+    def databases(self) -> "Databases":
         """
         :returns Databases
         """
-        return self._databases
+        return self._namespace("databases")
 
-    def invites(self) -> Invites:
+    def invites(self) -> "Invites":
         """
         :returns Invites
         """
-        return self._invites
+        return self._namespace("invites")
 
-    def users(self) -> Users:
+    def users(self) -> "Users":
         """
         :returns Users
         """
-        return self._users
+        return self._namespace("users")
 
-    def workspaces(self) -> Workspaces:
+    def workspaces(self) -> "Workspaces":
         """
         :returns Workspaces
         """
-        return self._workspaces
+        return self._namespace("workspaces")
 
-    def branch(self) -> Branch:
+    def branch(self) -> "Branch":
         """
         :returns Branch
         """
-        return self._branch
+        return self._namespace("branch")
 
-    def migrations(self) -> Migrations:
+    def migrations(self) -> "Migrations":
         """
         :returns Migrations
         """
-        return self._migrations
+        return self._namespace("migrations")
 
-    def records(self) -> Records:
+    def records(self) -> "Records":
         """
         :returns Records
         """
-        return self._records
+        return self._namespace("records")
 
-    def search_and_filter(self) -> SearchAndFilter:
+    def search_and_filter(self) -> "SearchAndFilter":
         """
         :returns Search_and_filter
         """
-        return self._search_and_filter
+        return self._namespace("search_and_filter")
 
-    def data(self) -> SearchAndFilter:
+    def data(self) -> "SearchAndFilter":
         """
         Shorter alias for Search_and_Filter
         :returns Search_and_filter
         """
-        return self._search_and_filter
+        return self._namespace("search_and_filter")
 
-    def table(self) -> Table:
+    def table(self) -> "Table":
         """
         :returns Table
         """
-        return self._table
+        return self._namespace("table")
 
-    def files(self) -> Files:
+    def files(self) -> "Files":
         """
         :returns Files
         """
-        return self._files
+        return self._namespace("files")
 
-    def sql(self) -> Sql:
-        return self._sql
+    def sql(self) -> "Sql":
+        return self._namespace("sql")
@@ -0,0 +1,112 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import gzip
+import threading
+
+COMPRESSION_ENCODINGS = ("gzip", "zstd")
+COMPRESSION_DEFAULT_THRESHOLD = 4096
+COMPRESSION_DEFAULT_LEVELS = {"gzip": 5, "zstd": 3}
+# above this size the async client compresses in a worker thread
+COMPRESSION_OFFLOAD_THRESHOLD = 65536
+
+
+class Compressor(object):
+    """
+    Compression of JSON request bodies, opt-in by passing it to the client.
+    Bodies of `threshold` bytes or more are sent with a `content-encoding`
+    header, and the client asks for compressed responses with every encoding
+    its HTTP library can decode:
+
+    .. code-block:: python
+
+        xata = XataClient(compression=Compressor("gzip", threshold=4096))
+
+    zstd requires the optional dependency `zstandard`, install it with:
+    `pip install xata[zstd]`. Large bodies are compressed in a worker thread
+    by the async client, so the event loop keeps serving other requests.
+    """
+
+    def __init__(self, encoding: str = "gzip", threshold: int = COMPRESSION_DEFAULT_THRESHOLD, level: int = None):
+        """
+        :param encoding: str gzip or zstd (default: gzip)
+        :param threshold: int Minimum body size in bytes to compress (default: 4096)
+        :param level: int Compression level, higher is smaller and slower (default: gzip 5, zstd 3)
+
+        :raises Exception if zstd is requested and zstandard is not installed
+        """
+        if encoding not in COMPRESSION_ENCODINGS:
+            raise Exception("encoding must be one of: %s" % ", ".join(COMPRESSION_ENCODINGS))
+        if threshold < 0:
+            raise Exception("threshold must be 0 or greater, default: %d" % COMPRESSION_DEFAULT_THRESHOLD)
+        if encoding == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise Exception("zstd compression requires zstandard, please install it with: pip install xata[zstd]")
+            self.zstandard = zstandard
+
+        self.encoding = encoding
+        self.threshold = threshold
+        self.level = COMPRESSION_DEFAULT_LEVELS[encoding] if level is None else level
+        # zstd compressors must not be shared between threads
+        self.local = threading.local()
+        self.stats = {"requests": 0, "bytes_in": 0, "bytes_out": 0}
+        self.lock = threading.Lock()
+
+    def should_compress(self, headers: dict, data: bytes) -> bool:
+        """
+        Is the body large enough and not encoded yet?
+
+        :param headers: dict Request headers
+        :param data: bytes Request body
+
+        :returns bool
+        """
+        return data is not None and len(data) >= self.threshold and "content-encoding" not in headers
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        :param data: bytes
+
+        :returns bytes
+        """
+        if self.encoding == "gzip":
+            # mtime=0 keeps the output deterministic
+            out = gzip.compress(data, compresslevel=self.level, mtime=0)
+        else:
+            if getattr(self.local, "zstd", None) is None:
+                self.local.zstd = self.zstandard.ZstdCompressor(level=self.level)
+            out = self.local.zstd.compress(data)
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_in"] += len(data)
+            self.stats["bytes_out"] += len(out)
+        return out
+
+    def get_stats(self) -> dict:
+        """
+        Amount of compressed requests and their size before and after compression
+
+        :returns dict
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        stats["ratio"] = stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else None
+        return stats
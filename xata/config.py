@@ -0,0 +1,112 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import json
+import os
+import threading
+
+from dotenv import dotenv_values
+
+# resolved configuration files, shared by every client in the process:
+# absolute path -> ((mtime_ns, size), value)
+_files = {}
+_lock = threading.Lock()
+
+
+def _signature(path: str):
+    """
+    Identify the current version of a file by modification time and size
+
+    :param path: str Absolute path of the file
+    :returns tuple or None if the file does not exist
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached(path: str, parse) -> any:
+    """
+    Read and parse a file once, and again only after it was modified
+
+    :param path: str Path of the file, relative paths are resolved against the current working directory
+    :param parse: callable Receives the absolute path, returns the parsed content
+    :returns the parsed content, None if the file does not exist
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    sig = _signature(path)
+    entry = _files.get(path)
+    if entry is not None and entry[0] == sig:
+        return entry[1]
+    value = parse(path) if sig is not None else None
+    with _lock:
+        _files[path] = (sig, value)
+    return value
+
+
+def read_dotenv(path: str = ".env") -> dict:
+    """
+    Values of a dotenv file
+
+    :param path: str Defaults to .env in the current working directory
+    :returns dict empty if the file does not exist
+    """
+    return _cached(path, dotenv_values) or {}
+
+
+def read_api_key_file(path: str) -> str:
+    """
+    API key stored in a personal key file
+
+    :param path: str
+    :returns str or None if the file does not exist
+    """
+
+    def parse(p):
+        with open(p, "r") as f:
+            return f.read().strip()
+
+    return _cached(path, parse)
+
+
+def read_xatarc(path: str) -> dict:
+    """
+    Content of a .xatarc configuration file
+
+    :param path: str
+    :returns dict or None if the file does not exist
+    """
+
+    def parse(p):
+        with open(p, "r") as f:
+            return json.load(f)
+
+    return _cached(path, parse)
+
+
+def reload():
+    """
+    Forget every resolved configuration file, the next client reads them again.
+    Files are re-read on modification anyway, this is only needed if a file was
+    replaced within the resolution of its modification time.
+    """
+    with _lock:
+        _files.clear()
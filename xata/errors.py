@@ -23,7 +23,19 @@ class UnauthorizedError(Exception):
 
 
 class RateLimitError(Exception):
-    pass
+    retry_after: float
+
+    def __init__(self, message: str = "rate limited", retry_after: float = None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class QueueFullError(Exception):
+    queued: int
+
+    def __init__(self, message: str, queued: int = 0):
+        self.queued = queued
+        super().__init__(message)
 
 
 class XataServerError(Exception):
@@ -37,3 +49,16 @@ class XataServerError(Exception):
 
     def __str__(self) -> str:
         return f"Server error: {self.status_code} {self.message}"
+
+
+class CircuitOpenError(XataServerError):
+    """
+    Raised without sending the request, while the circuit breaker of the
+    retry policy considers the host unhealthy
+    """
+
+    retry_in: float
+
+    def __init__(self, host: str, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(503, "circuit open for %s, retry in %.1f s" % (host, retry_in))
@@ -18,23 +18,54 @@
 #
 
 import logging
+import mmap
+import os
+import queue
+import random
+import struct
 import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from threading import Lock, Thread
+from threading import Condition, Event, Lock, Thread
+from typing import Iterator
+
+import orjson
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import Timeout as RequestsTimeout
 
 from xata.api_response import ApiResponse
 
 from .client import XataClient
+from .errors import QueueFullError, RateLimitError, XataServerError
 
 BP_DEFAULT_THREAD_POOL_SIZE = 4
 BP_DEFAULT_BATCH_SIZE = 50
 BP_DEFAULT_FLUSH_INTERVAL = 2
 BP_DEFAULT_PROCESSING_TIMEOUT = 0.05
 BP_DEFAULT_THROW_EXCEPTION = False
-BP_VERSION = "0.3.1"
+BP_DEFAULT_TARGET_LATENCY = 2.0
+BP_DEFAULT_RETRY_AFTER = 1.0
+BP_MAX_BATCH_SIZE = 1000
+BP_BATCH_SIZE_STEP = 10
+BP_DEFAULT_MAX_RETRIES = 3
+BP_DEFAULT_RETRY_BACKOFF = 0.5
+BP_MAX_RETRY_BACKOFF = 30.0
+BP_SPOOL_SEGMENT_SIZE = 16 * 1024 * 1024
+BP_SPOOL_MEMORY_RECORDS = 10_000
+BP_VERSION = "0.7.0"
 TRX_MAX_OPERATIONS = 1000
 TRX_VERSION = "0.1.0"
 TRX_BACKOFF = 0.1
+TRX_DEFAULT_CONCURRENCY = 4
+SCAN_DEFAULT_PARTITIONS = 4
+SCAN_DEFAULT_COLUMN = "id"
+SCAN_PAGE_SIZE = 200
+SCAN_QUEUE_TIMEOUT = 0.1
+SCAN_VERSION = "0.1.0"
+LOADER_DEFAULT_WAIT = 0.002
+LOADER_DEFAULT_MAX_BATCH_SIZE = 200
+LOADER_VERSION = "0.1.0"
 
 
 class BulkProcessor(object):
@@ -52,6 +83,19 @@ class BulkProcessor(object):
         flush_interval: int = BP_DEFAULT_FLUSH_INTERVAL,
         processing_timeout: float = BP_DEFAULT_PROCESSING_TIMEOUT,
         throw_exception: bool = BP_DEFAULT_THROW_EXCEPTION,
+        max_queue_size: int = None,
+        max_queue_size_per_table: int = None,
+        max_queue_bytes: int = None,
+        max_queue_bytes_per_table: int = None,
+        adaptive: bool = False,
+        target_latency: float = BP_DEFAULT_TARGET_LATENCY,
+        max_batch_size: int = BP_MAX_BATCH_SIZE,
+        max_retries: int = BP_DEFAULT_MAX_RETRIES,
+        retry_backoff: float = BP_DEFAULT_RETRY_BACKOFF,
+        spool_dir: str = None,
+        spool_segment_size: int = BP_SPOOL_SEGMENT_SIZE,
+        spool_fsync: bool = False,
+        spool_memory_records: int = BP_SPOOL_MEMORY_RECORDS,
     ):
         """
         BulkProcessor: Abstraction for bulk ingestion of records.
@@ -60,10 +104,30 @@ class BulkProcessor(object):
 
         :param client: XataClient
         :param thread_pool_size: int How many data queue workers should be deployed (default: 4)
-        :param batch_size: int How many records per table should be pushed as batch (default: 25)
-        :param flush_interval: int After how many seconds should the per table queue be flushed (default: 5 seconds)
-        :processing_timeout: float Cooldown period between batches (default: 0.025 seconds)
+        :param batch_size: int How many records per table should be pushed as batch (default: 50)
+        :param flush_interval: int After how many seconds should the per table queue be flushed (default: 2 seconds)
+        :processing_timeout: float Deprecated, workers are woken up as soon as a batch is ready (default: 0.05 seconds)
         :throw_exception: bool Throw exception ingestion, could kill all workers (default: False)
+        :max_queue_size: int Maximum amount of queued records across all tables, None is unbounded (default: None)
+        :max_queue_size_per_table: int Maximum amount of queued records per table, None is unbounded (default: None)
+        :max_queue_bytes: int Maximum size of the queued records in bytes, serialized as JSON. None is
+            unbounded (default: None)
+        :max_queue_bytes_per_table: int Maximum size of the queued records of one table in bytes, so a busy
+            table can not take the whole `max_queue_bytes` from the others. None is unbounded (default: None)
+        :adaptive: bool Adapt the concurrency and batch size to the observed latency and rate limits, the
+            thread pool size and batch size are the starting values (default: False)
+        :target_latency: float Seconds a bulk request may take before the batch size is reduced (default: 2.0)
+        :max_batch_size: int Upper limit for the adaptive batch size (default: 1000)
+        :max_retries: int How often a batch is retried on rate limits, server or connection errors (default: 3)
+        :retry_backoff: float Base delay in seconds of the exponential backoff between retries (default: 0.5)
+        :spool_dir: str Directory of a spool for queued records. Records left over from a previous run are
+            queued again on start. Failed records stay in the spool until `get_failed_batches()` returned them.
+            None keeps records in memory only (default: None)
+        :spool_segment_size: int Size in bytes of a spool segment file (default: 16 MiB)
+        :spool_fsync: bool Sync the spool to disk on every write, slower but safe against power loss (default: False)
+        :spool_memory_records: int Queued records per table kept in memory with a spool, further records are
+            only kept on disk and read back by the workers. A burst larger than the memory is absorbed by the
+            spool, only a reference of each record stays in memory (default: 10000)
 
         :raises Exception if throw exception is enabled
         """
@@ -75,6 +139,26 @@ class BulkProcessor(object):
             raise Exception("flush interval can not be negative, default: %f" % BP_DEFAULT_FLUSH_INTERVAL)
         if batch_size < 1:
             raise Exception("batch size can not be less than one, default: %d" % BP_DEFAULT_BATCH_SIZE)
+        for name, limit in [
+            ("max queue size", max_queue_size),
+            ("max queue size per table", max_queue_size_per_table),
+            ("max queue bytes", max_queue_bytes),
+            ("max queue bytes per table", max_queue_bytes_per_table),
+        ]:
+            if limit is not None and limit < 1:
+                raise Exception("%s must be greater than 0 or None, default: None" % name)
+        if target_latency <= 0:
+            raise Exception("target latency must be greater than 0, default: %f" % BP_DEFAULT_TARGET_LATENCY)
+        if max_batch_size < batch_size:
+            raise Exception("max batch size can not be less than the batch size, default: %d" % BP_MAX_BATCH_SIZE)
+        if max_retries < 0:
+            raise Exception("max retries can not be negative, default: %d" % BP_DEFAULT_MAX_RETRIES)
+        if retry_backoff < 0:
+            raise Exception("retry backoff can not be negative, default: %f" % BP_DEFAULT_RETRY_BACKOFF)
+        if spool_segment_size < 1024:
+            raise Exception("spool segment size can not be less than 1024 bytes, default: %d" % BP_SPOOL_SEGMENT_SIZE)
+        if spool_memory_records < 0:
+            raise Exception("spool memory records can not be negative, default: %d" % BP_SPOOL_MEMORY_RECORDS)
 
         self.client = client
         telemetry = "%s; helper=bp:%s" % (self.client.get_headers()["x-xata-agent"], BP_VERSION)
@@ -84,113 +168,290 @@ class BulkProcessor(object):
         self.batch_size = batch_size
         self.flush_interval = flush_interval
         self.failed_batches_queue = []
+        # spool references of failed records, acknowledged once the failures are handed out
+        self.failed_refs = []
         self.throw_exception = throw_exception
-
-        self.stats = {"total": 0, "queue": 0, "failed_batches": 0, "total_batches": 0, "tables": {}}
+        self.adaptive = adaptive
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.stats = {
+            "total": 0,
+            "queue": 0,
+            "queue_bytes": 0,
+            "queue_fill": 0.0,
+            "failed_batches": 0,
+            "total_batches": 0,
+            "retries": 0,
+            "recovered": 0,
+            "tables": {},
+        }
         self.stats_lock = Lock()
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
         self.thread_workers = []
-        self.worker_active = True
-        self.records = self.Records(self.batch_size, self.flush_interval, self.logger)
+        self.spool = None
+        if spool_dir is not None:
+            self.spool = self.Spool(spool_dir, spool_segment_size, spool_fsync, self.logger)
+        self.records = self.Records(
+            self.batch_size,
+            self.flush_interval,
+            self.logger,
+            max_records=max_queue_size,
+            max_records_per_table=max_queue_size_per_table,
+            max_bytes=max_queue_bytes,
+            max_bytes_per_table=max_queue_bytes_per_table,
+            spool=self.spool,
+            memory_records=spool_memory_records,
+        )
+        self.throttle = self.Throttle(
+            self.records,
+            thread_pool_size,
+            batch_size,
+            max_batch_size,
+            target_latency,
+            adaptive,
+            self.logger,
+        )
 
         for i in range(thread_pool_size):
             worker = Thread(target=self.process, daemon=True, args=(i,), name="worker-%d" % i)
             worker.start()
             self.thread_workers.append(worker)
 
+        if self.spool is not None:
+            self._recover()
+
+    def _recover(self):
+        """
+        Queue the records of the spool that were not processed by a previous run
+        """
+        recovered = 0
+        for pending in self.spool.recover():
+            start = 0
+            while start < len(pending):
+                # keep the order, group consecutive records of the same table
+                end = start
+                while end < len(pending) and pending[end][1] == pending[start][1]:
+                    end += 1
+                chunk = pending[start:end]
+                self.records.put(chunk[0][1], [e[2] for e in chunk], refs=[e[0] for e in chunk])
+                start = end
+            recovered += len(pending)
+        if recovered:
+            self.logger.info("recovered %d records from spool %s" % (recovered, self.spool.directory))
+        with self.stats_lock:
+            self.stats["recovered"] = recovered
+
     def process(self, id: int):
         """
-        Process the records
+        Process the records. Workers block until a batch is ready, either a table
+        reached the batch size or its flush interval expired.
         """
         self.logger.debug(
-            "thread #%d: starting bulk processor [thread_pool=%d, batch=%d, flush=%d, processing_timeout=%s"
+            "thread #%d: starting bulk processor [thread_pool=%d, batch=%d, flush=%d]"
             % (
                 id,
                 len(self.thread_workers),
                 self.batch_size,
                 self.flush_interval,
-                self.processing_timeout,
             )
         )
-        while self.worker_active:
-            sleep_backoff = 5  # slow down if no records exist
-            time.sleep(self.processing_timeout * sleep_backoff)
-
-            # process
-            batch = self.records.next_batch()
-            if "table" in batch and len(batch["records"]) > 0:
+        while self.throttle.acquire():
+            try:
+                batch = self.records.next_batch()
+                if batch is None:
+                    # records store closed
+                    return
                 try:
-                    r = self.client.records().bulk_insert(batch["table"], {"records": batch["records"]})
-                    if not r.is_success():
-                        self.logger.error(
-                            "thread #%d: unable to process batch for table '%s', with error: %d - %s"
-                            % (id, batch["table"], r.status_code, r.json())
-                        )
-                        # Add to failed queue
-                        self.failed_batches_queue.append(
-                            {
-                                "timestamp": datetime.utcnow(),
-                                "records": batch["records"],
-                                "table": batch["table"],
-                                "response": r,
-                            }
-                        )
-                        self.stats["failed_batches"] += 1
-                        if self.throw_exception:
-                            raise Exception(r.json())
-
-                    self.logger.debug(
-                        "thread #%d: pushed a batch of %d records to table %s"
-                        % (id, len(batch["records"]), batch["table"])
-                    )
-                    # with self.stats_lock:
-                    self.stats["total"] += len(batch["records"])
-                    self.stats["queue"] = self.records.size()
-                    if batch["table"] not in self.stats["tables"]:
-                        self.stats["tables"][batch["table"]] = 0
-                    self.stats["tables"][batch["table"]] += len(batch["records"])
-                    self.stats["total_batches"] += 1
+                    if batch.get("spilled"):
+                        batch["records"] = batch["records"] + self.spool.read(batch.pop("spilled"))
+                    self.throttle.wait_for_pause()
+                    self._process_batch(id, batch)
                 except Exception as exc:
+                    # records that are not acknowledged are recovered from the spool on the next start
                     logging.error("thread #%d: %s" % (id, exc))
-                sleep_backoff = 1  # keep velocity
+                finally:
+                    self.records.task_done()
+            finally:
+                self.throttle.release()
 
-    def put_record(self, table_name: str, record: dict):
+    def _process_batch(self, id: int, batch: dict):
+        """
+        Persist a batch. Rate limits, server errors and transport errors are retried
+        with exponential backoff. If the request is rejected because of single records,
+        only these are moved to the failed batches and the valid records are resubmitted.
         """
-        Put a record to the processing queue
+        table_name, records, refs = batch["table"], batch["records"], batch.get("refs")
+        attempt = 0
+        while records:
+            start = time.monotonic()
+            try:
+                r = self.client.records().bulk_insert(table_name, {"records": records})
+            except RateLimitError as exc:
+                delay = exc.retry_after if exc.retry_after is not None else self._backoff(attempt)
+                self.throttle.on_rate_limited(delay)
+                if self._retry(id, table_name, records, attempt, exc):
+                    attempt += 1
+                    self.throttle.wait_for_pause()
+                    continue
+                self._fail(id, table_name, records, None, str(exc), refs)
+                return
+            except (XataServerError, RequestsConnectionError, RequestsTimeout) as exc:
+                if self._retry(id, table_name, records, attempt, exc):
+                    time.sleep(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                self._fail(id, table_name, records, None, str(exc), refs)
+                return
+            self.throttle.on_response(time.monotonic() - start, r.is_success())
+
+            if r.is_success():
+                self._succeed(id, table_name, records, refs)
+                return
+            rejected = self._rejected_records(r, len(records))
+            if not rejected:
+                self._fail(id, table_name, records, r, r.error_message, refs)
+                return
+            rejected_refs = [refs[i] for i in rejected] if refs is not None else None
+            self._fail(id, table_name, [records[i] for i in rejected], r, r.error_message, rejected_refs)
+            records = [rec for i, rec in enumerate(records) if i not in rejected]
+            if refs is not None:
+                refs = [ref for i, ref in enumerate(refs) if i not in rejected]
+            if records:
+                self.logger.info(
+                    "thread #%d: resubmitting %d valid records to table '%s'" % (id, len(records), table_name)
+                )
+
+    def _retry(self, id: int, table_name: str, records: list[dict], attempt: int, exc: Exception) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        self.logger.warning(
+            "thread #%d: retrying batch of %d records for table '%s' [attempt=%d]: %s"
+            % (id, len(records), table_name, attempt + 1, exc)
+        )
+        with self.stats_lock:
+            self.stats["retries"] += 1
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with equal jitter, capped at BP_MAX_RETRY_BACKOFF
+        """
+        delay = min(self.retry_backoff * (2**attempt), BP_MAX_RETRY_BACKOFF)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _rejected_records(r: ApiResponse, n: int) -> set[int]:
+        """
+        Indexes of the records a bulk request was rejected for, empty if the
+        request did not fail because of single records.
+        """
+        if r.status_code != 400 or not isinstance(r.get("errors"), list):
+            return set()
+        rejected = set()
+        for err in r["errors"]:
+            if not isinstance(err, dict) or not isinstance(err.get("index"), int) or not 0 <= err["index"] < n:
+                return set()
+            rejected.add(err["index"])
+        return rejected
+
+    def _succeed(self, id: int, table_name: str, records: list[dict], refs: list[tuple] = None):
+        if refs is not None:
+            self.spool.ack(refs)
+        self.logger.debug("thread #%d: pushed a batch of %d records to table %s" % (id, len(records), table_name))
+        with self.stats_lock:
+            self._count(table_name, len(records))
+            self.stats["total_batches"] += 1
+
+    def _fail(self, id: int, table_name: str, records: list[dict], r: ApiResponse, error: str, refs: list = None):
+        self.logger.error(
+            "thread #%d: unable to process %d records for table '%s', with error: %s"
+            % (id, len(records), table_name, error)
+        )
+        # Add to failed queue
+        self.failed_batches_queue.append(
+            {
+                "timestamp": datetime.utcnow(),
+                "records": records,
+                "table": table_name,
+                "response": r,
+                "error": error,
+            }
+        )
+        with self.stats_lock:
+            if refs is not None:
+                self.failed_refs += refs
+            self._count(table_name, len(records))
+            self.stats["failed_batches"] += 1
+        if self.throw_exception:
+            raise Exception(r if r is not None else error)
+
+    def _count(self, table_name: str, n: int):
+        self.stats["total"] += n
+        self.stats["queue"] = self.records.size()
+        if table_name not in self.stats["tables"]:
+            self.stats["tables"][table_name] = 0
+        self.stats["tables"][table_name] += n
+
+    def put_record(self, table_name: str, record: dict, block: bool = True, timeout: float = None):
+        """
+        Put a record to the processing queue. If the queue is at its limit, wait for
+        the workers to make room.
 
         :param table_name: str
         :param record: dict
+        :param block: bool Wait for room in the queue, if False raise right away (default: True)
+        :param timeout: float Maximum seconds to wait for room, None waits forever (default: None)
+
+        :raises QueueFullError if the queue is still full when the timeout expired
         """
-        self.records.put(table_name, [record])
+        self.records.put(table_name, [record], block, timeout)
 
-    def put_records(self, table_name: str, records: list[dict]):
+    def put_records(self, table_name: str, records: list[dict], block: bool = True, timeout: float = None):
         """
-        Put multtiple records to the processing queue
+        Put multtiple records to the processing queue. If the queue is at its limit, wait
+        for the workers to make room. Records are queued in order, as soon as room is
+        available. If the timeout expires, `QueueFullError.queued` tells how many of the
+        records have been queued.
 
         :param table_name: str
         :param records: list[dict]
+        :param block: bool Wait for room in the queue, if False raise right away (default: True)
+        :param timeout: float Maximum seconds to wait for room, None waits forever (default: None)
+
+        :raises QueueFullError if the queue is still full when the timeout expired
         """
-        self.records.put(table_name, records)
+        self.records.put(table_name, records, block, timeout)
 
     def get_failed_batches(self) -> list[dict]:
         """
-        Get the batched records that could not be processed with the error
+        Get the batched records that could not be processed with the error. Each entry
+        has the `table`, `records`, the last `response` (None after a connection error)
+        and the `error` message. With a spool, the returned records are removed from it.
         :returns list[dict]
         """
+        if self.spool is not None:
+            with self.stats_lock:
+                refs, self.failed_refs = self.failed_refs, []
+            if refs:
+                self.spool.ack(refs)
         return self.failed_batches_queue
 
     def get_stats(self):
         """
-        Get processing statistics
+        Get processing statistics. The queue fill level is the share of the tightest
+        queue limit in use, between 0 and 1, and always 0 if the queue is unbounded.
 
         :returns dict
         """
+        with self.stats_lock:
+            self.stats["queue"], self.stats["queue_bytes"], self.stats["queue_fill"] = self.records.fill_level()
+            self.stats["concurrency"], self.stats["batch_size"] = self.throttle.limits()
         return self.stats
 
     def get_queue_size(self) -> int:
-        with self.stats_lock:
-            return self.stats["queue"]
+        return self.records.size()
 
     def flush_queue(self):
         """
@@ -200,98 +461,640 @@ class BulkProcessor(object):
         """
         self.logger.debug("flushing queue with %d records .." % (self.records.size()))
 
-        # force flush the records queue and shorten the processing times
+        # force flush the records queue and wait until every batch is processed
         self.records.force_queue_flush()
+        self.records.join()
+        with self.stats_lock:
+            self.stats["queue"] = self.records.size()
+
+        self.records.close()
+        self.throttle.close()
+        for worker in self.thread_workers:
+            worker.join()
+        if self.spool is not None:
+            self.spool.close()
 
-        # back off to wait for all threads run at least once
-        if self.records.size() == 0 or self.get_queue_size() == 0:
-            time.sleep(self.processing_timeout * len(self.thread_workers))
+    class Throttle(object):
+        """
+        Limits the amount of concurrent bulk requests and the batch size. In adaptive
+        mode both grow additively while requests are fast and shrink multiplicatively
+        on slow requests or rate limits (AIMD). A rate limit also pauses all workers
+        for the time the server asks for.
+        """
 
-        # ensure the full records queue is flushed first
-        while self.records.size() != 0:
-            time.sleep(self.processing_timeout * len(self.thread_workers))
-            self.logger.debug("flushing %d records to processing queue." % self.records.size())
+        def __init__(
+            self,
+            records,
+            concurrency: int,
+            batch_size: int,
+            max_batch_size: int,
+            target_latency: float,
+            adaptive: bool,
+            logger,
+        ):
+            """
+            :param records: BulkProcessor.Records
+            :param concurrency: int Maximum and initial amount of concurrent requests
+            :param batch_size: int Initial batch size
+            :param max_batch_size: int Upper limit of the batch size
+            :param target_latency: float Seconds a request may take before backing off
+            :param adaptive: bool Adapt the limits, otherwise they stay fixed
+            """
+            self.records = records
+            self.max_concurrency = concurrency
+            self.concurrency = concurrency
+            self.batch_size = batch_size
+            self.max_batch_size = max_batch_size
+            self.target_latency = target_latency
+            self.adaptive = adaptive
+            self.logger = logger
 
-        # let's make really sure the queue is empty
-        while self.get_queue_size() > 0:
-            time.sleep(self.processing_timeout * len(self.thread_workers))
-            self.logger.debug("flushing processor queue with %d records." % self.stats["queue"])
+            self.active = 0
+            self.paused_until = 0.0
+            self.closed = False
+            self.lock = Lock()
+            self.slot_available = Condition(self.lock)
 
-        self.worker_active = False
-        for worker in self.thread_workers:
-            worker.join()
+        def acquire(self) -> bool:
+            """
+            Wait for a free request slot, and for a rate limit pause to pass
+
+            :returns bool False if the throttle is closed
+            """
+            with self.lock:
+                while not self.closed:
+                    pause = self.paused_until - time.monotonic()
+                    if pause > 0:
+                        self.slot_available.wait(pause)
+                    elif self.active >= self.concurrency:
+                        self.slot_available.wait()
+                    else:
+                        self.active += 1
+                        return True
+                return False
+
+        def wait_for_pause(self):
+            """
+            Block while a rate limit pause is ongoing
+            """
+            with self.lock:
+                while not self.closed and self.paused_until > time.monotonic():
+                    self.slot_available.wait(self.paused_until - time.monotonic())
+
+        def release(self):
+            with self.lock:
+                self.active -= 1
+                self.slot_available.notify()
+
+        def close(self):
+            with self.lock:
+                self.closed = True
+                self.slot_available.notify_all()
+
+        def limits(self) -> tuple[int, int]:
+            """
+            :returns tuple[int, int] Current concurrency and batch size
+            """
+            with self.lock:
+                return self.concurrency, self.batch_size
+
+        def on_response(self, latency: float, success: bool):
+            """
+            Additive increase on fast successful requests, halve the batch size on slow requests
+
+            :param latency: float Seconds the request took
+            :param success: bool
+            """
+            if not self.adaptive:
+                return
+            with self.lock:
+                if latency > self.target_latency:
+                    self.batch_size = max(self.batch_size // 2, 1)
+                elif success:
+                    if self.concurrency < self.max_concurrency:
+                        self.concurrency += 1
+                        self.slot_available.notify()
+                    self.batch_size = min(self.batch_size + BP_BATCH_SIZE_STEP, self.max_batch_size)
+                batch_size = self.batch_size
+            self.records.set_batch_size(batch_size)
+
+        def on_rate_limited(self, retry_after: float = None):
+            """
+            Pause all workers, and in adaptive mode halve concurrency and batch size
+
+            :param retry_after: float Seconds the server asked to wait, None for the default
+            """
+            with self.lock:
+                if self.adaptive:
+                    self.concurrency = max(self.concurrency // 2, 1)
+                    self.batch_size = max(self.batch_size // 2, 1)
+                pause = BP_DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                batch_size = self.batch_size
+                self.logger.info(
+                    "rate limited, pausing for %.2fs [concurrency=%d, batch=%d]"
+                    % (pause, self.concurrency, self.batch_size)
+                )
+            self.records.set_batch_size(batch_size)
+
+    class Spool(object):
+        """
+        Spool of the queued records, split into memory-mapped segment files. Every record
+        is appended to the current segment before it is queued. Only a window of the queued
+        records is kept in memory, the workers read the others back from their segment.
+        Processed records are acknowledged in a checkpoint file next to their segment, a
+        segment and its checkpoint are deleted as soon as all of its records are acknowledged.
+        On start, every record of a segment without acknowledgement is recovered.
+
+        Entries are stored as `<length:uint32><crc32:uint32><JSON [table, record]>`, a
+        zero length marks the end of a segment. A torn write at the end of a segment
+        fails the checksum and is ignored.
+        """
+
+        HEADER = struct.Struct("<II")
+        OFFSET = struct.Struct("<I")
+
+        def __init__(self, directory: str, segment_size: int, fsync: bool, logger):
+            """
+            :param directory: str Spool directory, created if missing
+            :param segment_size: int Size of a segment file in bytes
+            :param fsync: bool Sync every write to disk
+            """
+            self.directory = directory
+            self.segment_size = segment_size
+            self.fsync = fsync
+            self.logger = logger
+            os.makedirs(directory, exist_ok=True)
+
+            self.lock = Lock()
+            self.pending = {}  # segment id -> records not acknowledged yet
+            self.checkpoints = {}  # segment id -> open checkpoint file
+            self.segment_id = max(self._segment_ids(), default=0)
+            self.segment = None
+            self.segment_file = None
+            self.position = 0
+
+        def recover(self) -> Iterator[list[tuple]]:
+            """
+            Read the records of existing segments that were not acknowledged, one segment
+            at a time, so a spool larger than the memory can be recovered
+
+            :returns Iterator[list[tuple]] of (ref, table name, record) per segment, in write order
+            """
+            for segment_id in sorted(self._segment_ids()):
+                with self.lock:
+                    acked = self._read_checkpoint(segment_id)
+                    found = [e for e in self._read_segment(segment_id) if e[0][1] not in acked]
+                    if not found:
+                        self._delete(segment_id)
+                        continue
+                    self.pending[segment_id] = len(found)
+                yield found
+
+        def read(self, refs: list[tuple]) -> list[dict]:
+            """
+            Read records back from their segments
+
+            :param refs: list[tuple] references returned by `append()` or `recover()`
+
+            :returns list[dict] in the order of the references
+            """
+            records = []
+            with self.lock:
+                readers = {}
+                try:
+                    for segment_id, offset in refs:
+                        if segment_id == self.segment_id and self.segment is not None:
+                            m = self.segment
+                        elif segment_id in readers:
+                            m = readers[segment_id][1]
+                        else:
+                            f = open(self._path(segment_id, "log"), "rb")
+                            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                            readers[segment_id] = (f, m)
+                        length, _ = self.HEADER.unpack_from(m, offset)
+                        start = offset + self.HEADER.size
+                        records.append(orjson.loads(m[start : start + length])[1])
+                finally:
+                    for f, m in readers.values():
+                        m.close()
+                        f.close()
+            return records
+
+        def append(self, table_name: str, records: list[dict]) -> list[tuple]:
+            """
+            Append records to the current segment
+
+            :param table_name: str
+            :param records: list[dict]
+
+            :returns list[tuple] references to acknowledge the records with
+            """
+            entries = [orjson.dumps([table_name, r], option=orjson.OPT_NON_STR_KEYS) for r in records]
+            refs = []
+            with self.lock:
+                for entry in entries:
+                    size = self.HEADER.size + len(entry)
+                    # keep room for the end marker
+                    if self.segment is None or self.position + size + self.HEADER.size > len(self.segment):
+                        self._roll(size + self.HEADER.size)
+                    self.segment[self.position + self.HEADER.size : self.position + size] = entry
+                    self.segment[self.position : self.position + self.HEADER.size] = self.HEADER.pack(
+                        len(entry), zlib.crc32(entry)
+                    )
+                    refs.append((self.segment_id, self.position))
+                    self.pending[self.segment_id] = self.pending.get(self.segment_id, 0) + 1
+                    self.position += size
+                if self.fsync:
+                    self.segment.flush()
+            return refs
+
+        def ack(self, refs: list[tuple]):
+            """
+            Acknowledge processed records in the checkpoint of their segment
+
+            :param refs: list[tuple] references returned by `append()` or `recover()`
+            """
+            with self.lock:
+                offsets = {}
+                for segment_id, offset in refs:
+                    offsets.setdefault(segment_id, []).append(offset)
+                for segment_id, acked in offsets.items():
+                    self.pending[segment_id] -= len(acked)
+                    if self.pending[segment_id] == 0 and (segment_id != self.segment_id or self.segment is None):
+                        # sealed segment is done
+                        self._delete(segment_id)
+                        continue
+                    checkpoint = self._checkpoint(segment_id)
+                    checkpoint.write(b"".join(self.OFFSET.pack(o) for o in acked))
+                    checkpoint.flush()
+                    if self.fsync:
+                        os.fsync(checkpoint.fileno())
+
+        def close(self):
+            """
+            Close the current segment, fully acknowledged segments are removed
+            """
+            with self.lock:
+                self._seal()
+                for segment_id in list(self.checkpoints.keys()):
+                    self.checkpoints.pop(segment_id).close()
+                for segment_id in [i for i, n in self.pending.items() if n == 0]:
+                    self._delete(segment_id)
+
+        def _roll(self, min_size: int):
+            self._seal()
+            if self.pending.get(self.segment_id) == 0:
+                self._delete(self.segment_id)
+            self.segment_id += 1
+            self.position = 0
+            self.segment_file = open(self._path(self.segment_id, "log"), "w+b")
+            self.segment_file.truncate(max(self.segment_size, min_size))
+            self.segment = mmap.mmap(self.segment_file.fileno(), 0)
+
+        def _seal(self):
+            if self.segment is not None:
+                self.segment.flush()
+                self.segment.close()
+                self.segment_file.close()
+                self.segment = None
+                self.segment_file = None
+
+        def _read_segment(self, segment_id: int) -> list[tuple]:
+            entries = []
+            with open(self._path(segment_id, "log"), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return entries
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    position = 0
+                    while position + self.HEADER.size <= len(m):
+                        length, crc = self.HEADER.unpack_from(m, position)
+                        entry = m[position + self.HEADER.size : position + self.HEADER.size + length]
+                        if length == 0 or len(entry) < length or zlib.crc32(entry) != crc:
+                            break
+                        table_name, record = orjson.loads(entry)
+                        entries.append(((segment_id, position), table_name, record))
+                        position += self.HEADER.size + length
+            return entries
+
+        def _read_checkpoint(self, segment_id: int) -> set[int]:
+            path = self._path(segment_id, "ckpt")
+            if not os.path.exists(path):
+                return set()
+            with open(path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % self.OFFSET.size
+            return {o for (o,) in self.OFFSET.iter_unpack(data[:usable])}
+
+        def _checkpoint(self, segment_id: int):
+            if segment_id not in self.checkpoints:
+                self.checkpoints[segment_id] = open(self._path(segment_id, "ckpt"), "ab")
+            return self.checkpoints[segment_id]
+
+        def _delete(self, segment_id: int):
+            if segment_id in self.checkpoints:
+                self.checkpoints.pop(segment_id).close()
+            self.pending.pop(segment_id, None)
+            for ext in ("log", "ckpt"):
+                path = self._path(segment_id, ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+        def _segment_ids(self) -> list[int]:
+            ids = []
+            for name in os.listdir(self.directory):
+                if name.startswith("segment-") and name.endswith(".log"):
+                    try:
+                        ids.append(int(name[len("segment-") : -len(".log")]))
+                    except ValueError:
+                        self.logger.warning("ignoring unknown file in spool: %s" % name)
+            return ids
+
+        def _path(self, segment_id: int, ext: str) -> str:
+            return os.path.join(self.directory, "segment-%08d.%s" % (segment_id, ext))
 
     class Records(object):
         """
-        Thread safe storage for records to persist by the bulk processor
+        Thread safe storage for records to persist by the bulk processor.
+        Workers wait on a condition that is signalled when a batch is ready.
         """
 
-        def __init__(self, batch_size: int, flush_interval: int, logger):
+        def __init__(
+            self,
+            batch_size: int,
+            flush_interval: int,
+            logger,
+            max_records: int = None,
+            max_records_per_table: int = None,
+            max_bytes: int = None,
+            max_bytes_per_table: int = None,
+            spool=None,
+            memory_records: int = BP_SPOOL_MEMORY_RECORDS,
+        ):
             """
             :param batch_size: int
             :param flush_interval: int
+            :param max_records: int Limit of records across all tables, None is unbounded
+            :param max_records_per_table: int Limit of records per table, None is unbounded
+            :param max_bytes: int Limit of the JSON size of all records, None is unbounded
+            :param max_bytes_per_table: int Limit of the JSON size of the records per table, None is unbounded
+            :param spool: BulkProcessor.Spool Spool of the queued records, None is memory only
+            :param memory_records: int Records per table kept in memory with a spool, the others are read
+                back from the spool when their batch is handed out
             """
             self.batch_size = batch_size
             self.flush_interval = flush_interval
             self.logger = logger
+            self.max_records = max_records
+            self.max_records_per_table = max_records_per_table
+            self.max_bytes = max_bytes
+            self.max_bytes_per_table = max_bytes_per_table
+            # record sizes are only measured if a byte limit is set
+            self.measure = max_bytes is not None or max_bytes_per_table is not None
+            self.spool = spool
+            self.memory_records = memory_records
 
             self.store = dict()
             self.store_ptr = 0
+            self.in_flight = 0
+            self.total_records = 0
+            self.total_bytes = 0
+            self.closed = False
             self.lock = Lock()
+            self.batch_ready = Condition(self.lock)
+            self.space_available = Condition(self.lock)
+            self.all_done = Condition(self.lock)
 
         def force_queue_flush(self):
             """
             Force next batch to be available
             https://github.com/xataio/xata-py/issues/184
             """
-            # push for immediate flushes
-            self.flush_interval = 0
+            with self.lock:
+                # push for immediate flushes
+                self.flush_interval = 0
+                self.batch_ready.notify_all()
 
-        def put(self, table_name: str, records: list[dict]):
+        def close(self):
+            """
+            Release all waiting workers and producers, no more batches are handed out
+            """
+            with self.lock:
+                self.closed = True
+                self.batch_ready.notify_all()
+                self.space_available.notify_all()
+
+        def put(
+            self,
+            table_name: str,
+            records: list[dict],
+            block: bool = True,
+            timeout: float = None,
+            refs: list[tuple] = None,
+        ):
             """
             :param table_name: str
             :param records: list[dict]
+            :param block: bool Wait for room if the queue is full
+            :param timeout: float Maximum seconds to wait for room, None waits forever
+            :param refs: list[tuple] Spool references of records that are already spooled
+
+            :raises QueueFullError if there is no room in time
             """
+            sizes = [self._record_size(r) for r in records]
+            deadline = None if timeout is None else time.monotonic() + timeout
+            queued = 0
             with self.lock:
-                if table_name not in self.store.keys():
+                if table_name not in self.store:
                     self.store[table_name] = {
-                        "lock": Lock(),
                         "flushed": time.time(),
                         "records": list(),
+                        "sizes": list(),
+                        "refs": list(),
+                        "bytes": 0,
                     }
-            with self.store[table_name]["lock"]:
-                self.store[table_name]["records"] += records
+                table = self.store[table_name]
+                while queued < len(records):
+                    if self.closed:
+                        raise QueueFullError("bulk processor is closed", queued)
+                    n = self._room(table, sizes[queued:])
+                    if n == 0:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if not block or (remaining is not None and remaining <= 0):
+                            raise QueueFullError(
+                                "queue limit reached for table '%s', queued %d of %d records"
+                                % (table_name, queued, len(records)),
+                                queued,
+                            )
+                        self.space_available.wait(remaining)
+                        continue
+
+                    was_empty = self._length(table) == 0
+                    if self.spool is None:
+                        table["records"] += records[queued : queued + n]
+                    else:
+                        # the records in memory are the head of the queue, once records are
+                        # only spooled, the following ones are too until the head is drained
+                        keep = 0
+                        if len(table["records"]) == len(table["refs"]):
+                            keep = max(min(n, self.memory_records - len(table["records"])), 0)
+                        if refs is None:
+                            table["refs"] += self.spool.append(table_name, records[queued : queued + n])
+                        else:
+                            table["refs"] += refs[queued : queued + n]
+                        table["records"] += records[queued : queued + keep]
+                    if self.measure:
+                        added = sum(sizes[queued : queued + n])
+                        table["sizes"] += sizes[queued : queued + n]
+                        table["bytes"] += added
+                        self.total_bytes += added
+                    self.total_records += n
+                    queued += n
+                    if self._length(table) >= self.batch_size:
+                        self.batch_ready.notify()
+                    elif was_empty:
+                        # a waiting worker has to pick up the flush interval of the table
+                        self.batch_ready.notify()
+
+        def _room(self, table: dict, sizes: list[int]) -> int:
+            """
+            How many of the next records fit into the queue. A table without queued
+            records always accepts one record, so oversized records can not get stuck.
+            """
+            n = len(sizes)
+            if self.max_records is not None:
+                n = min(n, self.max_records - self.total_records)
+            if self.max_records_per_table is not None:
+                n = min(n, self.max_records_per_table - self._length(table))
+            if self.max_bytes_per_table is not None and n > 0:
+                free, fits = self.max_bytes_per_table - table["bytes"], 0
+                while fits < n and sizes[fits] <= free:
+                    free -= sizes[fits]
+                    fits += 1
+                # an oversized record must not get stuck in an empty table
+                n = fits if fits > 0 or self._length(table) else 1
+            if self.max_bytes is not None:
+                free, fits = self.max_bytes - self.total_bytes, 0
+                while fits < n and sizes[fits] <= free:
+                    free -= sizes[fits]
+                    fits += 1
+                n = fits
+            if n <= 0 and self.total_records == 0:
+                return 1
+            return max(n, 0)
+
+        def _length(self, table: dict) -> int:
+            """
+            Queued records of a table, with a spool not all of them are in memory
+            """
+            return len(table["refs"]) if self.spool is not None else len(table["records"])
+
+        def _record_size(self, record: dict) -> int:
+            if not self.measure:
+                return 0
+            return len(orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS))
+
+        def fill_level(self) -> tuple[int, int, float]:
+            """
+            Get the queued records, their size in bytes and the share of the tightest limit in use
+
+            :returns tuple[int, int, float]
+            """
+            with self.lock:
+                fill = 0.0
+                if self.max_records is not None:
+                    fill = max(fill, self.total_records / self.max_records)
+                if self.max_records_per_table is not None and self.store:
+                    fullest = max(self._length(t) for t in self.store.values())
+                    fill = max(fill, fullest / self.max_records_per_table)
+                if self.max_bytes is not None:
+                    fill = max(fill, self.total_bytes / self.max_bytes)
+                if self.max_bytes_per_table is not None and self.store:
+                    fullest = max(t["bytes"] for t in self.store.values())
+                    fill = max(fill, fullest / self.max_bytes_per_table)
+                return self.total_records, self.total_bytes, min(fill, 1.0)
 
         def next_batch(self) -> dict:
             """
-            Get the next batch of records to persist
+            Get the next batch of records to persist. Blocks until a table has reached the
+            batch size or its flush interval expired. Every batch must be acknowledged with
+            `task_done()` once processed.
 
-            :returns dict
+            :returns dict or None if the store is closed
+            """
+            with self.lock:
+                while not self.closed:
+                    now = time.time()
+                    next_deadline = None
+                    names = list(self.store.keys())
+                    # round robin over the tables, to not starve any
+                    for i in range(len(names)):
+                        table_name = names[(self.store_ptr + i) % len(names)]
+                        table = self.store[table_name]
+                        length = self._length(table)
+                        if length == 0:
+                            continue
+                        deadline = table["flushed"] + self.flush_interval
+                        # force flush table, batch size reached or timer exceeded
+                        if length >= self.batch_size or deadline <= now:
+                            self.store_ptr = (self.store_ptr + i + 1) % len(names)
+                            table["flushed"] = now
+                            n = min(length, self.batch_size)
+                            rs = table["records"][0:n]
+                            del table["records"][0:n]
+                            batch = {"table": table_name, "records": rs}
+                            if self.spool is not None:
+                                batch["refs"] = table["refs"][0:n]
+                                del table["refs"][0:n]
+                                if len(rs) < n:
+                                    # read back from the spool by the worker, outside of the lock
+                                    batch["spilled"] = batch["refs"][len(rs) :]
+                            self._release(table, n)
+                            self.in_flight += 1
+                            if self._length(table) >= self.batch_size:
+                                # wake up the next worker for the remaining records
+                                self.batch_ready.notify()
+                            return batch
+                        if next_deadline is None or deadline < next_deadline:
+                            next_deadline = deadline
+                    # sleep until signalled, or the next flush interval expires
+                    self.batch_ready.wait(None if next_deadline is None else next_deadline - now)
+                return None
+
+        def set_batch_size(self, batch_size: int):
+            """
+            :param batch_size: int Records per batch handed out from now on
             """
-            if self.size() == 0:
-                return {}
-            table_name = ""
             with self.lock:
-                names = list(self.store.keys())
-                self.store_ptr += 1
-                if len(names) <= self.store_ptr:
-                    self.store_ptr = 0
-                table_name = names[self.store_ptr]
-
-            rs = []
-            if self.length(table_name) == 0:
-                return {"table": table_name, "records": rs}
-
-            with self.store[table_name]["lock"]:
-                # flush interval exceeded
-                time_elapsed = time.time() - self.store[table_name]["flushed"]
-                flush_needed = time_elapsed >= self.flush_interval
-                # force flush table, batch size reached or timer exceeded
-                if len(self.store[table_name]["records"]) >= self.batch_size or flush_needed:
-                    self.store[table_name]["flushed"] = time.time()
-                    rs = self.store[table_name]["records"][0 : self.batch_size]
-                    del self.store[table_name]["records"][0 : self.batch_size]
-                return {"table": table_name, "records": rs}
+                if batch_size != self.batch_size:
+                    self.batch_size = batch_size
+                    self.batch_ready.notify_all()
+
+        def _release(self, table: dict, n: int):
+            self.total_records -= n
+            if self.measure:
+                freed = sum(table["sizes"][0:n])
+                del table["sizes"][0:n]
+                table["bytes"] -= freed
+                self.total_bytes -= freed
+            self.space_available.notify_all()
+
+        def task_done(self):
+            """
+            Acknowledge a batch handed out by `next_batch()` as processed
+            """
+            with self.lock:
+                self.in_flight -= 1
+                if self.in_flight == 0 and self._size() == 0:
+                    self.all_done.notify_all()
+
+        def join(self):
+            """
+            Block until all records are handed out and processed
+            """
+            with self.lock:
+                while self.in_flight > 0 or self._size() > 0:
+                    self.all_done.wait()
 
         def length(self, table_name: str) -> int:
             """
@@ -299,14 +1102,18 @@ class BulkProcessor(object):
 
             :param table_name: str
             """
-            with self.store[table_name]["lock"]:
-                return len(self.store[table_name]["records"])
+            with self.lock:
+                return self._length(self.store[table_name])
 
         def size(self) -> int:
             """
             Get total size of stored records
             """
-            return sum([self.length(n) for n in self.store.keys()])
+            with self.lock:
+                return self._size()
+
+        def _size(self) -> int:
+            return self.total_records
 
 
 def to_rfc339(dt: datetime, tz=timezone.utc) -> str:
@@ -332,6 +1139,8 @@ class Transaction(object):
     def __init__(
         self,
         client: XataClient,
+        auto_chunk: bool = False,
+        max_concurrency: int = TRX_DEFAULT_CONCURRENCY,
     ) -> None:
         """
         Transaction Helper
@@ -340,8 +1149,18 @@ class Transaction(object):
         :stability beta
 
         :param client: XataClient
+        :param auto_chunk: bool Allow more than 1000 operations, they are committed as several
+            transactions of up to 1000 operations each. Only every chunk is atomic. Chunks touching
+            the same record are committed one after another, independent chunks in parallel.
+            Default: False
+        :param max_concurrency: int How many independent chunks are committed in parallel, 1 commits
+            all chunks in order. Default: 4
         """
+        if max_concurrency < 1:
+            raise Exception("max concurrency must be greater than 0, default: %d" % TRX_DEFAULT_CONCURRENCY)
         self.client = client
+        self.auto_chunk = auto_chunk
+        self.max_concurrency = max_concurrency
         telemetry = "%s; helper=trx:%s" % (self.client.get_headers()["x-xata-agent"], TRX_VERSION)
         self.client.set_header("x-xata-agent", telemetry)
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
@@ -350,7 +1169,7 @@ class Transaction(object):
         self.operations = {"operations": []}
 
     def _add_operation(self, operation: dict) -> None:
-        if len(self.operations["operations"]) >= TRX_MAX_OPERATIONS:
+        if not self.auto_chunk and len(self.operations["operations"]) >= TRX_MAX_OPERATIONS:
             raise Exception(f"Maximum amount of {TRX_MAX_OPERATIONS} transaction operations exceeded.")
         self.operations["operations"].append(operation)
 
@@ -366,7 +1185,7 @@ class Transaction(object):
             the record. You can adjust this behavior by setting `create_only` to `true` for the operation.
             Default: False
 
-        :raises Exception if limit of 1000 operations is exceeded
+        :raises Exception if limit of 1000 operations is exceeded without auto chunking
         """
         self._add_operation({"insert": {"table": table, "record": record, "createOnly": create_only}})
 
@@ -382,7 +1201,7 @@ class Transaction(object):
         :param fields: dict
         :param upsert: bool Default: False
 
-        :raises Exception if limit of 1000 operations is exceeded
+        :raises Exception if limit of 1000 operations is exceeded without auto chunking
         """
         self._add_operation({"update": {"table": table, "id": record_id, "fields": fields, "upsert": upsert}})
 
@@ -397,7 +1216,7 @@ class Transaction(object):
         :param columns: list of columns to retrieve
         :param fail_if_missing: bool, Default: False
 
-        :raises Exception if limit of 1000 operations is exceeded
+        :raises Exception if limit of 1000 operations is exceeded without auto chunking
         """
         self._add_operation(
             {"delete": {"table": table, "id": record_id, "columns": columns, "failIfMissing": fail_if_missing}}
@@ -412,7 +1231,7 @@ class Transaction(object):
         :param record_id: str
         :param columns: list of columns to retrieve
 
-        :raises Exception if limit of 1000 operations is exceeded
+        :raises Exception if limit of 1000 operations is exceeded without auto chunking
         """
         self._add_operation({"get": {"table": table, "id": record_id, "columns": columns}})
 
@@ -422,34 +1241,124 @@ class Transaction(object):
         In case of too many connections, hitting rate limits, two extra attempts are taken
         with an incremental back off.
 
+        With auto chunking, more than 1000 operations are split in chunks. Chunks with operations
+        on the same record (table and ID) are committed in order, and once one of them fails the
+        later ones are not sent. Independent chunks are committed in parallel. The results of the
+        committed chunks are merged in the order of the operations and `chunks` reports which
+        chunks have been committed, with the `error` of a chunk that failed without a response.
+        Only the operations of chunks not committed stay in the queue, so running again does not
+        commit a chunk twice, and commits dependent chunks in their order.
+
         :param branch_name: str Override the branch name from the client init
         :param retry: bool Retry rate limit errors, Default: True
         :param flush_on_error: bool Flush the operations if an error happened, Default: False
 
         :returns dict
         """
-        r = self.client.records().transaction(self.operations, branch_name=branch_name)
-        attempt = 1
+        operations = self.operations["operations"]
+        if len(operations) <= TRX_MAX_OPERATIONS:
+            r, attempt = self._commit(operations, branch_name, retry)
+
+            # free memory
+            if r.is_success() or flush_on_error:
+                self.operations["operations"] = []
+
+            # build response
+            return self.Summary(r, attempt)
+
+        chunks = [operations[i : i + TRX_MAX_OPERATIONS] for i in range(0, len(operations), TRX_MAX_OPERATIONS)]
+        groups = self._dependent_chunks(chunks)
+        summaries = [None] * len(chunks)
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(groups))) as executor:
+            futures = [executor.submit(self._commit_in_order, chunks, group, branch_name, retry) for group in groups]
+            for group, f in zip(groups, futures):
+                for i, summary in zip(group, f.result()):
+                    summaries[i] = summary
+
+        if flush_on_error:
+            self.operations["operations"] = []
+        else:
+            # keep the operations of the failed chunks for another run
+            self.operations["operations"] = [
+                op for chunk, summary in zip(chunks, summaries) if not summary.committed for op in chunk
+            ]
+        return self.ChunkedSummary(summaries, [len(c) for c in chunks])
+
+    @staticmethod
+    def _dependent_chunks(chunks: list[list[dict]]) -> list[list[int]]:
+        """
+        Group the chunks with operations on the same record
 
-        # retry on 429, if requested
-        if r.status_code == 429 and retry:
-            # back off and retry
-            while attempt < 3 and not r.is_success():
+        :returns list[list[int]] indexes of the chunks per group, in order
+        """
+        parent = list(range(len(chunks)))
+
+        def root(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        first_chunk = {}  # (table, id) -> first chunk with an operation on the record
+        for i, chunk in enumerate(chunks):
+            for op in chunk:
+                kind, body = next(iter(op.items()))
+                record_id = body["record"].get("id") if kind == "insert" else body.get("id")
+                if record_id is None:
+                    continue
+                j = first_chunk.setdefault((body["table"], record_id), i)
+                if j != i:
+                    parent[root(i)] = root(j)
+        groups = {}
+        for i in range(len(chunks)):
+            groups.setdefault(root(i), []).append(i)
+        return list(groups.values())
+
+    def _commit_in_order(self, chunks: list[list[dict]], group: list[int], branch_name: str, retry: bool) -> list:
+        """
+        Commit dependent chunks one after another, stop at the first that is not committed
+
+        :returns list[Summary] per chunk of the group
+        """
+        summaries = []
+        for i in group:
+            if summaries and not summaries[-1].committed:
+                error = Exception("not sent, an earlier chunk with operations on the same records failed")
+                summaries.append(self.Summary(None, 0, error))
+                continue
+            try:
+                summaries.append(self.Summary(*self._commit(chunks[i], branch_name, retry)))
+            except Exception as exc:
+                # other chunks may have been committed, report the failure with them
+                self.logger.error("chunk %d of %d failed: %s" % (i + 1, len(chunks), exc))
+                summaries.append(self.Summary(None, 1, exc))
+        return summaries
+
+    def _commit(self, operations: list[dict], branch_name: str, retry: bool) -> tuple[ApiResponse, int]:
+        """
+        Send a transaction, retry on rate limits unless the client has a retry policy
+
+        :returns tuple[ApiResponse, int] response and amount of attempts
+        """
+        if self.client.retry_policy is not None:
+            # the retry policy of the client takes care of rate limits
+            r = self.client.records().transaction({"operations": operations}, branch_name=branch_name)
+            return r, 1 + r.retries
+        attempt = 1
+        while True:
+            try:
+                return self.client.records().transaction({"operations": operations}, branch_name=branch_name), attempt
+            except RateLimitError:
+                # back off and retry, if requested
+                if not retry or attempt >= 3:
+                    raise
                 wait = attempt * TRX_BACKOFF
-                time.sleep(wait)
                 self.logger.info(
-                    f"request {attempt} encountered a 429: too many requests error. will retry in {wait} ms."
+                    f"request {attempt} encountered a 429: too many requests error. will retry in {wait} s."
                 )
-                r = self.client.records().transaction(self.operations, branch_name=branch_name)
+                time.sleep(wait)
                 attempt += 1
 
-        # free memory
-        if r.is_success() or flush_on_error:
-            self.operations["operations"] = []
-
-        # build response
-        return self.Summary(r, attempt)
-
     def size(self) -> int:
         """
         Get amount of operations in queue
@@ -462,8 +1371,22 @@ class Transaction(object):
         :link https://github.com/xataio/xata-py/issues/170
         """
 
-        def __init__(self, response: ApiResponse, attempts: int):
+        def __init__(self, response: ApiResponse, attempts: int, error: Exception = None):
+            """
+            :param response: ApiResponse or None if the request failed with `error`
+            :param attempts: int
+            :param error: Exception raised instead of a response
+            """
             super()
+            if response is None:
+                status_code = 429 if isinstance(error, RateLimitError) else getattr(error, "status_code", None)
+                super().__setitem__("status_code", status_code if isinstance(status_code, int) else None)
+                super().__setitem__("results", [])
+                super().__setitem__("errors", [{"message": str(error)}])
+                super().__setitem__("has_errors", True)
+                super().__setitem__("attempts", attempts)
+                super().__setitem__("error", error)
+                return
             super().__setitem__("status_code", response.status_code)
             super().__setitem__("results", response.get("results", []))
             super().__setitem__("errors", response.get("errors", []))
@@ -489,3 +1412,397 @@ class Transaction(object):
         @property
         def has_errors(self) -> bool:
             return self.__getitem__("has_errors")
+
+        @property
+        def committed(self) -> bool:
+            return self.status_code is not None and 200 <= self.status_code < 300
+
+    class ChunkedSummary(Summary):
+        """
+        Summary of a transaction committed in several chunks. Error indexes refer
+        to the position of the operation in the whole transaction.
+        """
+
+        def __init__(self, summaries: list, sizes: list[int]):
+            """
+            :param summaries: list[Summary] of every chunk, in order
+            :param sizes: list[int] Amount of operations per chunk
+            """
+            dict.__init__(self)
+            results, errors, chunks = [], [], []
+            offset = 0
+            for i, (summary, size) in enumerate(zip(summaries, sizes)):
+                committed = summary.committed
+                if committed:
+                    results += summary.results
+                for err in summary.errors:
+                    if isinstance(err, dict) and isinstance(err.get("index"), int):
+                        err = {**err, "index": err["index"] + offset}
+                    errors.append(err)
+                chunks.append(
+                    {
+                        "index": i,
+                        "offset": offset,
+                        "operations": size,
+                        "committed": committed,
+                        "status_code": summary.status_code,
+                        "attempts": summary.attempts,
+                        "error": str(summary["error"]) if "error" in summary else None,
+                    }
+                )
+                offset += size
+            failed = [c["status_code"] for c in chunks if not c["committed"]]
+            # None if no failed chunk got a response
+            status_code = next((code for code in failed if code is not None), None) if failed else 200
+            super().__setitem__("status_code", status_code)
+            super().__setitem__("results", results)
+            super().__setitem__("errors", errors)
+            super().__setitem__("has_errors", len(errors) > 0)
+            super().__setitem__("attempts", max(c["attempts"] for c in chunks))
+            super().__setitem__("chunks", chunks)
+
+        @property
+        def chunks(self) -> list[dict]:
+            return self.__getitem__("chunks")
+
+
+class ParallelScan(object):
+    """
+    Scan a whole table by splitting it into disjoint ranges of a sortable column,
+    every range is paged through concurrently on a worker pool.
+    :stability beta
+    """
+
+    def __init__(
+        self,
+        client: XataClient,
+        table_name: str,
+        column: str = SCAN_DEFAULT_COLUMN,
+        partitions: int = SCAN_DEFAULT_PARTITIONS,
+        boundaries: list = None,
+        payload: dict = None,
+        db_name: str = None,
+        branch_name: str = None,
+    ):
+        """
+        Parallel Scan Helper
+
+        :stability beta
+
+        :param client: XataClient
+        :param table_name: str
+        :param column: str Sortable column to partition on, e.g. `id` or a datetime column (default: id)
+        :param partitions: int How many partitions are scanned concurrently (default: 4)
+        :param boundaries: list Explicit split points, n boundaries make n+1 partitions. If not set, the
+            boundaries are computed from a random sample of the column values.
+        :param payload: dict Query to apply, see `SearchAndFilter.query`. The `filter` is combined with the
+            range of each partition, `sort` is ignored, `page.size` sets the page size (default: 200)
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+
+        :raises Exception if the partition count is less than one
+        """
+        if partitions < 1:
+            raise Exception("partitions must be greater than 0, default: %d" % SCAN_DEFAULT_PARTITIONS)
+
+        self.client = client
+        telemetry = "%s; helper=scan:%s" % (self.client.get_headers()["x-xata-agent"], SCAN_VERSION)
+        self.client.set_header("x-xata-agent", telemetry)
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+        self.table_name = table_name
+        self.column = column
+        self.partitions = partitions
+        self.boundaries = boundaries
+        self.payload = {k: v for k, v in (payload or {}).items() if k != "sort"}
+        self.page_size = self.payload.get("page", {}).get("size", SCAN_PAGE_SIZE)
+        self.db_name = db_name
+        self.branch_name = branch_name
+
+    def get_boundaries(self) -> list:
+        """
+        Get the split points between the partitions. Unless set explicitly, a random sample
+        of the column values is taken and split into equal sized quantiles.
+
+        :returns list
+
+        :raises Exception if the sample can not be retrieved
+        """
+        if self.boundaries is not None:
+            return self.boundaries
+
+        sample = {"columns": [self.column], "sort": {"*": "random"}, "page": {"size": SCAN_PAGE_SIZE}}
+        if "filter" in self.payload:
+            sample["filter"] = self.payload["filter"]
+        r = self.client.data().query(self.table_name, sample, self.db_name, self.branch_name)
+        if not r.is_success():
+            raise Exception("unable to sample table '%s', with error: %d - %s" % (self.table_name, r.status_code, r))
+
+        values = sorted({v for v in (self._get_value(rec) for rec in r.get("records", [])) if v is not None})
+        boundaries = []
+        for i in range(1, self.partitions):
+            value = values[i * len(values) // self.partitions] if values else None
+            if value is not None and value not in boundaries and value != values[0]:
+                boundaries.append(value)
+        self.boundaries = boundaries
+        self.logger.debug("table '%s' split on '%s' at %s" % (self.table_name, self.column, boundaries))
+        return self.boundaries
+
+    def get_partitions(self) -> list[dict]:
+        """
+        Get the query payload of every partition. Each payload can be passed to
+        `SearchAndFilter.query` or `SearchAndFilter.query_iter`.
+
+        :returns list[dict]
+        """
+        boundaries = self.get_boundaries()
+        ranges = []
+        for i in range(len(boundaries) + 1):
+            condition = {}
+            if i > 0:
+                condition["$ge"] = boundaries[i - 1]
+            if i < len(boundaries):
+                condition["$lt"] = boundaries[i]
+            ranges.append({self.column: condition} if condition else {})
+        # records without a value are assigned to the first partition
+        if len(ranges) > 1:
+            ranges[0] = {"$any": [ranges[0], {"$notExists": self.column}]}
+
+        partitions = []
+        for r in ranges:
+            payload = {**self.payload, "page": {"size": self.page_size}}
+            if "filter" in self.payload and r:
+                payload["filter"] = {"$all": [self.payload["filter"], r]}
+            elif r:
+                payload["filter"] = r
+            partitions.append(payload)
+        return partitions
+
+    def scan(self) -> Iterator[dict]:
+        """
+        Scan all partitions concurrently and merge the records into one stream.
+        The order of records across partitions is not defined.
+
+        :returns Iterator[dict]
+
+        :raises Exception if a partition can not be scanned
+        """
+        for _, records in self.scan_pages():
+            yield from records
+
+    def scan_pages(self) -> Iterator[tuple[int, list[dict]]]:
+        """
+        Scan all partitions concurrently and yield the pages as they arrive,
+        tagged with the index of their partition.
+
+        :returns Iterator[tuple[int, list[dict]]] (partition index, records)
+
+        :raises Exception if a partition can not be scanned
+        """
+        partitions = self.get_partitions()
+        # bound the pages in memory, if the consumer is slower than the workers
+        pages = queue.Queue(maxsize=len(partitions) * 2)
+        stop = Event()
+        executor = ThreadPoolExecutor(max_workers=len(partitions), thread_name_prefix="scan")
+        for i, payload in enumerate(partitions):
+            executor.submit(self._scan_partition, i, payload, pages, stop)
+
+        try:
+            remaining = len(partitions)
+            while remaining > 0:
+                i, records = pages.get()
+                if records is None:
+                    remaining -= 1
+                elif isinstance(records, Exception):
+                    raise records
+                elif len(records) > 0:
+                    yield i, records
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def _scan_partition(self, i: int, payload: dict, pages: queue.Queue, stop: Event):
+        try:
+            page = []
+            for record in self.client.data().query_iter(
+                self.table_name, payload, self.db_name, self.branch_name, prefetch=False
+            ):
+                page.append(record)
+                if len(page) >= self.page_size:
+                    if not self._put(pages, (i, page), stop):
+                        return
+                    page = []
+            self._put(pages, (i, page), stop)
+            self._put(pages, (i, None), stop)
+        except Exception as exc:
+            self.logger.error("partition #%d: %s" % (i, exc))
+            self._put(pages, (i, exc), stop)
+
+    def _put(self, pages: queue.Queue, item: tuple, stop: Event) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=SCAN_QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get_value(self, record: dict):
+        value = record
+        for key in self.column.split("."):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
+
+class RecordLoader(object):
+    """
+    Coalesce concurrent gets of single records, DataLoader style. Threads calling
+    `load()` within a short window share one `records().get_many()` request.
+    :stability beta
+    """
+
+    def __init__(
+        self,
+        client: XataClient,
+        table_name: str,
+        columns: list = None,
+        wait: float = LOADER_DEFAULT_WAIT,
+        max_batch_size: int = LOADER_DEFAULT_MAX_BATCH_SIZE,
+        db_name: str = None,
+        branch_name: str = None,
+    ):
+        """
+        Record Loader Helper
+
+        :stability beta
+
+        :param client: XataClient
+        :param table_name: str
+        :param columns: list Column filters (default: all columns)
+        :param wait: float Seconds to collect ids before a batch is sent (default: 0.002)
+        :param max_batch_size: int Send a batch right away once it has that many ids (default: 200)
+        :param db_name: str = None The name of the database to query. Default: database name from the client.
+        :param branch_name: str = None The name of the branch to query. Default: branch name from the client.
+
+        :raises Exception if the batch size is less than one or the wait is negative
+        """
+        if max_batch_size < 1:
+            raise Exception("max batch size must be greater than 0, default: %d" % LOADER_DEFAULT_MAX_BATCH_SIZE)
+        if wait < 0:
+            raise Exception("wait can not be negative, default: %f" % LOADER_DEFAULT_WAIT)
+
+        self.client = client
+        telemetry = "%s; helper=rl:%s" % (self.client.get_headers()["x-xata-agent"], LOADER_VERSION)
+        self.client.set_header("x-xata-agent", telemetry)
+
+        self.table_name = table_name
+        self.columns = columns
+        self.wait = wait
+        self.max_batch_size = max_batch_size
+        self.db_name = db_name
+        self.branch_name = branch_name
+
+        self.lock = Lock()
+        self.batch = None
+        self.stats = {"loads": 0, "batches": 0}
+
+    def load(self, record_id: str) -> dict:
+        """
+        Get a record by id. Blocks until the batch the id was added to is fetched.
+
+        :param record_id: str
+
+        :returns dict or None if there is no record with the id
+
+        :raises Exception if the batch could not be fetched
+        """
+        with self.lock:
+            self.stats["loads"] += 1
+            batch = self.batch
+            leader = batch is None
+            if leader:
+                batch = self.batch = self.Batch()
+            future = batch.add(record_id)
+            if len(batch.futures) >= self.max_batch_size:
+                self._close(batch)
+
+        if leader:
+            self._lead(batch)
+        return future.result()
+
+    def load_many(self, ids: list[str]) -> list:
+        """
+        Get records by id, in one batch with the ids of other threads
+
+        :param ids: list[str]
+
+        :returns list The records in the order of the ids, None for ids without record
+
+        :raises Exception if a batch could not be fetched
+        """
+        futures = []
+        led = []
+        with self.lock:
+            self.stats["loads"] += len(ids)
+            for record_id in ids:
+                if self.batch is None:
+                    self.batch = self.Batch()
+                    led.append(self.batch)
+                batch = self.batch
+                futures.append(batch.add(record_id))
+                if len(batch.futures) >= self.max_batch_size:
+                    self._close(batch)
+        # full batches are sent right away, the last one collects ids of other threads for a moment
+        for batch in led:
+            self._lead(batch)
+        return [future.result() for future in futures]
+
+    def get_stats(self) -> dict:
+        """
+        Amount of loaded ids and of requests sent
+
+        :returns dict
+        """
+        with self.lock:
+            return dict(self.stats)
+
+    def _lead(self, batch):
+        # the caller that opened a batch collects ids for a moment and sends it
+        batch.full.wait(self.wait)
+        with self.lock:
+            self._close(batch)
+        self._dispatch(batch)
+
+    def _close(self, batch):
+        if self.batch is batch:
+            self.batch = None
+            batch.full.set()
+
+    def _dispatch(self, batch):
+        ids = list(batch.futures.keys())
+        with self.lock:
+            self.stats["batches"] += 1
+        try:
+            records = self.client.records().get_many(self.table_name, ids, self.db_name, self.branch_name, self.columns)
+        except Exception as exc:
+            for future in batch.futures.values():
+                future.set_exception(exc)
+            return
+        for record_id, record in zip(ids, records):
+            batch.futures[record_id].set_result(record)
+
+    class Batch(object):
+        """
+        Ids collected for one request, and the futures of the waiting callers
+        """
+
+        def __init__(self):
+            self.futures = {}
+            self.full = Event()
+
+        def add(self, record_id: str) -> Future:
+            if record_id not in self.futures:
+                self.futures[record_id] = Future()
+            return self.futures[record_id]
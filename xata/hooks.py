@@ -0,0 +1,134 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import time
+
+from .routes import operation_name, route_template
+
+
+class RequestEvent(object):
+    """
+    A request sent by the client, passed to every hook. Hooks can add headers
+    in `before_send`, the other attributes are informational.
+
+    :attr method: str HTTP method
+    :attr route: str Route template, e.g. `/db/{db_branch}/tables/{table}/query`
+    :attr operation: str Namespace method of the endpoint, e.g. `data.query`
+    :attr url_path: str Path of the request, with ids and names
+    :attr url: str Full URL
+    :attr headers: dict Request headers
+    :attr bytes_out: int Size of the request body, after compression
+    :attr status_code: int Status of the response, None if no response was received
+    :attr bytes_in: int Size of the response body, None if streamed
+    :attr retries: int Retries taken by the retry policy of the client
+    :attr timings: dict Seconds spent on `dns`, `connect`, `tls`, `ttfb` and `total` by the last
+        attempt, 0 for phases skipped on pooled connections, None if unknown
+    :attr elapsed: float Seconds from before_send until the response or error, including retries
+    :attr error: Exception Raised by the transport, None if a response was received
+    """
+
+    def __init__(self, method: str, url_path: str, url: str, headers: dict, data: bytes):
+        self.method = method
+        self.route = route_template(url_path)
+        self.operation = operation_name(method, self.route)
+        self.url_path = url_path
+        self.url = url
+        self.headers = headers
+        self.bytes_out = len(data) if data is not None else 0
+        self.status_code = None
+        self.bytes_in = None
+        self.retries = 0
+        self.timings = {}
+        self.elapsed = None
+        self.error = None
+        self.started = time.monotonic()
+
+    def completed(self, resp, is_streaming: bool = False):
+        """
+        Record the response
+
+        :param resp: requests.Response | httpx.Response
+        :param is_streaming: bool The body has not been read
+        """
+        self.elapsed = time.monotonic() - self.started
+        self.status_code = resp.status_code
+        self.bytes_in = None if is_streaming else len(resp.content)
+        self.timings = getattr(resp, "timings", {})
+
+    def failed(self, error: Exception):
+        """
+        Record the error raised by the transport
+
+        :param error: Exception
+        """
+        self.elapsed = time.monotonic() - self.started
+        self.error = error
+
+    def __repr__(self) -> str:
+        return "<RequestEvent %s %s status=%s retries=%d>" % (self.method, self.route, self.status_code, self.retries)
+
+
+class Hook(object):
+    """
+    Base class of request hooks, override the callbacks of interest. Hooks are
+    registered on the client and called for every request sent by its namespaces:
+
+    .. code-block:: python
+
+        class SlowRequests(Hook):
+            def after_response(self, event: RequestEvent):
+                if event.elapsed > 1.0:
+                    logging.warning("slow %s %s: %s" % (event.method, event.route, event.timings))
+
+        xata = XataClient(hooks=[SlowRequests()])
+
+    `before_send` is called in order of registration, `after_response` and
+    `on_error` in reverse order. Exceptions raised by a hook are not caught,
+    they abort the request. Responses served from a cache do not call hooks.
+
+    The `dns`, `connect`, `tls` and `ttfb` timings are measured while at least
+    one hook with `traces_connections` is registered, hooks that only need the
+    total set it to False to spare the tracing.
+    """
+
+    traces_connections = True
+
+    def before_send(self, event: RequestEvent):
+        """
+        Called before the request is sent, headers can still be changed
+
+        :param event: RequestEvent
+        """
+        pass
+
+    def after_response(self, event: RequestEvent):
+        """
+        Called once a response is received, for any status code
+
+        :param event: RequestEvent
+        """
+        pass
+
+    def on_error(self, event: RequestEvent):
+        """
+        Called if the request failed without a response, e.g. a connection error
+
+        :param event: RequestEvent
+        """
+        pass
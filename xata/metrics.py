@@ -0,0 +1,227 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import threading
+from bisect import bisect_left
+
+from .hooks import Hook, RequestEvent
+
+# upper bounds of the latency histogram buckets in seconds, the last bucket is unbounded
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PERCENTILES = (50, 95, 99)
+
+
+def _error_class(status_code: int) -> str:
+    """
+    Name of the exception the client raises for a status code, None if it raises none
+    """
+    if status_code == 429:
+        return "RateLimitError"
+    if status_code == 401:
+        return "UnauthorizedError"
+    if status_code >= 500:
+        return "XataServerError"
+    return None
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics(Hook):
+    """
+    Request counters and latency histograms per namespace method, e.g.
+    `records.bulk_insert`, `data.query` or `sql.query`. Enable them with:
+
+    .. code-block:: python
+
+        xata = XataClient(metrics=Metrics())
+        xata.data().query("Posts")
+        xata.get_metrics()["data.query"]["latency"]["p95"]
+        xata.metrics.export_prometheus()
+
+    Each request costs a few counter updates under a lock and a bisect in a
+    fixed list of buckets. Percentiles are interpolated within the buckets, so
+    they are approximate. Values accumulate until `reset`. Errors are counted
+    by the class of the exception the client raises for the response, e.g.
+    `RateLimitError`, or of the transport error, e.g. `ConnectionError`.
+    Responses served from a cache are not counted.
+    """
+
+    # latencies are measured from before_send, the phases of connections are not used
+    traces_connections = False
+
+    def __init__(self, buckets: tuple = METRICS_LATENCY_BUCKETS):
+        """
+        :param buckets: tuple Ascending upper bounds of the latency buckets in seconds
+            (default: 5 ms to 30 s)
+        """
+        if not buckets or list(buckets) != sorted(set(buckets)):
+            raise Exception("buckets must be a non-empty list of ascending upper bounds")
+        self.buckets = tuple(float(b) for b in buckets)
+        self.operations = {}
+        self.lock = threading.Lock()
+
+    def after_response(self, event: RequestEvent):
+        self._observe(event, _error_class(event.status_code))
+
+    def on_error(self, event: RequestEvent):
+        self._observe(event, type(event.error).__name__)
+
+    def _observe(self, event: RequestEvent, error: str):
+        bucket = bisect_left(self.buckets, event.elapsed)
+        with self.lock:
+            op = self.operations.get(event.operation)
+            if op is None:
+                op = self.operations[event.operation] = self.Operation(len(self.buckets) + 1)
+            op.calls += 1
+            op.retries += event.retries
+            op.bytes_out += event.bytes_out
+            op.bytes_in += event.bytes_in or 0
+            op.latency_sum += event.elapsed
+            op.latency_max = max(op.latency_max, event.elapsed)
+            op.histogram[bucket] += 1
+            if error is not None:
+                op.errors[error] = op.errors.get(error, 0) + 1
+
+    def get_metrics(self, reset: bool = False) -> dict:
+        """
+        Snapshot of the metrics per namespace method
+
+        :param reset: bool Start over after the snapshot, for metrics per interval (default: False)
+
+        :returns dict
+        """
+        with self.lock:
+            operations = self.operations
+            if reset:
+                self.operations = {}
+            else:
+                operations = {name: op.copy() for name, op in operations.items()}
+        return {name: self._summary(op) for name, op in sorted(operations.items())}
+
+    def reset(self):
+        """
+        Drop all values
+        """
+        with self.lock:
+            self.operations = {}
+
+    def _summary(self, op: "Metrics.Operation") -> dict:
+        latency = {"p%d" % p: self._percentile(op, p / 100) for p in METRICS_PERCENTILES}
+        latency["mean"] = op.latency_sum / op.calls
+        latency["max"] = op.latency_max
+        latency["buckets"] = dict(zip(self.buckets + (float("inf"),), op.histogram))
+        return {
+            "calls": op.calls,
+            "errors": dict(op.errors),
+            "retries": op.retries,
+            "bytes_in": op.bytes_in,
+            "bytes_out": op.bytes_out,
+            "latency": latency,
+        }
+
+    def _percentile(self, op: "Metrics.Operation", q: float) -> float:
+        """
+        Interpolate a percentile within its bucket, the unbounded bucket reports the maximum
+        """
+        rank = q * op.calls
+        seen = 0
+        for i, count in enumerate(op.histogram):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return op.latency_max
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = min(self.buckets[i], op.latency_max)
+                return lower + (upper - lower) * max(rank - seen, 0) / count
+            seen += count
+        return op.latency_max
+
+    def export_prometheus(self, prefix: str = "xata") -> str:
+        """
+        Snapshot of the metrics in the Prometheus text exposition format
+
+        :param prefix: str Prefix of the metric names (default: xata)
+
+        :returns str
+        """
+        with self.lock:
+            operations = {name: op.copy() for name, op in sorted(self.operations.items())}
+        lines = []
+
+        def metric(name: str, kind: str, help: str):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help))
+            lines.append("# TYPE %s_%s %s" % (prefix, name, kind))
+
+        metric("requests_total", "counter", "Requests sent by the client")
+        for name, op in operations.items():
+            lines.append('%s_requests_total{operation="%s"} %d' % (prefix, _label(name), op.calls))
+        metric("request_errors_total", "counter", "Failed requests by error class")
+        for name, op in operations.items():
+            for error, count in sorted(op.errors.items()):
+                lines.append(
+                    '%s_request_errors_total{operation="%s",error="%s"} %d' % (prefix, _label(name), error, count)
+                )
+        metric("request_retries_total", "counter", "Retries taken by the retry policy")
+        for name, op in operations.items():
+            lines.append('%s_request_retries_total{operation="%s"} %d' % (prefix, _label(name), op.retries))
+        metric("request_bytes_out_total", "counter", "Bytes of request bodies sent")
+        for name, op in operations.items():
+            lines.append('%s_request_bytes_out_total{operation="%s"} %d' % (prefix, _label(name), op.bytes_out))
+        metric("response_bytes_in_total", "counter", "Bytes of response bodies received")
+        for name, op in operations.items():
+            lines.append('%s_response_bytes_in_total{operation="%s"} %d' % (prefix, _label(name), op.bytes_in))
+        metric("request_duration_seconds", "histogram", "Duration of requests including retries")
+        for name, op in operations.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), op.histogram):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    '%s_request_duration_seconds_bucket{operation="%s",le="%s"} %d'
+                    % (prefix, _label(name), le, cumulative)
+                )
+            lines.append('%s_request_duration_seconds_sum{operation="%s"} %r' % (prefix, _label(name), op.latency_sum))
+            lines.append('%s_request_duration_seconds_count{operation="%s"} %d' % (prefix, _label(name), op.calls))
+        return "\n".join(lines) + "\n"
+
+    class Operation(object):
+        """
+        Counters of one namespace method
+        """
+
+        __slots__ = ("calls", "errors", "retries", "bytes_in", "bytes_out", "latency_sum", "latency_max", "histogram")
+
+        def __init__(self, size: int):
+            self.calls = 0
+            self.errors = {}
+            self.retries = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.latency_sum = 0.0
+            self.latency_max = 0.0
+            self.histogram = [0] * size
+
+        def copy(self) -> "Metrics.Operation":
+            op = Metrics.Operation(len(self.histogram))
+            for attr in self.__slots__:
+                setattr(op, attr, getattr(self, attr))
+            op.errors = dict(self.errors)
+            op.histogram = list(self.histogram)
+            return op
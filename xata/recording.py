@@ -0,0 +1,399 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import asyncio
+import base64
+import gzip
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import orjson
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .client import __version__
+from .routes import route_template
+from .transport import AsyncTransport, Transport
+
+RECORDING_VERSION = 1
+# the body is stored decoded, the framing headers of the wire do not apply anymore
+RECORDING_SKIP_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie")
+
+
+def _encode_body(data) -> str:
+    """
+    Bodies are stored as text if they are UTF-8, e.g. JSON, else base64 encoded with a `b64:` prefix
+    """
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode()
+    try:
+        text = data.decode()
+        return text if not text.startswith("b64:") else "b64:" + base64.b64encode(data).decode()
+    except UnicodeDecodeError:
+        return "b64:" + base64.b64encode(data).decode()
+
+
+def _decode_body(body: str) -> bytes:
+    if body is None:
+        return None
+    if body.startswith("b64:"):
+        return base64.b64decode(body[4:])
+    return body.encode()
+
+
+class RecordingLog(object):
+    """
+    Append-only log of HTTP exchanges, one JSON document per line. The first
+    line describes the recording, paths ending with `.gz` are gzip compressed.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: str File to write, an existing file is replaced
+        """
+        self.path = path
+        self.file = gzip.open(path, "wb") if path.endswith(".gz") else open(path, "wb")
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self._write(
+            {
+                "recording": RECORDING_VERSION,
+                "sdk": __version__,
+                "created": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    def _write(self, entry: dict):
+        line = orjson.dumps(entry) + b"\n"
+        with self.lock:
+            if self.file is None:
+                raise Exception("recording %s is closed" % self.path)
+            self.file.write(line)
+
+    def append(self, http_method: str, url: str, data: bytes, resp, content: bytes, started: float):
+        """
+        Write an exchange
+
+        :param http_method: str
+        :param url: str
+        :param data: bytes Request body as sent
+        :param resp: requests.Response | httpx.Response
+        :param content: bytes Response body, decoded
+        :param started: float Monotonic time the request was sent
+        """
+        path = urlsplit(url)
+        url_path = path.path + ("?" + path.query if path.query else "")
+        self._write(
+            {
+                "at": round(started - self.started, 6),
+                "method": http_method,
+                "route": route_template(path.path),
+                "path": url_path,
+                "request": _encode_body(data),
+                "status": resp.status_code,
+                "headers": {k.lower(): v for k, v in resp.headers.items() if k.lower() not in RECORDING_SKIP_HEADERS},
+                "response": _encode_body(content),
+                "timings": getattr(resp, "timings", None),
+            }
+        )
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class RecordingTransport(Transport):
+    """
+    Transport that writes every exchange of a client to a recording, to
+    replay the traffic of a real workload later with a ReplayTransport:
+
+    .. code-block:: python
+
+        transport = RecordingTransport("traffic.jsonl.gz")
+        xata = XataClient(transport=transport)
+        ...
+        transport.close()
+
+    Recorded are the route template, the path, the request body, the response with its
+    status, headers and body, and the timings of the request. Request headers, and with
+    them the API key, are not recorded; request and response bodies are, so a recording
+    contains the data read and written. Responses are read completely before they are
+    returned, streamed responses arrive in one piece while recording.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        """
+        :param path: str File of the recording, `.gz` compresses it
+        :param kwargs: Options of the Transport, e.g. `pool_maxsize`
+        """
+        super().__init__(**kwargs)
+        self.log = RecordingLog(path)
+
+    def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ) -> Response:
+        started = time.monotonic()
+        resp = super().request(http_method, url, headers=headers, data=data, is_streaming=is_streaming, trace=trace)
+        # reads the stream into the response, iterating it later serves the read content
+        self.log.append(http_method, url, data, resp, resp.content, started)
+        return resp
+
+    def close(self):
+        super().close()
+        self.log.close()
+
+
+class AsyncRecordingTransport(AsyncTransport):
+    """
+    Asynchronous RecordingTransport, for the AsyncXataClient
+    """
+
+    def __init__(self, path: str, **kwargs):
+        """
+        :param path: str File of the recording, `.gz` compresses it
+        :param kwargs: Options of the AsyncTransport, e.g. `max_connections`
+        """
+        super().__init__(**kwargs)
+        self.log = RecordingLog(path)
+
+    async def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ):
+        started = time.monotonic()
+        resp = await super().request(
+            http_method, url, headers=headers, data=data, is_streaming=is_streaming, trace=trace
+        )
+        self.log.append(http_method, url, data, resp, resp.content, started)
+        return resp
+
+    async def stream(self, http_method: str, url: str, headers: dict = {}, data: bytes = None):
+        started = time.monotonic()
+        resp = await super().stream(http_method, url, headers=headers, data=data)
+        self.log.append(http_method, url, data, resp, await resp.aread(), started)
+        return resp
+
+    async def close(self):
+        await super().close()
+        self.log.close()
+
+
+class Recording(object):
+    """
+    Exchanges of a recording, served in the recorded order per method and path.
+    A request with a body that was recorded is answered with the response to that
+    body, so concurrent requests to the same path are matched deterministically.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: str File of the recording
+
+        :raises Exception if the file is not a recording
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            lines = [orjson.loads(line) for line in f if line.strip()]
+        if not lines or lines[0].get("recording") != RECORDING_VERSION:
+            raise Exception("%s is not a recording of version %d" % (path, RECORDING_VERSION))
+        self.meta = lines[0]
+        self.entries = lines[1:]
+        self.queues = {}
+        for entry in self.entries:
+            self.queues.setdefault((entry["method"], entry["path"]), []).append(entry)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def next(self, http_method: str, url: str, data: bytes) -> dict:
+        """
+        Take the next recorded exchange of a request
+
+        :param http_method: str
+        :param url: str
+        :param data: bytes Request body
+
+        :returns dict
+
+        :raises Exception if the request was not recorded, or all its recordings are served
+        """
+        path = urlsplit(url)
+        url_path = path.path + ("?" + path.query if path.query else "")
+        body = _encode_body(data)
+        with self.lock:
+            queue = self.queues.get((http_method, url_path))
+            if not queue:
+                raise Exception("no recorded response left for %s %s" % (http_method, url_path))
+            for i, entry in enumerate(queue):
+                if entry["request"] == body:
+                    return queue.pop(i)
+            return queue.pop(0)
+
+    def remaining(self) -> int:
+        """
+        Amount of recorded exchanges not served yet
+        """
+        with self.lock:
+            return sum(len(q) for q in self.queues.values())
+
+
+class ReplayTransport(object):
+    """
+    Transport that answers the requests of a client from a recording, without
+    network access. Compare the client side cost of a workload between SDK
+    versions, or profile it, against identical traffic:
+
+    .. code-block:: python
+
+        xata = XataClient(api_key="replay", workspace_id="ws", transport=ReplayTransport("traffic.jsonl.gz"))
+
+    By default responses are served as fast as possible, `speed=1` waits as long
+    as the recorded request took and `speed=10` replays ten times faster.
+    """
+
+    def __init__(self, path: str, speed: float = None):
+        """
+        :param path: str File of the recording
+        :param speed: float Replay the recorded latency accelerated by this factor, None does not wait (default: None)
+
+        :raises Exception if the speed is not greater than 0
+        """
+        if speed is not None and speed <= 0:
+            raise Exception("speed must be greater than 0 or None")
+        self.recording = Recording(path)
+        self.speed = speed
+        self.accept_encoding = "gzip, deflate"
+
+    def _delay(self, entry: dict) -> float:
+        if self.speed is None or not entry.get("timings"):
+            return 0.0
+        return (entry["timings"].get("total") or 0.0) / self.speed
+
+    def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ) -> Response:
+        """
+        Serve the recorded response of a request
+
+        :param http_method: str
+        :param url: str
+        :param headers: dict = {}
+        :param data: bytes = None Serialized request body
+        :param is_streaming: bool = False
+        :param trace: bool = True Ignored, the recorded timings are served
+
+        :returns requests.Response with the recorded timings in `timings`
+
+        :raises Exception if the request was not recorded
+        """
+        entry = self.recording.next(http_method, url, data)
+        delay = self._delay(entry)
+        if delay:
+            time.sleep(delay)
+        resp = Response()
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = _decode_body(entry["response"]) or b""
+        resp._content_consumed = True
+        resp.url = url
+        resp.timings = dict(entry["timings"] or {})
+        return resp
+
+    def close(self):
+        pass
+
+
+class AsyncReplayTransport(ReplayTransport):
+    """
+    Asynchronous ReplayTransport, for the AsyncXataClient. Requires the
+    optional dependency `httpx`, install it with: `pip install xata[async]`
+    """
+
+    def __init__(self, path: str, speed: float = None):
+        """
+        :param path: str File of the recording
+        :param speed: float Replay the recorded latency accelerated by this factor, None does not wait (default: None)
+
+        :raises Exception if httpx is not installed, or the speed is not greater than 0
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise Exception("The async client requires httpx, please install it with: pip install xata[async]")
+        super().__init__(path, speed)
+        self.httpx = httpx
+
+    async def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ):
+        """
+        Serve the recorded response of a request
+
+        :returns httpx.Response with the recorded timings in `timings`
+        """
+        entry = self.recording.next(http_method, url, data)
+        delay = self._delay(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        resp = self.httpx.Response(
+            entry["status"],
+            headers=entry["headers"],
+            content=_decode_body(entry["response"]) or b"",
+            request=self.httpx.Request(http_method, url),
+        )
+        resp.timings = dict(entry["timings"] or {})
+        return resp
+
+    async def stream(self, http_method: str, url: str, headers: dict = {}, data: bytes = None):
+        return await self.request(http_method, url, headers, data, is_streaming=True)
+
+    async def close(self):
+        pass
@@ -0,0 +1,345 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+import random
+import threading
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+from urllib.parse import urlsplit
+
+from .errors import CircuitOpenError
+
+RETRY_DEFAULT_MAX_RETRIES = 3
+RETRY_DEFAULT_BACKOFF = 0.5
+RETRY_DEFAULT_MAX_BACKOFF = 30.0
+RETRY_DEFAULT_BUDGET_RATIO = 0.2
+RETRY_DEFAULT_BUDGET_MIN_RETRIES = 10
+RETRY_DEFAULT_BUDGET_WINDOW = 10.0
+RETRY_DEFAULT_BREAKER_THRESHOLD = 5
+RETRY_DEFAULT_BREAKER_RESET_TIMEOUT = 30.0
+
+# status codes worth another attempt, 429 requests have not been processed
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# methods that have the same effect when sent more than once
+RETRY_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# read-only POST endpoints, safe to send again
+RETRY_SAFE_ENDPOINTS = (
+    "POST /db/*/tables/*/query",
+    "POST /db/*/tables/*/search",
+    "POST /db/*/tables/*/vectorSearch",
+    "POST /db/*/tables/*/aggregate",
+    "POST /db/*/tables/*/summarize",
+    "POST /db/*/search",
+)
+
+
+class RetryPolicy(object):
+    """
+    Retry policy of a client, applied to every request sent by its namespaces.
+
+    Failed requests are retried with exponential backoff and full jitter, a
+    Retry-After header of a 429 is honored. Idempotent methods are retried on
+    connection errors and 5xx, POST requests only if the endpoint is marked safe,
+    except for 429 responses, those requests have not been processed. Endpoints
+    are matched as `"<METHOD> <path pattern>"`, with `*` as wildcard:
+
+    .. code-block:: python
+
+        policy = RetryPolicy(overrides={
+            "POST /db/*/sql": {"safe": True, "max_retries": 1},
+            "POST /db/*/transaction": {"max_retries": 0},
+        })
+        xata = XataClient(retry_policy=policy)
+
+    Retries are limited by a budget, a share of the requests in a sliding window,
+    so an outage does not multiply the load. A circuit breaker per host opens after
+    consecutive failures, requests then fail fast with a `CircuitOpenError` until
+    a probe request succeeds after the reset timeout.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = RETRY_DEFAULT_MAX_RETRIES,
+        backoff: float = RETRY_DEFAULT_BACKOFF,
+        max_backoff: float = RETRY_DEFAULT_MAX_BACKOFF,
+        jitter: bool = True,
+        retry_status_codes: tuple = RETRY_STATUS_CODES,
+        safe_endpoints: tuple = RETRY_SAFE_ENDPOINTS,
+        overrides: dict = None,
+        budget_ratio: float = RETRY_DEFAULT_BUDGET_RATIO,
+        budget_min_retries: int = RETRY_DEFAULT_BUDGET_MIN_RETRIES,
+        budget_window: float = RETRY_DEFAULT_BUDGET_WINDOW,
+        breaker_threshold: int = RETRY_DEFAULT_BREAKER_THRESHOLD,
+        breaker_reset_timeout: float = RETRY_DEFAULT_BREAKER_RESET_TIMEOUT,
+    ):
+        """
+        :param max_retries: int Retries after the first attempt (default: 3)
+        :param backoff: float Seconds to wait before the first retry, doubled with every retry (default: 0.5)
+        :param max_backoff: float Upper bound of the wait between attempts (default: 30)
+        :param jitter: bool Wait a random share of the backoff, to spread retries of many clients (default: True)
+        :param retry_status_codes: tuple Response status codes to retry (default: 429, 500, 502, 503, 504)
+        :param safe_endpoints: tuple Non-idempotent endpoints that can be retried (default: read-only POSTs)
+        :param overrides: dict Endpoint pattern to a dict of `max_retries`, `backoff`, `max_backoff` or `safe`.
+            The first matching pattern wins (default: None)
+        :param budget_ratio: float Share of requests in the window that may be retries (default: 0.2)
+        :param budget_min_retries: int Retries always allowed per window, for low traffic (default: 10)
+        :param budget_window: float Seconds of the sliding window of the budget (default: 10)
+        :param breaker_threshold: int Consecutive failures that open the circuit of a host, None disables
+            the breaker (default: 5)
+        :param breaker_reset_timeout: float Seconds to fail fast before a probe request is let through (default: 30)
+        """
+        if max_retries < 0:
+            raise Exception("max retries must be 0 or greater, default: %d" % RETRY_DEFAULT_MAX_RETRIES)
+        if backoff <= 0:
+            raise Exception("backoff must be greater than 0, default: %s" % RETRY_DEFAULT_BACKOFF)
+        if max_backoff < backoff:
+            raise Exception("max backoff must not be lower than backoff, default: %s" % RETRY_DEFAULT_MAX_BACKOFF)
+        if not 0 <= budget_ratio <= 1:
+            raise Exception("budget ratio must be between 0 and 1, default: %s" % RETRY_DEFAULT_BUDGET_RATIO)
+        if budget_window <= 0:
+            raise Exception("budget window must be greater than 0, default: %s" % RETRY_DEFAULT_BUDGET_WINDOW)
+        if breaker_threshold is not None and breaker_threshold < 1:
+            raise Exception("breaker threshold must be greater than 0, default: %d" % RETRY_DEFAULT_BREAKER_THRESHOLD)
+
+        self.defaults = {"max_retries": max_retries, "backoff": backoff, "max_backoff": max_backoff}
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.safe_endpoints = tuple(safe_endpoints)
+        self.overrides = [] if overrides is None else [(p, self._parse_override(p, o)) for p, o in overrides.items()]
+        self.budget = self.Budget(budget_ratio, budget_min_retries, budget_window)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self.breakers = {}
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "exhausted": 0, "budget_exceeded": 0, "rejected": 0}
+
+    @staticmethod
+    def _parse_override(pattern: str, override: dict) -> dict:
+        unknown = set(override.keys()) - {"max_retries", "backoff", "max_backoff", "safe"}
+        if unknown:
+            raise Exception("unknown retry settings for '%s': %s" % (pattern, ", ".join(sorted(unknown))))
+        return override
+
+    def rule(self, http_method: str, url_path: str) -> dict:
+        """
+        Resolve the retry settings of an endpoint
+
+        :param http_method: str
+        :param url_path: str
+
+        :returns dict with max_retries, backoff, max_backoff and safe
+        """
+        endpoint = "%s %s" % (http_method.upper(), url_path)
+        rule = dict(self.defaults)
+        rule["safe"] = http_method.upper() in RETRY_IDEMPOTENT_METHODS or any(
+            fnmatchcase(endpoint, p) for p in self.safe_endpoints
+        )
+        for pattern, override in self.overrides:
+            if fnmatchcase(endpoint, pattern):
+                rule.update(override)
+                break
+        return rule
+
+    def acquire(self, url: str, attempt: int = 0):
+        """
+        Announce an attempt, fails fast if the circuit of the host is open
+
+        :param url: str Full URL of the request
+        :param attempt: int Retries taken so far, 0 for the first attempt
+
+        :raises CircuitOpenError
+        """
+        if attempt == 0:
+            self.budget.deposit()
+            with self.lock:
+                self.stats["requests"] += 1
+        if self.breaker_threshold is None:
+            return
+        host = urlsplit(url).netloc
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = self.CircuitBreaker(self.breaker_threshold, self.breaker_reset_timeout)
+            if not breaker.allow():
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(host, breaker.retry_in())
+
+    def record(self, url: str, healthy: bool):
+        """
+        Report the outcome of an attempt to the circuit breaker of the host
+
+        :param url: str Full URL of the request
+        :param healthy: bool False for connection errors and 5xx responses
+        """
+        if self.breaker_threshold is None:
+            return
+        with self.lock:
+            breaker = self.breakers.get(urlsplit(url).netloc)
+            if breaker is not None:
+                breaker.record(healthy)
+
+    def release(self, url: str):
+        """
+        Report an attempt abandoned before its outcome was known, e.g. cancelled
+        or interrupted. Frees the probe of a half-open circuit without counting
+        a failure, so the next request probes the host again.
+
+        :param url: str Full URL of the request
+        """
+        if self.breaker_threshold is None:
+            return
+        with self.lock:
+            breaker = self.breakers.get(urlsplit(url).netloc)
+            if breaker is not None:
+                breaker.probing = False
+
+    def retry_delay(
+        self,
+        http_method: str,
+        url_path: str,
+        attempt: int,
+        status_code: int = None,
+        retry_after: float = None,
+    ) -> float:
+        """
+        Decide if a failed attempt is retried
+
+        :param http_method: str
+        :param url_path: str
+        :param attempt: int Retries taken so far
+        :param status_code: int Status of the response, None if the request raised a connection error
+        :param retry_after: float Seconds requested by the server, None if not given
+
+        :returns float seconds to wait before the next attempt, None to give up
+        """
+        if status_code is not None and status_code not in self.retry_status_codes:
+            return None
+        rule = self.rule(http_method, url_path)
+        # rate limited requests have not been processed, anything else might have been
+        if status_code != 429 and not rule["safe"]:
+            return None
+        if attempt >= rule["max_retries"]:
+            with self.lock:
+                self.stats["exhausted"] += 1
+            return None
+        if not self.budget.withdraw():
+            with self.lock:
+                self.stats["budget_exceeded"] += 1
+            return None
+        wait = min(rule["backoff"] * 2**attempt, rule["max_backoff"])
+        if self.jitter:
+            wait = random.uniform(0, wait)
+        if retry_after is not None:
+            wait = max(wait, retry_after)
+        with self.lock:
+            self.stats["retries"] += 1
+        return wait
+
+    def get_stats(self) -> dict:
+        """
+        Counters of the policy and the state of the circuit breakers
+
+        :returns dict
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["circuits"] = {host: b.state() for host, b in self.breakers.items()}
+        return stats
+
+    class Budget(object):
+        """
+        Sliding window of requests and retries, allows a retry while retries
+        stay below a share of the requests or the minimum per window
+        """
+
+        def __init__(self, ratio: float, min_retries: int, window: float):
+            self.ratio = ratio
+            self.min_retries = min_retries
+            self.window = window
+            self.requests = deque()
+            self.retries = deque()
+            self.lock = threading.Lock()
+
+        def _expire(self, now: float):
+            for q in (self.requests, self.retries):
+                while q and q[0] <= now - self.window:
+                    q.popleft()
+
+        def deposit(self):
+            now = time.monotonic()
+            with self.lock:
+                self._expire(now)
+                self.requests.append(now)
+
+        def withdraw(self) -> bool:
+            now = time.monotonic()
+            with self.lock:
+                self._expire(now)
+                if len(self.retries) >= max(self.min_retries, self.ratio * len(self.requests)):
+                    return False
+                self.retries.append(now)
+                return True
+
+    class CircuitBreaker(object):
+        """
+        Closed while requests succeed, open after `threshold` consecutive failures.
+        Once open for `reset_timeout` seconds, a single probe is let through: the
+        circuit closes if it succeeds and opens again if it fails.
+        Not thread-safe, guarded by the lock of the policy.
+        """
+
+        def __init__(self, threshold: int, reset_timeout: float):
+            self.threshold = threshold
+            self.reset_timeout = reset_timeout
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+        def state(self) -> str:
+            if self.opened_at is None:
+                return "closed"
+            if self.probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+        def retry_in(self) -> float:
+            return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+        def allow(self) -> bool:
+            state = self.state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+        def record(self, healthy: bool):
+            if healthy:
+                self.failures = 0
+                self.opened_at = None
+                self.probing = False
+                return
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self.probing = False
@@ -0,0 +1,173 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+# route templates of every endpoint, with the namespace method of each HTTP method,
+# to report requests without ids and names
+ROUTES = {
+    "/db/{db_branch}": {"DELETE": "branch.delete", "GET": "branch.get_details", "PUT": "branch.create"},
+    "/db/{db_branch}/metadata": {"GET": "branch.get_metadata", "PUT": "branch.update_metadata"},
+    "/db/{db_branch}/migrations": {"GET": "migrations.get_history"},
+    "/db/{db_branch}/migrations/execute": {"POST": "migrations.execute_plan"},
+    "/db/{db_branch}/migrations/plan": {"POST": "migrations.get_plan"},
+    "/db/{db_branch}/schema/apply": {"POST": "migrations.apply"},
+    "/db/{db_branch}/schema/compare": {"POST": "migrations.compare_branch_with_user_schema"},
+    "/db/{db_branch}/schema/compare/{branch}": {"POST": "migrations.compare_schemas"},
+    "/db/{db_branch}/schema/history": {"POST": "migrations.get_schema_history"},
+    "/db/{db_branch}/schema/preview": {"POST": "migrations.preview"},
+    "/db/{db_branch}/schema/push": {"POST": "migrations.push"},
+    "/db/{db_branch}/schema/update": {"POST": "migrations.upadte_schema"},
+    "/db/{db_branch}/search": {"POST": "data.search_branch"},
+    "/db/{db_branch}/sql": {"POST": "sql.query"},
+    "/db/{db_branch}/stats": {"GET": "branch.get_stats"},
+    "/db/{db_branch}/tables/{table}": {"DELETE": "table.delete", "PATCH": "table.update", "PUT": "table.create"},
+    "/db/{db_branch}/tables/{table}/aggregate": {"POST": "data.aggregate"},
+    "/db/{db_branch}/tables/{table}/ask": {"POST": "data.ask"},
+    "/db/{db_branch}/tables/{table}/ask/{session_id}": {"POST": "data.ask_follow_up"},
+    "/db/{db_branch}/tables/{table}/bulk": {"POST": "records.bulk_insert"},
+    "/db/{db_branch}/tables/{table}/columns": {"GET": "table.get_columns", "POST": "table.add_column"},
+    "/db/{db_branch}/tables/{table}/columns/{column}": {
+        "DELETE": "table.delete_column",
+        "GET": "table.get_column",
+        "PATCH": "table.update_column",
+    },
+    "/db/{db_branch}/tables/{table}/data": {"POST": "records.insert"},
+    "/db/{db_branch}/tables/{table}/data/{record_id}": {
+        "DELETE": "records.delete",
+        "GET": "records.get",
+        "PATCH": "records.update",
+        "POST": "records.upsert",
+        "PUT": "records.insert_with_id",
+    },
+    "/db/{db_branch}/tables/{table}/data/{record_id}/column/{column}/file": {
+        "DELETE": "files.delete",
+        "GET": "files.get",
+        "PUT": "files.put",
+    },
+    "/db/{db_branch}/tables/{table}/data/{record_id}/column/{column}/file/{file_id}": {
+        "DELETE": "files.delete_item",
+        "GET": "files.get_item",
+        "PUT": "files.put_item",
+    },
+    "/db/{db_branch}/tables/{table}/query": {"POST": "data.query"},
+    "/db/{db_branch}/tables/{table}/schema": {"GET": "table.get_schema", "PUT": "table.set_schema"},
+    "/db/{db_branch}/tables/{table}/search": {"POST": "data.search_table"},
+    "/db/{db_branch}/tables/{table}/summarize": {"POST": "data.summarize"},
+    "/db/{db_branch}/tables/{table}/vectorSearch": {"POST": "data.vector_search"},
+    "/db/{db_branch}/transaction": {"POST": "records.transaction"},
+    "/dbs/{db}": {"GET": "branch.list"},
+    "/dbs/{db}/gitBranches": {
+        "DELETE": "branch.remove_git_branches_entry",
+        "GET": "branch.get_git_branches_mapping",
+        "POST": "branch.add_git_branches_entry",
+    },
+    "/dbs/{db}/resolveBranch": {"GET": "branch.resolve"},
+    "/user": {"DELETE": "users.delete", "GET": "users.get", "PUT": "users.update"},
+    "/user/keys": {"GET": "authentication.get_user_api_keys"},
+    "/user/keys/{key}": {
+        "DELETE": "authentication.delete_user_api_keys",
+        "POST": "authentication.create_user_api_keys",
+    },
+    "/user/oauth/clients": {"GET": "oauth.get_clients"},
+    "/user/oauth/clients/{client_id}": {"DELETE": "oauth.delete_clients"},
+    "/user/oauth/tokens": {"GET": "oauth.get_access_tokens"},
+    "/user/oauth/tokens/{token}": {"DELETE": "oauth.delete_access_tokens", "PATCH": "oauth.update_access_tokens"},
+    "/workspaces": {"GET": "workspaces.list", "POST": "workspaces.create"},
+    "/workspaces/{workspace}": {"DELETE": "workspaces.delete", "GET": "workspaces.get", "PUT": "workspaces.update"},
+    "/workspaces/{workspace}/dbs": {"GET": "databases.list"},
+    "/workspaces/{workspace}/dbs/{db}": {
+        "DELETE": "databases.delete",
+        "GET": "databases.get_metadata",
+        "PATCH": "databases.update_metadata",
+        "PUT": "databases.create",
+    },
+    "/workspaces/{workspace}/dbs/{db}/rename": {"POST": "databases.rename"},
+    "/workspaces/{workspace}/invites": {"POST": "invites.new"},
+    "/workspaces/{workspace}/invites/{invite_id}": {"DELETE": "invites.cancel", "PATCH": "invites.update"},
+    "/workspaces/{workspace}/invites/{invite_id}/resend": {"POST": "invites.resend"},
+    "/workspaces/{workspace}/invites/{invite_key}/accept": {"POST": "invites.accept"},
+    "/workspaces/{workspace}/members": {"GET": "workspaces.get_members"},
+    "/workspaces/{workspace}/members/{user_id}": {
+        "DELETE": "workspaces.remove_member",
+        "PUT": "workspaces.update_member",
+    },
+    "/workspaces/{workspace}/regions": {"GET": "databases.get_regions"},
+}
+
+
+# key of the route template in a trie node
+_ROUTE = ()
+
+
+def _trie(routes: dict) -> dict:
+    """
+    Trie of route segments, placeholders are stored under None
+    """
+    trie = {}
+    for route in routes:
+        node = trie
+        for segment in route.strip("/").split("/"):
+            node = node.setdefault(None if segment.startswith("{") else segment, {})
+        node[_ROUTE] = route
+    return trie
+
+
+_ROUTES_TRIE = _trie(ROUTES)
+
+
+def _match(node: dict, segments: list, i: int) -> str:
+    """
+    Walk the trie, a literal segment wins over a placeholder, so `/schema/history` is not `/tables/{table}`
+    """
+    if i == len(segments):
+        return node.get(_ROUTE)
+    child = node.get(segments[i])
+    if child is not None:
+        route = _match(child, segments, i + 1)
+        if route is not None:
+            return route
+    child = node.get(None)
+    return _match(child, segments, i + 1) if child is not None else None
+
+
+def route_template(url_path: str) -> str:
+    """
+    Map the path of a request to its route template, ids and names are replaced
+    by placeholders and the query string is dropped:
+    `/db/blog:main/tables/Posts/query` becomes `/db/{db_branch}/tables/{table}/query`
+
+    :param url_path: str
+
+    :returns str the template, or the path without query string if the route is unknown
+    """
+    path = url_path.split("?", 1)[0]
+    route = _match(_ROUTES_TRIE, path.strip("/").split("/"), 0)
+    return route if route is not None else path
+
+
+def operation_name(http_method: str, route: str) -> str:
+    """
+    Name of the namespace method of an endpoint, e.g. `data.query`
+
+    :param http_method: str
+    :param route: str Route template
+
+    :returns str or "<METHOD> <route>" if the endpoint is unknown
+    """
+    name = ROUTES.get(route, {}).get(http_method.upper())
+    return name if name is not None else "%s %s" % (http_method.upper(), route)
@@ -0,0 +1,109 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+from typing import Iterator
+
+import orjson
+
+
+class SSEDecoder(object):
+    """
+    Incremental decoder for server-sent events. Chunks of the response body are
+    fed as they arrive, complete events are returned right away and only the
+    incomplete tail of the stream is buffered.
+
+    https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation
+    """
+
+    def __init__(self):
+        self.buffer = b""
+        self.event = None
+        self.data = []
+        self.last_id = None
+
+    def feed(self, chunk: bytes) -> Iterator[dict]:
+        """
+        Decode a chunk of the stream
+
+        :param chunk: bytes
+
+        :returns Iterator[dict] complete events as `{"event": str, "data": str, "id": str}`
+        """
+        buffer = self.buffer + chunk
+        start = 0
+        try:
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    return
+                line = buffer[start:end].rstrip(b"\r").decode("utf-8")
+                start = end + 1
+                event = self._line(line)
+                if event is not None:
+                    yield event
+        finally:
+            # trimmed once, also if the caller stops iterating early
+            self.buffer = buffer[start:]
+
+    def close(self) -> Iterator[dict]:
+        """
+        End of the stream, an event without trailing blank line is still dispatched
+
+        :returns Iterator[dict]
+        """
+        if self.buffer:
+            yield from self.feed(b"\n")
+        event = self._line("")
+        if event is not None:
+            yield event
+
+    def _line(self, line: str) -> dict:
+        if line == "":
+            # blank line dispatches the event
+            if not self.data:
+                self.event = None
+                return None
+            event = {"event": self.event or "message", "data": "\n".join(self.data), "id": self.last_id}
+            self.event, self.data = None, []
+            return event
+        if line.startswith(":"):
+            # comment, used as keep alive
+            return None
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self.data.append(value)
+        elif field == "event":
+            self.event = value
+        elif field == "id":
+            self.last_id = value
+        return None
+
+
+def decode_data(event: dict):
+    """
+    Decode the data of an event as JSON, the raw string if it is no JSON
+
+    :param event: dict as returned by `SSEDecoder`
+    """
+    try:
+        return orjson.loads(event["data"])
+    except orjson.JSONDecodeError:
+        return event["data"]
@@ -0,0 +1,367 @@
+#
+# Licensed to Xatabase, Inc under one or more contributor
+# license agreements. See the NOTICE file distributed with
+# this work for additional information regarding copyright
+# ownership. Xatabase, Inc licenses this file to you under the
+# Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You
+# may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import socket
+import threading
+import time
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.request import ACCEPT_ENCODING
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_KEEPALIVE_EXPIRY = None
+ASYNC_DEFAULT_MAX_CONNECTIONS = 100
+ASYNC_DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 100
+ASYNC_DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = None
+
+# timings of the request in flight on the current thread
+_trace = threading.local()
+
+
+def new_timings(trace: bool = True) -> dict:
+    """
+    Timings of a request in seconds, phases of pooled connections take 0,
+    phases that can not be measured stay None
+
+    :param trace: bool False if only the total is measured
+    """
+    if not trace:
+        return {"dns": None, "connect": None, "tls": None, "ttfb": None, "total": None}
+    return {"dns": 0.0, "connect": 0.0, "tls": 0.0, "ttfb": None, "total": None}
+
+
+class _TracedConnection(object):
+    """
+    Measures DNS, connect, TLS and time to first byte of urllib3 connections
+    for the request in flight on the current thread, if it is traced. Untraced
+    requests connect like plain urllib3 connections.
+    """
+
+    def _new_conn(self) -> socket.socket:
+        timings = getattr(_trace, "timings", None)
+        if timings is None:
+            return super()._new_conn()
+        host = self._dns_host
+        start = time.monotonic()
+        try:
+            infos = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        except OSError:
+            # let urllib3 report the resolution error
+            addresses = [host]
+        resolved = time.monotonic()
+        timings["dns"] = resolved - start
+        try:
+            # try the addresses in order, like urllib3 does
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+            timings["connect"] = time.monotonic() - resolved
+
+    def connect(self):
+        timings = getattr(_trace, "timings", None)
+        start = time.monotonic()
+        super().connect()
+        if timings is not None:
+            timings["tls"] = max(time.monotonic() - start - timings["dns"] - timings["connect"], 0.0)
+
+    def request(self, *args, **kwargs):
+        _trace.sent = time.monotonic()
+        return super().request(*args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        resp = super().getresponse(*args, **kwargs)
+        timings = getattr(_trace, "timings", None)
+        if timings is not None:
+            timings["ttfb"] = time.monotonic() - _trace.sent
+        return resp
+
+
+class _TracedHTTPConnection(_TracedConnection, HTTPConnection):
+    pass
+
+
+class _TracedHTTPSConnection(_TracedConnection, HTTPSConnection):
+    pass
+
+
+class _TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TracedHTTPConnection
+
+
+class _TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TracedHTTPSConnection
+
+
+class TracingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with connections that report timings of each phase of a request
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TracedHTTPConnectionPool,
+            "https": _TracedHTTPSConnectionPool,
+        }
+
+
+class Transport(object):
+    """
+    Pooled HTTP transport, owned by the XataClient and shared by all of its
+    namespaces. Connections to the control and data plane are reused across
+    every API call of a client.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ):
+        """
+        :param pool_connections: int Amount of hosts to keep a connection pool for (default: 10)
+        :param pool_maxsize: int Maximum amount of connections kept per host (default: 10)
+        :param keepalive_expiry: float Seconds after which pooled connections are recycled, None keeps
+            them until the server closes them (default: None)
+        :param connect_timeout: float Seconds to wait for a connection to be established (default: 10)
+        :param read_timeout: float Seconds to wait for a chunk of the response, None waits forever (default: None)
+        """
+        if pool_connections < 1:
+            raise Exception("pool connections must be greater than 0, default: %d" % DEFAULT_POOL_CONNECTIONS)
+        if pool_maxsize < 1:
+            raise Exception("pool maxsize must be greater than 0, default: %d" % DEFAULT_POOL_MAXSIZE)
+        if keepalive_expiry is not None and keepalive_expiry <= 0:
+            raise Exception("keepalive expiry must be greater than 0 or None")
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = (connect_timeout, read_timeout)
+
+        # every content encoding urllib3 can decode
+        self.accept_encoding = ", ".join(e.strip() for e in ACCEPT_ENCODING.split(","))
+
+        self.session = Session()
+        self.lock = threading.Lock()
+        self._mount_adapter()
+
+    def _mount_adapter(self):
+        adapter = TracingHTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_created = time.monotonic()
+
+    def _recycle_expired_pool(self):
+        if self.keepalive_expiry is None or time.monotonic() - self.pool_created < self.keepalive_expiry:
+            return
+        with self.lock:
+            if time.monotonic() - self.pool_created < self.keepalive_expiry:
+                return
+            expired = self.session.get_adapter("https://")
+            self._mount_adapter()
+        # connections still in use are closed once they are returned
+        expired.close()
+
+    def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ) -> Response:
+        """
+        Send a request through the connection pool
+
+        :param http_method: str
+        :param url: str
+        :param headers: dict = {}
+        :param data: bytes = None Serialized request body
+        :param is_streaming: bool = False
+        :param trace: bool = True Measure each phase of the request, only the total otherwise
+
+        :returns requests.Response with the timings of the request in `timings`
+        """
+        self._recycle_expired_pool()
+        timings = new_timings(trace)
+        _trace.timings = timings if trace else None
+        start = time.monotonic()
+        try:
+            resp = self.session.request(
+                http_method,
+                url,
+                headers=headers,
+                data=data,
+                stream=is_streaming,
+                timeout=self.timeout,
+            )
+        finally:
+            _trace.timings = None
+        timings["total"] = time.monotonic() - start
+        resp.timings = timings
+        return resp
+
+    def close(self):
+        """
+        Close all pooled connections
+        """
+        self.session.close()
+
+
+class AsyncTransport(object):
+    """
+    Pooled asynchronous HTTP transport, shared by all namespaces of an
+    AsyncXataClient. Requires the optional dependency `httpx`, install
+    it with: `pip install xata[async]`
+    """
+
+    def __init__(
+        self,
+        max_connections: int = ASYNC_DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = ASYNC_DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = ASYNC_DEFAULT_KEEPALIVE_EXPIRY,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ):
+        """
+        :param max_connections: int Maximum amount of concurrent connections (default: 100)
+        :param max_keepalive_connections: int Maximum amount of idle connections kept in the pool (default: 100)
+        :param keepalive_expiry: float Seconds an idle connection is kept alive (default: 30)
+        :param connect_timeout: float Seconds to wait for a connection to be established (default: 10)
+        :param read_timeout: float Seconds to wait for a chunk of the response, None waits forever (default: None)
+
+        :raises Exception if httpx is not installed
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise Exception("The async client requires httpx, please install it with: pip install xata[async]")
+
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(connect=connect_timeout, read=read_timeout, write=None, pool=None),
+        )
+        # every content encoding httpx can decode, depends on the installed packages
+        try:
+            from httpx._decoders import SUPPORTED_DECODERS
+
+            self.accept_encoding = ", ".join(e for e in SUPPORTED_DECODERS if e != "identity")
+        except ImportError:
+            self.accept_encoding = "gzip, deflate"
+
+    async def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: dict = {},
+        data: bytes = None,
+        is_streaming: bool = False,
+        trace: bool = True,
+    ):
+        """
+        Send a request through the connection pool
+
+        :param http_method: str
+        :param url: str
+        :param headers: dict = {}
+        :param data: bytes = None Serialized request body
+        :param is_streaming: bool = False
+        :param trace: bool = True Measure each phase of the request, only the total otherwise
+
+        :returns httpx.Response with the timings of the request in `timings`
+        """
+        timings = new_timings(trace)
+        start = time.monotonic()
+        extensions = {"trace": self._tracer(timings)} if trace else None
+        req = self.client.build_request(http_method, url, headers=headers, content=data, extensions=extensions)
+        resp = await self.client.send(req, stream=is_streaming)
+        if is_streaming:
+            # consume the stream to release the connection back to the pool
+            await resp.aread()
+            await resp.aclose()
+        timings["total"] = time.monotonic() - start
+        resp.timings = timings
+        return resp
+
+    @staticmethod
+    def _tracer(timings: dict):
+        """
+        Trace callback of httpcore, DNS is part of connect and not reported separately
+        """
+        timings["dns"] = None
+        started = {}
+
+        async def trace(event: str, info: dict):
+            now = time.monotonic()
+            phase, _, state = event.rpartition(".")
+            if state == "started":
+                started[phase] = now
+            elif state == "complete" and phase in started:
+                if phase == "connection.connect_tcp":
+                    timings["connect"] = now - started[phase]
+                elif phase == "connection.start_tls":
+                    timings["tls"] = now - started[phase]
+                elif phase.endswith(".receive_response_headers"):
+                    request_started = started.get(phase.split(".")[0] + ".send_request_headers")
+                    if request_started is not None:
+                        timings["ttfb"] = now - request_started
+
+        return trace
+
+    async def stream(self, http_method: str, url: str, headers: dict = {}, data: bytes = None):
+        """
+        Send a request and return as soon as the headers arrived. The body is read
+        by the caller, which has to close the response to release the connection.
+
+        :param http_method: str
+        :param url: str
+        :param headers: dict = {}
+        :param data: bytes = None Serialized request body
+
+        :returns httpx.Response
+        """
+        req = self.client.build_request(http_method, url, headers=headers, content=data)
+        return await self.client.send(req, stream=True)
+
+    async def close(self):
+        """
+        Close all pooled connections
+        """
+        await self.client.aclose()